@@ -0,0 +1,232 @@
+"""Benchmark | Fake Discord
+
+An in-process stand-in for Discord, so the bot can be driven under load
+without a network connection or a token.
+
+FakeHTTP:
+    Replaces discord.py's HTTP client at the request level, so every REST
+    call the bot makes (sends, edits, deletes, reactions, log batches)
+    goes through the real discord.py code, then gets a fake response after
+    a simulated latency. Simulates per-bucket rate limits by making the
+    call wait out the limit, like discord.py does after a 429.
+
+FakeGateway:
+    Stands in for the gateway connection. Builds a guild with members,
+    roles, and channels through discord.py's own parsers, and feeds
+    MESSAGE_CREATE payloads through the same parser the real gateway uses.
+"""
+import asyncio
+import datetime
+import random
+import re
+import time
+from collections import Counter, defaultdict
+
+from discord.http import HTTPClient
+
+DISCORD_EPOCH = 1420070400000
+
+class Snowflakes:
+    """Generates unique, time ordered Discord IDs."""
+    def __init__(self):
+        self._counter = 0
+
+    def __call__(self):
+        self._counter += 1
+        return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (self._counter & 0x3FFFFF)
+
+def iso_now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+def user_payload(user_id, name, bot = False):
+    return {"id": str(user_id), "username": name, "discriminator": "0001", "avatar": None, "bot": bot}
+
+class FakeHTTP(HTTPClient):
+    # Pulls the message ID out of a message route's URL.
+    MESSAGE_ID = re.compile(r"/messages/(\d+)")
+
+    def __init__(self, gateway, latency = 0.05, jitter = 0.25, rate_limit = (50, 1.0), loop = None):
+        """
+        Parameters:
+            - latency (:class:`float`) -
+                The average time, in seconds, each request takes.
+            - jitter (:class:`float`) -
+                How much the latency varies, as a fraction of the latency.
+            - rate_limit (:class:`tuple`) -
+                `(requests, seconds)` allowed per rate limit bucket, or `None` for no limit.
+        """
+        super().__init__(loop = loop)
+        self.gateway = gateway
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+
+        # bucket -> [window start, requests in window]
+        self._buckets = defaultdict(lambda: [0.0, 0])
+
+        self.calls = Counter()
+        self.rate_limited = 0
+        self.rate_limit_wait = 0.0
+
+    async def _wait_for_bucket(self, bucket):
+        if not self.rate_limit:
+            return
+        limit, per = self.rate_limit
+        loop = asyncio.get_running_loop()
+        while True:
+            window = self._buckets[bucket]
+            now = loop.time()
+            if now - window[0] >= per:
+                window[0], window[1] = now, 0
+            if window[1] < limit:
+                window[1] += 1
+                return
+            # Over the limit, which Discord answers with a 429. Wait it out like discord.py would.
+            retry_after = per - (now - window[0])
+            self.rate_limited += 1
+            self.rate_limit_wait += retry_after
+            await asyncio.sleep(retry_after)
+
+    async def request(self, route, *, files = None, form = None, **kwargs):
+        self.calls[f"{route.method} {route.path}"] += 1
+        await self._wait_for_bucket(f"{route.method} {route.bucket}")
+        if self.latency:
+            await asyncio.sleep(max(0.0, random.gauss(self.latency, self.latency * self.jitter)))
+
+        payload = kwargs.get('json') or {}
+        if route.path == '/channels/{channel_id}/messages' and route.method == 'POST':
+            response = self.gateway.bot_message(route.channel_id, payload)
+            self.gateway.replied(route.channel_id)
+            return response
+        if route.path == '/channels/{channel_id}/messages/{message_id}' and route.method == 'PATCH':
+            message_id = int(self.MESSAGE_ID.search(route.url).group(1))
+            return self.gateway.bot_message(route.channel_id, payload, message_id = message_id)
+        return None
+
+    async def close(self):
+        pass
+
+class FakeGateway:
+    def __init__(self, bot, members = 100, channels = 20, roles = 50, roles_per_member = 10, latency = 0.05):
+        self.bot = bot
+        self.latency = latency
+        self.snowflake = Snowflakes()
+        self.guild_id = self.snowflake()
+        self.bot_user = user_payload(self.snowflake(), "Benchmark Bot", bot = True)
+
+        # Roles, with @everyone sharing the guild's ID.
+        self.role_ids = [self.snowflake() for _ in range(roles)]
+        self.channel_ids = [self.snowflake() for _ in range(channels)]
+        self.members = [
+            {
+                "user": user_payload(self.snowflake(), f"User {i}"),
+                "roles": [str(role_id) for role_id in random.sample(self.role_ids, min(roles_per_member, roles))],
+                "joined_at": iso_now(),
+                "deaf": False,
+                "mute": False,
+            }
+            for i in range(members)
+        ]
+
+        # channel ID -> event set when the bot sends a message there.
+        self._replies = {}
+
+    # Stand-ins for discord.py's gateway websocket.
+
+    async def change_presence(self, *, activity = None, status = None, afk = False, since = 0.0):
+        pass
+
+    def is_ratelimited(self):
+        return False
+
+    async def request_sync(self, guild_ids):
+        pass
+
+    def guild_payload(self):
+        roles = [{"id": str(self.guild_id), "name": "@everyone", "permissions": "104324673", "position": 0,
+                  "color": 0, "hoist": False, "managed": False, "mentionable": False}]
+        roles += [{"id": str(role_id), "name": f"Role {i}", "permissions": "0", "position": i + 1,
+                   "color": 0, "hoist": False, "managed": False, "mentionable": False}
+                  for i, role_id in enumerate(self.role_ids)]
+        return {
+            "id": str(self.guild_id),
+            "name": "Benchmark Guild",
+            "owner_id": self.bot_user["id"],
+            "region": "us-west",
+            "afk_timeout": 300,
+            "verification_level": 0,
+            "default_message_notifications": 0,
+            "explicit_content_filter": 0,
+            "mfa_level": 0,
+            "premium_tier": 0,
+            "system_channel_flags": 0,
+            "features": [],
+            "emojis": [],
+            "large": False,
+            "member_count": len(self.members) + 1,
+            "roles": roles,
+            "members": self.members + [{"user": self.bot_user, "roles": [], "joined_at": iso_now(), "deaf": False, "mute": False}],
+            "channels": [{"id": str(channel_id), "type": 0, "name": f"channel-{i}", "position": i, "permission_overwrites": []}
+                         for i, channel_id in enumerate(self.channel_ids)],
+        }
+
+    def connect(self, **http_options):
+        """Swap in the fake HTTP client and fill the bot's cache, as if the gateway sent READY."""
+        http = FakeHTTP(self, loop = self.bot.loop, **http_options)
+        self.bot.http = http
+        self.bot._connection.http = http
+        self.bot.ws = self
+
+        state = self.bot._connection
+        state.parse_ready({
+            "v": 8,
+            "user": self.bot_user,
+            "guilds": [self.guild_payload()],
+            "session_id": "benchmark",
+        })
+        # discord.py then waits for any guilds to stream in, and fires `on_ready` itself.
+        return http
+
+    def message_payload(self, channel_id, member, content, message_id = None):
+        return {
+            "id": str(message_id or self.snowflake()),
+            "channel_id": str(channel_id),
+            "guild_id": str(self.guild_id),
+            "author": member["user"],
+            "member": {key: value for key, value in member.items() if key != "user"},
+            "content": content,
+            "timestamp": iso_now(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+
+    def bot_message(self, channel_id, payload, message_id = None):
+        """Build the response for a message the bot sent or edited."""
+        data = self.message_payload(channel_id, {"user": self.bot_user, "roles": [], "joined_at": iso_now()},
+                                    payload.get("content") or "", message_id = message_id)
+        if "embed" in payload and payload["embed"]:
+            data["embeds"] = [payload["embed"]]
+        elif "embeds" in payload:
+            data["embeds"] = payload["embeds"]
+        return data
+
+    def replied(self, channel_id):
+        event = self._replies.get(int(channel_id))
+        if event:
+            event.set()
+
+    def expect_reply(self, channel_id):
+        """Get an event that is set the next time the bot sends a message in a channel."""
+        event = self._replies[channel_id] = asyncio.Event()
+        return event
+
+    def send(self, channel_id, member, content):
+        """Feed a user's message to the bot, exactly as the gateway would."""
+        self.bot._connection.parse_message_create(self.message_payload(channel_id, member, content))
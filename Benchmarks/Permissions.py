@@ -0,0 +1,82 @@
+"""Benchmark | Permission Check
+
+Measures the per-check cost of the global permission check, with 1,000
+restricted commands and members who have 200 roles each.
+
+Compares the compiled `PermissionIndex` against the previous approach of
+formatting, parsing, and resolving every configured role on each check.
+
+Run from the project root:
+    python -m Benchmarks.Permissions
+"""
+import random
+import timeit
+from array import array
+
+from Resources.Permissions import PermissionIndex
+
+COMMANDS = 1000
+ROLES_PER_COMMAND = 3
+GUILD_ROLES = 2000
+MEMBER_ROLES = 200
+CHECKS = 100000
+
+class FakeGuild:
+    """Stands in for a guild's role lookup."""
+    def __init__(self, role_ids):
+        self._roles = {role_id: object() for role_id in role_ids}
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+def legacy_check(permissions, roles, name, guild, author_roles):
+    """The check as it used to be, re-parsing the raw config on every call."""
+    if name in permissions.keys():
+        for permission in permissions[name]:
+            try:
+                role = guild.get_role(int(permission.format(**roles)))
+                if role in author_roles:
+                    return True
+            except Exception:
+                pass
+        return False
+    return True
+
+def main():
+    random.seed(0)
+    role_ids = random.sample(range(10 ** 17, 10 ** 18), GUILD_ROLES)
+    guild = FakeGuild(role_ids)
+
+    # Raw permissions, as they are written in `Permissions.yml`.
+    roles = {f"Role{i}": role_id for i, role_id in enumerate(role_ids)}
+    raw = {
+        f"group{i}-command{i}": [f"{{Role{random.randrange(GUILD_ROLES)}}}" for _ in range(ROLES_PER_COMMAND)]
+        for i in range(COMMANDS)
+    }
+    compiled = {name: [int(entry.format(**roles)) for entry in entries] for name, entries in raw.items()}
+    index = PermissionIndex(compiled)
+
+    # A member's role IDs are kept as a sorted array by discord.py.
+    member_role_ids = array('Q', sorted(random.sample(role_ids, MEMBER_ROLES)))
+    member_roles = [guild.get_role(role_id) for role_id in member_role_ids]
+
+    names = list(raw)
+    queries = [random.choice(names) for _ in range(CHECKS)]
+    qualified = [name.replace('-', ' ') for name in queries]
+
+    def run_index():
+        allowed = index.allowed
+        for name in qualified:
+            allowed(name, member_role_ids)
+
+    def run_legacy():
+        for name in queries:
+            legacy_check(raw, roles, name, guild, member_roles)
+
+    print(f"{COMMANDS} commands, {MEMBER_ROLES} roles per member, {CHECKS} checks per run")
+    for label, function in (("PermissionIndex", run_index), ("Legacy check", run_legacy)):
+        best = min(timeit.repeat(function, number = 1, repeat = 5))
+        print(f"  {label:<16} {best / CHECKS * 1e9:>10.0f} ns/check")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark | Command Pipeline
+
+Drives the bot's real command pipeline with synthetic messages, against
+the fake gateway and HTTP layer in `Benchmarks.FakeDiscord`:
+
+    get_prefix -> rate limiter -> command_permissions -> command callbacks -> on_command_error
+
+Each worker owns a channel and sends one command at a time, timing each
+command from the moment its message is parsed until the bot's reply is sent.
+
+Reports commands per second, p50/p99 latency overall and per command,
+REST calls and rate limit waits, and memory allocated per command.
+
+Run from the project root:
+    python -m Benchmarks.Pipeline --commands 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+import tracemalloc
+
+from Benchmarks.FakeDiscord import FakeGateway
+from Resources.Bot import create_bot
+
+# The mix of commands sent, covering successful commands, a help page,
+# and the error handler's not found and permission denied paths.
+COMMANDS = [
+    "ping",
+    "uptime",
+    "stats",
+    "help General",
+    "nosuchcommand",
+    "cog load Cogs.General",
+]
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+async def run_command(gateway, channel_id, member, content, timeout):
+    """Send one command and wait for the bot's reply, returning the latency in seconds."""
+    reply = gateway.expect_reply(channel_id)
+    start = time.perf_counter()
+    gateway.send(channel_id, member, content)
+    await asyncio.wait_for(reply.wait(), timeout = timeout)
+    return time.perf_counter() - start
+
+async def worker(gateway, prefix, channel_id, commands, results, timeout, chatter):
+    for command in commands:
+        member = random.choice(gateway.members)
+        # Ordinary conversation between commands, which the prefilter should drop.
+        for _ in range(chatter):
+            gateway.send(channel_id, member, "just chatting, not a command")
+        try:
+            latency = await run_command(gateway, channel_id, member, f"{prefix}{command}", timeout)
+        except asyncio.TimeoutError:
+            results.setdefault("timed out", []).append(timeout)
+            continue
+        results.setdefault(command, []).append(latency)
+
+async def measure_allocations(gateway, prefix, samples, timeout):
+    """Peak memory allocated while handling each command, with tracing on."""
+    channel_id = gateway.channel_ids[0]
+    member = gateway.members[0]
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            command = COMMANDS[i % len(COMMANDS)]
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                await run_command(gateway, channel_id, member, f"{prefix}{command}", timeout)
+            except asyncio.TimeoutError:
+                continue
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+async def benchmark(bot, options):
+    gateway = FakeGateway(
+        bot,
+        members = options.members,
+        channels = options.concurrency,
+        roles_per_member = options.roles_per_member,
+        latency = options.latency,
+    )
+    rate_limit = tuple(options.rate_limit) if options.rate_limit[0] else None
+    http = gateway.connect(latency = options.latency, rate_limit = rate_limit)
+    # The metrics wrap the HTTP client when they start, so the fake one needs wrapping too.
+    bot.metrics.instrument(http)
+
+    # The error handler is only loaded outside of DEBUG mode, the benchmark always needs it.
+    if 'Cogs.Errors' not in bot.extensions:
+        bot.load_extension('Cogs.Errors')
+
+    # Let startup tasks (prefix loading, on_ready) settle first.
+    await bot.wait_until_ready()
+    await asyncio.sleep(0.1)
+    prefix = bot.prefix
+
+    # Warm up caches, the same way a running bot would have them.
+    await measure_allocations(gateway, prefix, len(COMMANDS), options.timeout)
+
+    commands = [COMMANDS[i % len(COMMANDS)] for i in range(options.commands)]
+    random.shuffle(commands)
+    per_worker = [commands[i::options.concurrency] for i in range(options.concurrency)]
+
+    results = {}
+    calls_before = sum(http.calls.values())
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(gateway, prefix, channel_id, assigned, results, options.timeout, options.chatter)
+        for channel_id, assigned in zip(gateway.channel_ids, per_worker)
+    ))
+    elapsed = time.perf_counter() - start
+    calls = sum(http.calls.values()) - calls_before
+
+    peaks = await measure_allocations(gateway, prefix, options.allocation_samples, options.timeout)
+    return results, elapsed, calls, http, peaks
+
+def report(options, results, elapsed, calls, http, peaks):
+    latencies = [latency for name, samples in results.items() if name != "timed out" for latency in samples]
+    completed = len(latencies)
+
+    print(f"{completed} commands in {elapsed:.2f}s with {options.concurrency} concurrent channels "
+          f"({options.latency * 1000:.0f} ms simulated REST latency)")
+    print(f"  Throughput:   {completed / elapsed:,.1f} commands/s")
+    if latencies:
+        print(f"  Latency:      p50 {percentile(latencies, 50) * 1000:.1f} ms | p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"  REST calls:   {calls} ({calls / max(completed, 1):.2f} per command)")
+    print(f"  Rate limited: {http.rate_limited} times, {http.rate_limit_wait:.2f}s spent waiting")
+    bulk_deletes = http.calls["POST /channels/{channel_id}/messages/bulk_delete"]
+    single_deletes = http.calls["DELETE /channels/{channel_id}/messages/{message_id}"]
+    if bulk_deletes or single_deletes:
+        print(f"  Deletes:      {bulk_deletes} bulk calls, {single_deletes} single")
+    if peaks:
+        print(f"  Allocated:    {statistics.mean(peaks) / 1024:.1f} KiB peak per command (traced)")
+
+    print("  Per command:")
+    for name, samples in sorted(results.items()):
+        print(f"    {name:<24} n={len(samples):<6} p50 {percentile(samples, 50) * 1000:7.1f} ms"
+              f"   p99 {percentile(samples, 99) * 1000:7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the bot's command pipeline offline.")
+    parser.add_argument("--commands", type = int, default = 2000, help = "Total commands to send.")
+    parser.add_argument("--concurrency", type = int, default = 20, help = "Channels sending commands at once.")
+    parser.add_argument("--members", type = int, default = 200, help = "Members in the fake guild.")
+    parser.add_argument("--roles-per-member", type = int, default = 10, help = "Roles each member has.")
+    parser.add_argument("--latency", type = float, default = 0.05, help = "Average simulated REST latency, in seconds.")
+    parser.add_argument("--rate-limit", type = float, nargs = 2, default = (50, 1.0), metavar = ("REQUESTS", "SECONDS"),
+                        help = "Requests allowed per bucket per window, 0 for no limit.")
+    parser.add_argument("--allocation-samples", type = int, default = 200, help = "Commands to trace allocations for.")
+    parser.add_argument("--timeout", type = float, default = 10.0, help = "Seconds to wait for each reply.")
+    parser.add_argument("--chatter", type = int, default = 0, help = "Non-command messages sent before each command.")
+    parser.add_argument("--delete-commands", action = "store_true", help = "Turn on 'Delete Commands', whatever the config says.")
+    parser.add_argument("--rate-limits", action = "store_true", help = "Keep the configured rate limits, which would otherwise reject most of the commands sent.")
+    parser.add_argument("--show-logs", action = "store_true", help = "Show the bot's warning logs while running.")
+    options = parser.parse_args()
+
+    # Set the bot up exactly as `main.py` does, without connecting to Discord.
+    bot = create_bot("./Config.yml", "./Permissions.yml")
+    bot.startup.connecting()
+    if options.delete_commands:
+        bot.delete_commands = True
+    if not options.rate_limits:
+        bot.rate_limits = None
+
+    # Every denied or unknown command logs a warning, which would bury the results.
+    if not options.show_logs:
+        bot.logger.logger.setLevel(logging.ERROR)
+
+    try:
+        results = bot.loop.run_until_complete(benchmark(bot, options))
+        report(options, *results)
+        counts = bot.message_filter.counts
+        print(f"  Messages:     {counts['processed']} processed, {bot.message_filter.filtered} filtered out")
+    finally:
+        bot.offloader.close()
+        bot.logger.stop()
+
+if __name__ == '__main__':
+    main()
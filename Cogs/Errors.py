@@ -1,6 +1,10 @@
 import discord
 from discord.ext import commands
 import datetime
+import logging
+
+from Resources.Outbound import delete_invocation
+from Resources.RateLimit import RateLimited
 
 """Error Handler
 
@@ -18,29 +22,31 @@ class Errors(commands.Cog, name = "Error Handling"):
     """
     def __init__(self, bot):
         self.bot = bot
-        print(f"{bot.OK} {bot.TIMELOG()} Loaded Error Cog.")
+        bot.logger.ok("Loaded Error Cog.")
 
+    @delete_invocation
     @commands.guild_only()
     @commands.command(name = "broken", aliases = ['borked'], help = "Used to report when the bot has stopped working.", brief = "")
     async def err_report(self, ctx):
         """Report Broken Bot
 
         This command is used to report when the bot is broken or stopped working,
-        it prints some useful information to the console and attempts to
+        it logs some useful information to the console and attempts to
         ping the owner of the bot.
         """
-        if self.bot.delete_commands:
-            await ctx.message.delete()
-
-        user = self.bot.get_user(self.bot.broken_user_id)
+        # Mention by ID, the user may not be in the cache (see the 'Member Cache' setting).
+        mention = f"<@{self.bot.broken_user_id}>"
+        # Include the last time the bot was blocked, which is often why it seems broken.
+        stall = self.bot.watchdog.summary()
         embed = self.bot.embed_util.get_embed(
             title = "I'm broken!",
-            desc = f"Come fix me {user.mention}!",
+            desc = f"Come fix me {mention}!",
+            fields = [{"name": "Last Blocked", "value": stall, "inline": False}] if stall else None,
             author = ctx.author
         )
-        await ctx.send(content = user.mention, embed = embed)
+        await self.bot.outbound.send(ctx, content = mention, embed = embed)
 
-        self.print_log(type = self.bot.WARN, message = "Received 'broken' Command", ctx = ctx)
+        self.write_log(level = logging.WARNING, message = "Received 'broken' Command", ctx = ctx, last_blocked = stall)
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx, error):
@@ -53,24 +59,22 @@ class Errors(commands.Cog, name = "Error Handling"):
         reply with the command error, and send a log of the error to
         the log channel.
         """
-        if self.bot.delete_commands:
-            await ctx.message.delete()
-
         if isinstance(error, commands.CommandNotFound):
-            self.print_log(type = self.bot.WARN, message = "Command Not Found", ctx = ctx)
-            embed = self.bot.embed_util.get_embed(
+            self.write_log(level = logging.WARNING, message = "Command Not Found", ctx = ctx)
+            embed = self.bot.embed_util.get_static_embed(
                 title = "Command Not Found",
                 author = ctx.author
             )
-            await ctx.send(embed = embed)
+            await self.bot.outbound.send(ctx, embed = embed)
             embed = self.bot.embed_util.update_embed(
+                embed = embed,
                 author = ctx.author,
                 ts = True
             )
-            await self.bot.log_channel.send(embed = embed)
+            self.bot.log_sink.send(embed)
 
         elif isinstance(error, commands.BadArgument) and "not found" in str(error):
-            self.print_log(type = self.bot.ERR, message = f"{str(error).split(' ')[0]} Not Found", ctx = ctx, err = error)
+            self.write_log(level = logging.ERROR, message = f"{str(error).split(' ')[0]} Not Found", ctx = ctx, err = error)
             embed = self.bot.embed_util.get_embed(
                 title =  f"{str(error).split(' ')[0]} Not Found",
                 author = ctx.author,
@@ -80,17 +84,27 @@ class Errors(commands.Cog, name = "Error Handling"):
                     "inline": False
                 }]
             )
-            await ctx.send(embed = embed)
+            await self.bot.outbound.send(ctx, embed = embed)
             embed = self.bot.embed_util.update_embed(
                 embed = embed,
                 author = ctx.author,
                 ts = True
             )
-            await self.bot.log_channel.send(embed = embed)
+            self.bot.log_sink.send(embed)
+
+        elif isinstance(error, RateLimited):
+            # Rate limited commands are ignored, apart from a single notice each window.
+            if error.notify:
+                embed = self.bot.embed_util.get_embed(
+                    title = "Slow Down",
+                    desc = f"You can use that again in {error.retry_after:.1f} seconds.",
+                    author = ctx.author
+                )
+                await self.bot.outbound.send(ctx, embed = embed)
 
         elif isinstance(error, commands.CheckFailure):
-            self.print_log(
-                type = self.bot.WARN,
+            self.write_log(
+                level = logging.WARNING,
                 message = "User attempted to use command without permission",
                 ctx = ctx
             )
@@ -100,33 +114,33 @@ class Errors(commands.Cog, name = "Error Handling"):
                 desc = f"I'm sorry {ctx.author.name}, I'm afraid I can't to that.",
                 author = ctx.author
             )
-            await ctx.send(embed = embed)
+            await self.bot.outbound.send(ctx, embed = embed)
             embed = self.bot.embed_util.update_embed(
                 embed = embed,
                 author = ctx.author,
                 ts = True
             )
-            await self.bot.log_channel.send(embed = embed)
+            self.bot.log_sink.send(embed)
 
         elif isinstance(error, commands.MissingRequiredArgument):
             error = str(error).split(" ")
             error[0] = '`' + error[0] + '`'
             error = " ".join(error)
 
-            self.print_log(type = self.bot.ERR, message = "Missing required parameter", err = error, ctx = ctx)
+            self.write_log(level = logging.ERROR, message = "Missing required parameter", err = error, ctx = ctx)
 
-            embed = self.bot.embed_util.get_embed(
+            embed = self.bot.embed_util.get_static_embed(
                 title = "Missing Required Parameter",
                 desc = error.split(' ')[0],
                 author = ctx.author
             )
-            await ctx.send(embed = embed)
+            await self.bot.outbound.send(ctx, embed = embed)
             embed = self.bot.embed_util.update_embed(
                 embed = embed,
                 author = ctx.author,
                 ts = True
             )
-            await self.bot.log_channel.send(embed = embed)
+            self.bot.log_sink.send(embed)
 
         else:
             embed = self.bot.embed_util.get_embed(
@@ -134,15 +148,15 @@ class Errors(commands.Cog, name = "Error Handling"):
                 desc = str(error),
                 author = ctx.author
             )
-            await ctx.send(embed = embed)
+            await self.bot.outbound.send(ctx, embed = embed)
             embed = self.bot.embed_util.update_embed(
                 embed = embed,
                 author = ctx.author,
                 ts = True
             )
-            await self.bot.log_channel.send(embed = embed)
+            self.bot.log_sink.send(embed)
 
-            self.print_log(type = self.bot.ERR, message = error)
+            self.write_log(level = logging.ERROR, message = error)
 
     @commands.Cog.listener()
     async def on_error(self, error):
@@ -151,24 +165,28 @@ class Errors(commands.Cog, name = "Error Handling"):
         The generalized handler for all errors that happen in the bot,
         preventing suspension of runtime should something go wrong.
         """
-        self.print_log(type = self.bot.ERR, message = error)
+        self.write_log(level = logging.ERROR, message = error)
+
+    def write_log(self, level, message, err = None, ctx = None, **extra):
+        """Logging Errors
 
-    def print_log(self, type, message, err = None, ctx = None):
-        """Printing Error Logs
+        Logs information about an error, as a single entry so that
+        details from different errors never get mixed together.
 
-        Prints information about an error to the console/terminal.
+        Any extra keyword arguments are logged as fields, unless they are `None`.
         """
-        print(f"{type} {self.bot.TIMELOG()} {message}:")
+        fields = {}
         if err:
-            print(f"{' ' * 35} Error: {err}")
+            fields['error'] = err
         if ctx:
             failed_com = ctx.message.content.split(' ')
+            fields['command'] = failed_com[0]
             if len(failed_com) > 1:
-                print(f"{' ' * 35} Command: {failed_com[0]} | Args: {' '.join(failed_com[1:])}")
-            else:
-                print(f"{' ' * 35} Command: {failed_com[0]}")
-            print(f"{' ' * 35} Author: {ctx.author} | ID: {ctx.author.id}")
-            print(f"{' ' * 35} Channel: {ctx.channel} | ID: {ctx.channel.id}")
+                fields['args'] = ' '.join(failed_com[1:])
+            fields['author'] = f"{ctx.author} | ID: {ctx.author.id}"
+            fields['channel'] = f"{ctx.channel} | ID: {ctx.channel.id}"
+        fields.update((name, value) for name, value in extra.items() if value is not None)
+        self.bot.logger.log(level, f"{message}:", **fields)
 
 def setup(bot):
     """Setup
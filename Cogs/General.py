@@ -1,8 +1,10 @@
 import discord
-from discord.ext import commands, menus
+from discord.ext import commands
 import datetime
 from math import trunc
 
+from Resources.Outbound import delete_invocation
+
 """General Commands
 
 This Cog contains a list of commands that almost every program
@@ -18,8 +20,9 @@ class General(commands.Cog, name = "General"):
     """
     def __init__(self, bot):
         self.bot = bot
-        print(f"{bot.OK} {bot.TIMELOG()} Loaded General Cog.")
+        bot.logger.ok("Loaded General Cog.")
 
+    @delete_invocation
     @commands.guild_only()
     @commands.command(name='uptime', help = 'Returns the amount of time the bot has been online.')
     async def uptime(self, ctx):
@@ -27,11 +30,8 @@ class General(commands.Cog, name = "General"):
 
         As the name implies... this returns the amount of time the
         bot has been online, given that the `bot.start_time` value
-        was set in `main.py` in the `on_ready` function.
+        was set in `Resources/Bot.py` in the `on_ready` function.
         """
-        if self.bot.delete_commands:
-            await ctx.message.delete()
-
         # Some basic calculations to determine individual time amounts
         seconds = trunc((self.bot.embed_ts() - self.bot.start_time).total_seconds())
         hours = trunc(seconds / 3600)
@@ -45,8 +45,9 @@ class General(commands.Cog, name = "General"):
             ts = True,
             author = ctx.author
         )
-        await ctx.send(embed = embed)
+        await self.bot.outbound.send(ctx, embed = embed)
 
+    @delete_invocation
     @commands.guild_only()
     @commands.command(name='ping', aliases=['pong'], help = 'Gets the current latency of the bot.')
     async def ping(self, ctx):
@@ -56,15 +57,12 @@ class General(commands.Cog, name = "General"):
         and the ping time it takes from when the original message is sent
         to when the bot successfully posts its response.
         """
-        if self.bot.delete_commands:
-            await ctx.message.delete()
-
         embed = self.bot.embed_util.get_embed(
             title = ":ping_pong: Pong!",
             desc = "Calculating ping time...",
             author = ctx.author
         )
-        m = await ctx.send(embed = embed)
+        m = await self.bot.outbound.send(ctx, embed = embed)
 
         embed = self.bot.embed_util.update_embed(
             embed = embed,
@@ -73,9 +71,52 @@ class General(commands.Cog, name = "General"):
                 trunc(self.bot.latency * 1000)
             )
         )
-        await m.edit(embed = embed)
+        await self.bot.outbound.edit(m, embed = embed)
+
+    @delete_invocation
+    @commands.guild_only()
+    @commands.command(name='stats', help = 'Shows command usage, latency, and other running metrics.')
+    async def stats(self, ctx):
+        """Get Bot Metrics
+
+        Shows the most used commands with their estimated p50/p99 latency,
+        along with errors, event loop lag, gateway latency, and REST calls.
+        The same metrics can be served to Prometheus, see the 'Metrics' config section.
+        """
+        metrics = self.bot.metrics
+        used = sorted(
+            ((name, stats) for name, stats in metrics.commands.items() if stats.invocations),
+            key = lambda item: item[1].invocations,
+            reverse = True
+        )[:10]
+        command_lines = [
+            f"`{name}` {stats.invocations:,} uses, p50 {stats.latency.quantile(0.5) * 1000:g} ms, p99 {stats.latency.quantile(0.99) * 1000:g} ms"
+            for name, stats in used
+        ]
+        error_lines = [f"{name}: {count:,}" for name, count in sorted(metrics.errors.items(), key = lambda item: -item[1])[:5]]
+        rest_calls = sum(metrics.rest_calls.values())
+        rest_failures = sum(count for (method, outcome), count in metrics.rest_calls.items() if outcome != "ok")
+        outbound = self.bot.outbound
+        messages = self.bot.message_filter
+
+        embed = self.bot.embed_util.get_embed(
+            title = ":bar_chart: Stats",
+            fields = [
+                {"name": "Commands", "value": "\n".join(command_lines) or "None used yet.", "inline": False},
+                {"name": "Errors", "value": "\n".join(error_lines) or "None.", "inline": True},
+                {"name": "Event Loop", "value": f"Lag {metrics.last_lag * 1000:.1f} ms\np99 {metrics.loop_lag.quantile(0.99) * 1000:g} ms", "inline": True},
+                {"name": "Gateway", "value": f"Latency {trunc(self.bot.latency * 1000)} ms", "inline": True},
+                {"name": "REST", "value": f"{rest_calls:,} calls, {rest_failures:,} failed\np99 {metrics.rest_latency.quantile(0.99) * 1000:g} ms", "inline": True},
+                {"name": "Outbound", "value": f"{sum(outbound.completed):,} sent, {outbound.pending:,} waiting\n{outbound.coalesced:,} edits merged, {outbound.failed:,} failed", "inline": True},
+                {"name": "Messages", "value": f"{messages.counts['processed']:,} processed\n{messages.filtered:,} filtered out", "inline": True},
+                {"name": "Permission Checks", "value": f"{metrics.permission_checks.count:,} checks\np99 {metrics.permission_checks.quantile(0.99) * 1000000:g} µs", "inline": True},
+            ],
+            author = ctx.author
+        )
+        await self.bot.outbound.send(ctx, embed = embed)
 
     """DISABLED - this command really didn't see much use or value, so I am just leaving it out for now.
+    @delete_invocation
     @commands.guild_only()
     @commands.command(name='invite', help = 'Returns the server invite link.', brief = "")
     async def invite(self, ctx):
@@ -84,9 +125,6 @@ class General(commands.Cog, name = "General"):
         Returns an invite to the server. Disabled by default,
         this is enabled if the server the bot is used in is meant to be public.
         ""
-        if self.bot.delete_commands:
-            await ctx.message.delete()
-
         print(ctx.guild.features)
         if 'VANITY_URL' in ctx.guild.features:
             invite = await ctx.guild.vanity_invite()
@@ -99,7 +137,7 @@ class General(commands.Cog, name = "General"):
             desc = invite.url,
             author = ctx.author
         )
-        await ctx.send(embed = embed)
+        await self.bot.outbound.send(ctx, embed = embed)
     """
 
 def setup(bot):
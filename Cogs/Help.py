@@ -1,27 +1,31 @@
 import discord
-from discord.ext import commands, menus
+from discord.ext import commands
 import datetime
 
+from Resources.Menus import Pages
+
 """Help Command Paginator
 
 This class is used to create a paginated help command.
 """
-class HelpSource(menus.ListPageSource):
-    def __init__(self, ctx, fields, per_page = 2):
-        self.ctx = ctx
-        self.num_fields = int(len(fields) / per_page)
+class HelpPages(Pages):
+    def __init__(self, fields, per_page = 2):
+        self.fields = fields
+        self.per_page = per_page
+        page_count = int(len(fields) / per_page)
         if len(fields) % per_page:
-            self.num_fields += 1
-        super().__init__(fields, per_page = per_page)
+            page_count += 1
+        super().__init__(max(page_count, 1), self.format_help_page)
 
-    async def format_page(self, menu, entries):
-        offset = menu.current_page * self.per_page
+    def format_help_page(self, index):
+        offset = index * self.per_page
 
-        embed = self.ctx.bot.embed_util.get_embed(
+        # The same pages are shown over and over, so they are built once and reused.
+        embed = self.ctx.bot.embed_util.get_static_embed(
             title = "\N{NEWSPAPER} Help Menu",
-            desc = f"A listing of all available commands sorted by grouping.\nTo learn more about specific commands, use `{self.ctx.bot.prefix}help <command>`",
-            fields = [field for i, field in enumerate(entries, start = offset)],
-            footer = f"{self.ctx.bot.footer} | [{menu.current_page + 1}/{self.num_fields}]"
+            desc = f"A listing of all available commands sorted by grouping.\nTo learn more about specific commands, use `{self.ctx.prefix}help <command>`",
+            fields = self.fields[offset:offset + self.per_page],
+            footer = f"{self.ctx.bot.footer} | [{index + 1}/{self.page_count}]"
         )
         return embed
 
@@ -38,23 +42,15 @@ class TheHelpCommand(commands.MinimalHelpCommand):
         """Send a help list for all of the bot commands.
 
         Is now using pagination as well.
+
+        Only shows commands the user is allowed to use, based on `Permissions.yml`.
         """
-        fields = []
-        # Parsing through all cogs and all commands contained within each command.
-        for cog in mapping.keys():
-            if cog:
-                command_list = await self.filter_commands(mapping[cog], sort = True)
-                if len(command_list) > 0:
-                    # If a cog contains visible commands, add the to an embed field.
-                    fields.append({
-                        "name": cog.qualified_name,
-                        "value": f"{cog.description}\nCommands:\n" + ", ".join(f"`{command}`" for command in command_list),
-                        "inline": False
-                    })
+        # The visible fields for each cog come from the help index, rather than
+        # checking every command of every cog on every call.
+        fields = await self.context.bot.help_index.bot_fields(self.context)
 
         # Create the paginated help menu
-        pages = menus.MenuPages(source = HelpSource(self.context, fields), delete_message_after = True)
-        await pages.start(self.context)
+        await HelpPages(fields).start(self.context)
 
     async def send_cog_help(self, cog):
         """Cog Specific
@@ -68,27 +64,18 @@ class TheHelpCommand(commands.MinimalHelpCommand):
             author = self.context.message.author,
             fields = [{
                 "name": "Commands",
-                "value": "\n".join("`{1.qualified_name}`".format(self, command) for command in cog.walk_commands() if not command.hidden),
+                "value": self.context.bot.help_index.cog_commands(cog),
                 "inline": False
             }]
         )
-        await self.get_destination().send(embed = embed)
+        await self.context.bot.outbound.send(self.get_destination(), embed = embed)
 
     async def send_group_help(self, group):
         """Grouped Commands
 
         Sends help message for all commands grouped in a parent command.
         """
-        command_list = group.walk_commands()
-        command_activation = []
-        command_example = []
-        for command in command_list:
-            if "`" + command.qualified_name + " " + command.signature + "` - {}".format(command.help) not in command_activation and not command.hidden:
-                command_activation.append("`" + command.qualified_name + " " + command.signature + "` - {}".format(command.help))
-                if command.brief not in [None, ""]:
-                    command_example.append("`" + self.clean_prefix + command.qualified_name + " " + command.brief + "`")
-                else:
-                    command_example.append("`" + self.clean_prefix + command.qualified_name + "`")
+        command_activation, command_example = self.context.bot.help_index.group_lines(group)
 
         fields = []
         if group.aliases:
@@ -99,12 +86,12 @@ class TheHelpCommand(commands.MinimalHelpCommand):
             })
         fields.append({
             "name": "Commands",
-            "value": "\n".join(command_activation),
+            "value": command_activation,
             "inline": False
         })
         fields.append({
             "name": "Examples",
-            "value": "\n".join(command_example),
+            "value": "\n".join(f"`{self.clean_prefix}{example}`" for example in command_example),
             "inline": False
         })
 
@@ -114,7 +101,7 @@ class TheHelpCommand(commands.MinimalHelpCommand):
             fields = fields,
             author = self.context.message.author
         )
-        await self.get_destination().send(embed = embed)
+        await self.context.bot.outbound.send(self.get_destination(), embed = embed)
 
     async def send_command_help(self, command):
         """Command Specific
@@ -145,7 +132,7 @@ class TheHelpCommand(commands.MinimalHelpCommand):
             fields = fields,
             author = self.context.message.author
         )
-        await self.get_destination().send(embed = embed)
+        await self.context.bot.outbound.send(self.get_destination(), embed = embed)
 
 """Class Loader
 
@@ -159,7 +146,7 @@ class LoadHelp(commands.Cog, name = "Help"):
         self._original_help_command = bot.help_command
         bot.help_command = TheHelpCommand()
         bot.help_command.cog = self
-        print(f"{bot.OK} {bot.TIMELOG()} Loaded Help Cog.")
+        bot.logger.ok("Loaded Help Cog.")
 
 def setup(bot):
     """Setup
@@ -0,0 +1,336 @@
+from discord.ext import commands
+
+from Resources.Bot import reload_bot
+from Resources.Gateway import cache_sizes, process_memory
+from Resources.Menus import Confirmation
+from Resources.Outbound import delete_invocation
+from Resources.Permissions import PermissionConfigError
+from Resources.Supervisor import RESTART_EXIT_CODE
+
+"""Internal Commands
+
+This Cog contains the commands for managing the bot itself: restarting
+(or reloading in place), cache sizes, data migration, the server prefix, and loading/unloading cogs.
+
+It is always loaded, whatever the extension list says.
+"""
+class Internal(commands.Cog, name = "Internal"):
+    """
+    Commands related to internal management.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        bot.logger.ok("Loaded Internal Cog.")
+
+    @commands.command(name = "restart", help = "Restarts the bot, or reloads it without disconnecting with 'reload'.", brief = "reload")
+    async def restart(self, ctx, mode: str = None):
+        """Restarts the bot.
+
+        Sends a message to the log channel, adds a reaction to the message, then
+        attempts to gracefully disconnect from Discord.
+
+        The supervisor (started by the Batch or Shell script) will then
+        re-activate the bot right away, which allows the bot to take in file updates on the fly.
+
+        With the 'reload' mode, the config, permissions, and every extension are
+        reloaded in place instead, keeping the gateway connection alive.
+        """
+        if mode is not None and mode.lower() == "reload":
+            await self.reload_in_place(ctx)
+            return
+
+        # Confirm that the user wants to restart
+        confirm = await Confirmation(
+            title = "Restart?",
+            msg = "This will completely shut down the bot and potentially cause errors if the code has been modified and not tested."
+        ).prompt(ctx)
+
+        if confirm:
+            embed = self.bot.embed_util.get_embed(
+                title = self.bot.restarting_message.format(username = self.bot.user.name),
+                ts = True,
+                author = ctx.author
+            )
+            self.bot.log_sink.send(embed)
+
+            await self.bot.outbound.add_reaction(ctx.message, '\N{WHITE HEAVY CHECK MARK}')
+
+            # Closing the bot sends the restart message and writes out any pending data,
+            # then ends `run_bot`, and with it the process.
+            # The restart exit code tells the supervisor to start the bot again right away.
+            self.bot.exit_code = RESTART_EXIT_CODE
+            await self.bot.close()
+        else:
+            embed = self.bot.embed_util.get_static_embed(
+                title = "Restart Cancelled"
+            )
+            m = await self.bot.outbound.send(ctx, embed = embed)
+            self.bot.outbound.delete(m, delay = 5)
+
+    async def reload_in_place(self, ctx):
+        """Reloads the bot without restarting.
+
+        Reloads the config, permissions, and every extension, then reports
+        anything that failed or needs a full restart to take effect.
+        """
+        try:
+            failed, needs_restart = await reload_bot(self.bot)
+        except PermissionConfigError as e:
+            embed = self.bot.embed_util.get_embed(
+                title = "Reload Failed",
+                desc = "Nothing was reloaded, `Permissions.yml` is invalid:\n" + "\n".join(e.errors),
+                author = ctx.author
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            return
+        except KeyError as e:
+            embed = self.bot.embed_util.get_embed(
+                title = "Reload Failed",
+                desc = f"Nothing was reloaded, `Config.yml` is missing the setting {e}.",
+                author = ctx.author
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            return
+        except ValueError as e:
+            # e.g. an invalid rate limit or menu style.
+            embed = self.bot.embed_util.get_embed(
+                title = "Reload Failed",
+                desc = f"Nothing was reloaded, `Config.yml` is invalid: {e}",
+                author = ctx.author
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            return
+
+        fields = [
+            {"name": f"Failed: {name}", "value": str(error)[:1024], "inline": False}
+            for name, error in failed.items()
+        ]
+        if needs_restart:
+            fields.append({"name": "Needs A Full Restart", "value": ", ".join(needs_restart), "inline": False})
+
+        embed = self.bot.embed_util.get_embed(
+            title = "Reloaded" if not failed else "Reloaded With Errors",
+            desc = f"Reloaded the config, permissions, and {len(self.bot.exts)} extensions.",
+            fields = fields,
+            author = ctx.author
+        )
+        await self.bot.outbound.send(ctx, embed = embed)
+        embed = self.bot.embed_util.update_embed(embed, ts = True, author = ctx.author)
+        self.bot.log_sink.send(embed)
+
+    @commands.command(name = "migrate", help = "Imports a JSON data file into the SQLite data backend.", brief = "./Data/data_storage.json")
+    async def migrate(self, ctx, data_file: str = None):
+        """Migrates data between backends.
+
+        Reads an existing JSON data file (the configured `Data File` by default)
+        and imports every global, guild, and user entry into the current backend.
+        """
+        data_file = data_file or self.bot.data_file
+
+        if self.bot.data_backend == 'json':
+            embed = self.bot.embed_util.get_embed(
+                title = "Migration Not Needed",
+                desc = "The bot is already using the JSON data backend.",
+                author = ctx.author
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            return
+
+        try:
+            # Reading and importing the whole file can take a while, keep it off of the event loop.
+            counts = await self.bot.loop.run_in_executor(None, self.bot.data_manager.migrate, data_file)
+        except Exception as e:
+            embed = self.bot.embed_util.get_embed(
+                title = "Migration Failed",
+                desc = str(e),
+                author = ctx.author
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            return
+
+        embed = self.bot.embed_util.get_embed(
+            title = "Migration Complete",
+            desc = f"Imported `{data_file}`",
+            fields = [
+                {"name": scope.capitalize(), "value": f"{count} entries", "inline": True}
+                for scope, count in counts.items()
+            ],
+            author = ctx.author
+        )
+        await self.bot.outbound.send(ctx, embed = embed)
+        embed = self.bot.embed_util.update_embed(embed, ts = True, author = ctx.author)
+        self.bot.log_sink.send(embed)
+
+    @delete_invocation
+    @commands.command(name = "memory", help = "Shows how much the bot is keeping in each of its caches.", brief = "")
+    async def memory(self, ctx):
+        """Shows cache sizes.
+
+        Lists the number of entries in each of discord.py's caches, along with
+        the cache settings from the 'Gateway' section of the config and the
+        process's memory use.
+        """
+        sizes = cache_sizes(self.bot)
+        rss = process_memory()
+        intents = [name for name, enabled in self.bot.intents if enabled]
+        member_cache = [name for name, enabled in self.bot._connection.member_cache_flags if enabled]
+
+        embed = self.bot.embed_util.get_embed(
+            title = "Memory",
+            desc = f"Process memory: {rss / 1048576:,.1f} MiB" if rss is not None else "Process memory: unknown",
+            fields = [
+                {"name": "Caches", "value": "\n".join(f"{name}: {count:,}" for name, count in sizes.items()), "inline": True},
+                {"name": "Settings", "value": "\n".join([
+                    f"Member Cache: {', '.join(member_cache) or 'none'}",
+                    f"Max Messages: {self.bot._connection.max_messages or 'none'}",
+                    f"Intents: {', '.join(intents)}",
+                ]), "inline": True},
+            ],
+            author = ctx.author
+        )
+        await self.bot.outbound.send(ctx, embed = embed)
+
+    @delete_invocation
+    @commands.guild_only()
+    @commands.command(name = "prefix", help = "Changes the command prefix for this server.", brief = "?")
+    async def prefix(self, ctx, prefix: str):
+        """Changes the server prefix.
+
+        Only this server's prefix changes, setting it to the default prefix
+        from the config removes the custom prefix.
+        """
+        old = self.bot.prefix_resolver.get(ctx.guild.id)
+        self.bot.prefix_resolver.set(ctx.guild.id, prefix)
+
+        embed = self.bot.embed_util.get_embed(
+            title = "Prefix Updated",
+            desc = f"New Prefix: `{prefix}`",
+            fields = [
+                {"name": "New", "value": f"{prefix}command", "inline": True},
+                {"name": "Old", "value": f"{old}command", "inline": True},
+            ],
+            author = ctx.author
+        )
+        await self.bot.outbound.send(ctx, embed = embed)
+        embed = self.bot.embed_util.update_embed(embed, ts = True, author = ctx.author)
+        self.bot.log_sink.send(embed)
+
+    @commands.group(name = 'cog', aliases=['cogs'], help = "A group of commands for loading, unloading, and reloading cogs.", invoke_without_command=True)
+    async def cog(self, ctx):
+        """The parent command for all commands related to cogs.
+        """
+        pass
+
+    @cog.command(name = 'load', help = 'Load a cog by name.', brief = "Cogs.General")
+    async def load(self, ctx, cog_name):
+        """Loading a cog.
+
+        Loads a cog into the system by name. Folder path separators are replaced by "."
+        """
+        try:
+            if cog_name in self.bot.cog_exts:
+                # Loads the cog, or reloads it if it is already loaded.
+                self.bot.extension_manager.load(cog_name)
+                # The help menu needs to pick up the changed commands.
+                self.bot.help_index.invalidate()
+                embed = self.bot.embed_util.get_embed(
+                    title = f"Loaded {cog_name}",
+                    author = ctx.author,
+                )
+                await self.bot.outbound.send(ctx, embed = embed)
+                embed = self.bot.embed_util.update_embed(
+                    embed = embed,
+                    ts = True
+                )
+                self.bot.log_sink.send(embed)
+            else:
+                raise
+        except Exception as e:
+            embed = self.bot.embed_util.get_embed(
+                title = f"Failed to load {cog_name}",
+                author = ctx.author,
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            embed = self.bot.embed_util.update_embed(
+                embed = embed,
+                desc = str(e),
+                author = ctx.author,
+                ts = True
+            )
+            self.bot.log_sink.send(embed)
+
+    @cog.command(name = 'unload', help = 'Unload a cog by name.', brief = "Cogs.General")
+    async def unload(self, ctx, cog_name):
+        """Unload a cog.
+
+        Turns off a registered cog by name.
+        """
+        try:
+            if cog_name in self.bot.cog_exts:
+                self.bot.extension_manager.unload(cog_name)
+                # The help menu needs to pick up the changed commands.
+                self.bot.help_index.invalidate()
+                embed = self.bot.embed_util.get_embed(
+                    title = f"Unloaded {cog_name}",
+                    author = ctx.author,
+                )
+                await self.bot.outbound.send(ctx, embed = embed)
+                embed = self.bot.embed_util.update_embed(
+                    embed = embed,
+                    ts = True
+                )
+                self.bot.log_sink.send(embed)
+            else:
+                raise
+        except:
+            embed = self.bot.embed_util.get_embed(
+                title = f"Failed to unload {cog_name}",
+                author = ctx.author,
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+
+    @cog.command(name = 'reload', help = 'Reload a cog by name.', brief = "Cogs.General")
+    async def reload(self, ctx, cog_name):
+        """Reload a specific cog.
+
+        Can be used to register updates to a cog without needing to restart the entire bot.
+
+        Essentially just unloads and then reloads a cog.
+        """
+        try:
+            if cog_name in self.bot.cog_exts:
+                self.bot.extension_manager.reload(cog_name)
+                # The help menu needs to pick up the changed commands.
+                self.bot.help_index.invalidate()
+                embed = self.bot.embed_util.get_embed(
+                    title = f"Reloaded {cog_name}",
+                    author = ctx.author,
+                )
+                await self.bot.outbound.send(ctx, embed = embed)
+                embed = self.bot.embed_util.update_embed(
+                    embed = embed,
+                    ts = True
+                )
+                self.bot.log_sink.send(embed)
+            else:
+                raise
+        except Exception as e:
+            embed = self.bot.embed_util.get_embed(
+                title = f"Failed to reload {cog_name}",
+                author = ctx.author,
+            )
+            await self.bot.outbound.send(ctx, embed = embed)
+            embed = self.bot.embed_util.update_embed(
+                embed = embed,
+                desc = str(e),
+                author = ctx.author,
+                ts = True
+            )
+            self.bot.log_sink.send(embed)
+
+def setup(bot):
+    """Setup
+
+    The function called by Discord.py when adding another file in a multi-file project.
+    """
+    bot.add_cog(Internal(bot))
@@ -2,6 +2,9 @@ import discord
 from discord.ext import commands
 import datetime
 
+from Resources.Outbound import delete_invocation
+from Resources.Routing import route
+
 """Template
 
 This is a template put in place to be used
@@ -10,6 +13,12 @@ when creating a new Cog file.
 NOTE: All commands are restricted to server use only by default,
 remove the `@commands.guild_only()` line before any command that
 should also be able to be used in a DM.
+
+Add `@delete_invocation` to a command to have the message that invoked
+it deleted once it has run, when 'Delete Commands' is on.
+
+Run anything CPU heavy with `await self.bot.offload(function, *args)`,
+so it doesn't block the bot (see `Resources/Offload.py`).
 """
 class New(commands.Cog, name = "New"):
     """
@@ -17,8 +26,9 @@ class New(commands.Cog, name = "New"):
     """
     def __init__(self, bot):
         self.bot = bot
-        print("Loaded New Cog.")
+        bot.logger.ok("Loaded New Cog.")
 
+    @delete_invocation
     @commands.guild_only()
     @commands.command(name = "SAMPLE", help = "Just a placeholder.", brief = "If parameters then examples here")
     async def sample(self, ctx):
@@ -28,14 +38,17 @@ class New(commands.Cog, name = "New"):
         """
         pass
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
+    @route(startswith = "hello")
+    async def on_hello(self, message):
         """Sample
 
-        This is a template for a standard message listener.
+        This is a template for a message handler, see `Resources/Routing.py`.
+
+        The router only calls it for messages matching its filters (here, any
+        message starting with "hello" that wasn't sent by a bot), instead of
+        it being run for every message like an `on_message` listener.
         """
-        if not message.author.bot:
-            pass
+        pass
 
 def setup(bot):
     """Setup
@@ -0,0 +1,424 @@
+"""Resource | Bot Factory
+
+Builds a fully set up bot without connecting to Discord, so that it can be
+created by `main.py`, the benchmarks, or a launcher's worker processes
+without any work happening when a module is imported.
+
+`create_bot` loads the config, permissions, and data, then the extensions,
+timing each step. `run_bot` connects the bot and cleans up afterwards.
+"""
+import time
+
+import discord
+from discord.ext import commands
+
+from Resources.Data import DataManager, read_yaml
+from Resources.Extensions import ExtensionManager
+from Resources.Gateway import gateway_options
+from Resources.HelpIndex import HelpIndex
+from Resources.Launcher import shard_options
+from Resources.Logger import Logger
+from Resources.Menus import MenuManager
+from Resources.Metrics import Metrics
+from Resources.Offload import Offloader
+from Resources.Outbound import Outbound
+from Resources.LogSink import LogSink
+from Resources.Permissions import PermissionIndex, PermissionConfigError
+from Resources.Prefilter import MessageFilter
+from Resources.Prefixes import PrefixResolver
+from Resources.RateLimit import RateLimiter
+from Resources.Routing import MessageRouter
+from Resources.Startup import StartupTimer
+from Resources.Supervisor import CONFIG_EXIT_CODE
+from Resources.Utility import EmbedUtil
+from Resources.Watchdog import Watchdog
+
+def get_prefix(bot, message):
+    """Allows for a dynamic prefix option to be anabled for the bot.
+
+    The 'prefix' command can set a different prefix for each server, which is
+    looked up from the prefix resolver's in-memory cache.
+
+    Parameters:
+        - bot (:class:`Discord.Client`) -
+            An instance of the discord client which is automatically passed in by the client
+            when retrieving the prefix.
+        - message (:class:`Discord.Message`) -
+            An instance of a discord Message, which can be used to determine the prefix depending on a variety of situations,
+            such as differing prefixes for channels, or guilds.
+    """
+    if message.guild is None:
+        return bot.prefix
+    return bot.prefix_resolver.prefixes.get(message.guild.id, bot.prefix)
+
+def has_permission(ctx):
+    """Global Permission Manager
+
+    When a comand is used this function will use the permissions imported
+    from Permissions.yml to verify that a user is/is not allowed
+    to use a command.
+    """
+    # Commands without any permissions set can be used by anyone.
+    # The index is keyed by the qualified command name, e.g. "!category command" is "category command".
+    roles = ctx.bot.permission_index.roles_for(ctx.command.qualified_name)
+    if roles is None:
+        return True
+
+    # Restricted commands can't be used outside of a server, there are no roles to check.
+    if ctx.guild is None:
+        return False
+
+    # Administrators are always allowed to use the command.
+    if ctx.author.guild_permissions.administrator:
+        return True
+
+    # Allow the command if the user has any of the permitted roles.
+    return PermissionIndex.has_any(roles, PermissionIndex.member_role_ids(ctx.author))
+
+async def command_permissions(ctx):
+    """Global Permission Check
+
+    Added as a global check, so this function is attached to all commands.
+
+    Checks the permissions with `has_permission`, timing how long it takes.
+    """
+    start = time.perf_counter()
+    allowed = has_permission(ctx)
+    ctx.bot.metrics.permission_checks.observe(time.perf_counter() - start)
+    return allowed
+
+def log_permission_errors(bot, error):
+    """Log every invalid permission, then stop logging, since the bot can't start."""
+    for message in error.errors:
+        bot.logger.err(f"Invalid permission: {message}")
+    bot.logger.stop()
+
+# Config sections that are only used while starting up, so changes to them need a full restart.
+RESTART_SETTINGS = ['Token Env Var', 'Sharding', 'Gateway', 'Data File', 'Data Settings', 'Logging', 'Log Channel Settings', 'Metrics', 'Watchdog', 'Outbound', 'Offload']
+
+def configured_extensions(bot):
+    """The extensions to load at startup, as set in the config."""
+    extensions = list(bot.startup_exts)
+
+    # Check if the bot is meant to be run in DEBUG mode.
+    # When DEBUG mode is inactive, error logging to the console is limited,
+    # but the error logs are also shown in Discord as well.
+    if not bot.DEBUG:
+        # Adds the custom error logging if no in debug mode.
+        extensions.append('Cogs.Errors')
+
+    # The internal commands are always loaded.
+    extensions.append('Cogs.Internal')
+    return extensions
+
+async def shutdown(bot):
+    """Bot | Shutdown
+
+    Write out anything pending and send everything queued, then stop the
+    bot's background work. Run by `close`, before disconnecting.
+    """
+    await bot.prefix_resolver.flush()
+    await bot.data_manager.close()
+    # Nothing can be sent without having logged in, e.g. after an invalid token.
+    if bot.user is not None:
+        # Log messages go through the outbound scheduler, so the sink is drained first.
+        await bot.log_sink.close()
+        await bot.outbound.close()
+    await bot.metrics.close()
+    await bot.watchdog.close()
+    bot.offloader.close()
+
+class Shutdown:
+    """Runs `shutdown` once, however the bot is closed.
+
+    The restart command, Ctrl-C, SIGTERM, and discord.py giving up on the
+    connection all end in `close`. On a signal discord.py has already
+    cancelled every task by then, which the sink and scheduler allow for.
+    """
+    _shut_down = False
+
+    async def close(self):
+        if not self._shut_down:
+            self._shut_down = True
+            try:
+                await shutdown(self)
+            except Exception as e:
+                self.logger.err("Could not finish shutting down", error = e)
+        await super().close()
+
+class Bot(Shutdown, commands.Bot):
+    pass
+
+class AutoShardedBot(Shutdown, commands.AutoShardedBot):
+    pass
+
+def create_bot(config_path = "./Config.yml", permissions_path = "./Permissions.yml", timer = None):
+    """Bot | Create
+
+    Create and set up the bot, without connecting to Discord.
+
+    Parameters:
+        - config_path (:class:`str`) -
+            The config file to load, see 'Config.yml' for each setting.
+        - permissions_path (:class:`str`) -
+            The permissions file to load, see 'Permissions.yml'.
+        - timer (:class:`StartupTimer`) -
+            The timer to record each startup step on, a new one is started if not given.
+
+    Raises a `PermissionConfigError` (after logging each problem) if any permission is invalid.
+    """
+    timer = timer or StartupTimer()
+
+    # Sharding has to be known before the bot is created, so the config is read first.
+    with timer.step("config"):
+        config = read_yaml(config_path)
+        shard_settings = shard_options(config)
+
+        # Intents and caching, see the 'Gateway' section of the config.
+        options = gateway_options(config)
+
+        # Create the 'bot' instance, using the fucntion above for getting the prefix.
+        # Large bots can run as an AutoShardedBot, see the 'Sharding' section of the config.
+        if shard_settings:
+            bot = AutoShardedBot(command_prefix=get_prefix, description="Heroicos_HM's Custom Bot", case_insensitive = True, **shard_settings, **options)
+        else:
+            bot = Bot(command_prefix=get_prefix, description="Heroicos_HM's Custom Bot", case_insensitive = True, **options)
+        bot.startup = timer
+        # The process's exit code once the bot closes, see `Resources/Supervisor.py`.
+        bot.exit_code = 0
+
+        # Remove the help command to leave room for implementing a custom one.
+        bot.remove_command('help')
+
+        bot.data_manager = DataManager(bot, config_path = config_path, permissions_path = permissions_path)
+        bot.data_manager.load_config(config)
+
+        # Start logging as soon as the config says how to.
+        bot.logger = Logger(bot)
+        bot.logger.start()
+
+    with timer.step("permissions"):
+        try:
+            bot.data_manager.load_permissions()
+        except PermissionConfigError as e:
+            log_permission_errors(bot, e)
+            raise
+
+    with timer.step("data"):
+        # Several processes writing the same JSON data file would overwrite each other's changes.
+        if shard_settings.get('shard_ids') and bot.data_backend == 'json':
+            bot.logger.warn("Running a subset of shards with the 'json' data backend, use 'sqlite' when running more than one process.")
+        bot.data_manager.load_data()
+        bot.data_manager.start_flusher()
+
+        # Load every server's prefix into memory as soon as the bot starts running.
+        bot.prefix_resolver = PrefixResolver(bot)
+        bot.loop.create_task(bot.prefix_resolver.load())
+
+        bot.embed_util = EmbedUtil(bot)
+
+        # Every message sent, edited, reacted to, or deleted goes through the outbound scheduler, replies first.
+        bot.outbound = Outbound(bot)
+        bot.outbound.start()
+
+        # Every open menu (confirmations, help pages) is run by the menu manager.
+        bot.menu_manager = MenuManager(bot)
+        bot.menu_manager.start()
+
+        # Cogs' message handlers are indexed by the router as their extensions load.
+        bot.router = MessageRouter(bot)
+
+        # The help text is indexed once every command is loaded, whether or not the help cog is.
+        bot.help_index = HelpIndex(bot)
+
+        # Log channel messages are queued and sent in the background.
+        bot.log_sink = LogSink(bot)
+        bot.log_sink.start()
+
+    # Print to the user that the bot will run in Debug mode.
+    if bot.DEBUG:
+        bot.logger.warn("Debug mode active.")
+
+    # Start the worker processes for `bot.offload` before any extension can use it.
+    with timer.step("offload"):
+        bot.offloader = Offloader(bot)
+        bot.offloader.start()
+        bot.offload = bot.offloader.run
+
+    # List of extension files to load, see the 'Extensions' section of the config.
+    bot.exts = configured_extensions(bot)
+
+    # Import the extensions listed above in parallel, then register each one, timing both.
+    with timer.step("extensions"):
+        bot.extension_manager = ExtensionManager(bot)
+        bot.extension_manager.load_all(list(bot.exts), threads = bot.import_threads)
+        bot.extension_manager.register_lazy(bot.lazy_exts)
+    bot.extension_manager.record(timer)
+
+    @bot.event
+    async def on_ready():
+        """Triggers once the bot has established a Discord gateway connection successfully.
+
+        WARNING: This function can be triggered multiple times, make sure anything in here can accept that.
+
+        Sets up any configuration for the bot that requires a Discord connection first.
+        """
+        # Get the log channel object first, this allows logging to happen without having to retrieve the channel every time.
+        bot.log_channel = bot.get_channel(bot.log_channel_id)
+
+        # Print the connection message.
+        bot.logger.ok(f"Logged in as {bot.user} and connected to Discord! (ID: {bot.user.id})")
+
+        # Report how long startup took, only the first time.
+        bot.startup.ready(bot.logger)
+
+        # Set the "playing" status of the bot to what is set in the config.
+        if bot.show_game_status:
+            # Create an instance of a Game for the bot to be playing, set to whatever text that is to be shown.
+            game = discord.Game(name = bot.game_to_show.format(prefix = bot.prefix))
+            # Show that text.
+            await bot.change_presence(activity = game)
+
+        # Create online message using the embed utility.
+        embed = bot.embed_util.get_embed(
+            title = bot.online_message.format(username = bot.user.name),
+            ts = True
+        )
+
+        # Queue the embed "online" message for the log channel.
+        bot.log_sink.send(embed)
+
+        # Set the bot start time for use in the uptime command.
+        bot.start_time = bot.embed_ts()
+
+    # Messages that can't be commands are dropped before discord.py builds a context for them.
+    bot.message_filter = MessageFilter(bot)
+
+    @bot.event
+    async def on_message(message):
+        """Triggers for every message the bot can see.
+
+        Only messages that pass the prefilter are processed as commands.
+        Listeners added by cogs still see every message.
+        """
+        if bot.message_filter.accept(message):
+            await bot.process_commands(message)
+
+    # Rate limits are checked once per message, before the permission check and any argument conversion.
+    bot.rate_limiter = RateLimiter(bot)
+    bot.add_check(bot.rate_limiter.check, call_once = True)
+    bot.add_check(command_permissions)
+
+    with timer.step("indexes"):
+        # Now that every command is registered, make sure each permission belongs to one.
+        try:
+            bot.data_manager.validate_permissions()
+        except PermissionConfigError as e:
+            log_permission_errors(bot, e)
+            raise
+
+        # Build the help text once, now that every command is loaded.
+        bot.help_index.build()
+
+        # Start recording metrics, with every command's stats set up ahead of time.
+        bot.metrics = Metrics(bot)
+        bot.metrics.start()
+
+        # Watch for anything blocking the event loop.
+        bot.watchdog = Watchdog(bot)
+        bot.watchdog.start()
+
+    @bot.before_invoke
+    async def before_invoke(ctx):
+        """Runs right before every command, after its checks have passed."""
+        # A lazy extension's stand-in runs the real command, which is timed instead.
+        if hasattr(ctx.command.callback, '__stand_in__'):
+            return
+        bot.metrics.before_invoke(ctx)
+        bot.watchdog.before_invoke(ctx)
+
+    @bot.after_invoke
+    async def after_invoke(ctx):
+        """Runs right after every command, even if it failed."""
+        if hasattr(ctx.command.callback, '__stand_in__'):
+            return
+        bot.watchdog.after_invoke(ctx)
+        bot.metrics.after_invoke(ctx)
+
+    return bot
+
+async def reload_bot(bot):
+    """Bot | Reload
+
+    Reload the config, permissions, and every extension in place, keeping the
+    gateway connection (and everything cached from it) alive.
+
+    Permissions that can't be compiled raise a `PermissionConfigError`, and an
+    invalid config a `KeyError` or `ValueError`, before anything has changed.
+    An extension that fails to reload is left as it was, and permissions that
+    don't match the reloaded commands are reported as failed, keeping the old
+    permissions.
+
+    Returns a tuple of:
+        - extension name -> error, for every extension that failed.
+        - the config sections that changed, but need a full restart to apply.
+    """
+    # Both files are read and compiled in full first, so an invalid one leaves the bot exactly as it was.
+    permissions = bot.data_manager.parse_permissions()
+
+    config = read_yaml(bot.data_manager.config_path)
+    needs_restart = [name for name in RESTART_SETTINGS if config.get(name) != bot.config.get(name)]
+    # Keep the running values of startup-only settings, they're used by objects that already exist.
+    for name in needs_restart:
+        config[name] = bot.config[name]
+    settings = bot.data_manager.parse_config(config)
+
+    bot.data_manager.apply_config(settings)
+
+    # The embed templates include the color and footer from the config.
+    bot.embed_util = EmbedUtil(bot)
+    bot.log_channel = bot.get_channel(bot.log_channel_id)
+
+    failed = bot.extension_manager.sync(configured_extensions(bot), bot.lazy_exts)
+
+    # The new permissions are only used once each one matches a reloaded command.
+    try:
+        bot.data_manager.validate_permissions(PermissionIndex(permissions))
+    except PermissionConfigError as e:
+        failed["Permissions.yml"] = "\n".join(e.errors + ["The old permissions are still in use."])
+    else:
+        bot.data_manager.apply_permissions(permissions)
+
+    # Rebuild the help index for the reloaded commands and permissions.
+    bot.help_index.invalidate()
+    bot.help_index.build()
+
+    if bot.show_game_status:
+        await bot.change_presence(activity = discord.Game(name = bot.game_to_show.format(prefix = bot.prefix)))
+
+    return failed, needs_restart
+
+def run_bot(bot):
+    """Bot | Run
+
+    Connect to Discord and run until the bot is closed, then write out
+    anything still pending and stop logging. Queued messages are sent by
+    the bot's `close`, see `Shutdown`.
+
+    Returns the exit code for the process, set in `bot.exit_code`.
+    """
+    bot.logger.ok("Connecting to Discord...")
+    bot.startup.connecting()
+    try:
+        bot.run(bot.TOKEN, bot = True, reconnect = True)
+    except discord.LoginFailure:
+        # Never log the token itself, the logs may be written to files.
+        bot.logger.err(f"Invalid token, check the '{bot.config['Token Env Var']}' environment variable.")
+        # Restarting won't fix it, the supervisor stops instead.
+        bot.exit_code = CONFIG_EXIT_CODE
+    finally:
+        # Catch any data that changed after the last flush.
+        bot.data_manager.flush_now()
+        bot.offloader.close()
+        bot.logger.stop()
+    return bot.exit_code
@@ -5,56 +5,139 @@ saving of the config, permissions, and data.
 """
 import json
 import os
+from types import SimpleNamespace
 from discord import Color
-from colorama import Fore
 import datetime
+from yaml import load
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+from Resources.Menus import STYLES
+from Resources.Permissions import PermissionIndex, compile_permissions
+from Resources.RateLimit import compile_rate_limits
+from Resources.Storage import BACKENDS, GLOBAL
+
+def read_yaml(path):
+    """Read a YAML file, with the C loader when PyYAML was built with it."""
+    with open(path, 'r') as file:
+        return load(file, Loader = Loader)
 
 class DataManager:
-    def __init__(self, bot):
+    def __init__(self, bot, config_path = "./Config.yml", permissions_path = "./Permissions.yml"):
         self.bot = bot
+        self.backend = None
+        self.config_path = config_path
+        self.permissions_path = permissions_path
 
-    def load_config(self):
+    def load_config(self, config = None):
         """Setup | Bot Config
 
         Loading Config variables into bot attributes.
 
+        The config is read from the config file, unless an already read one is passed in.
+
         See 'Config.yml' for specifics on each setting.
         """
-        with open("./Config.yml", 'r') as file:
-            config = self.bot.yaml.load(file, Loader = self.bot.yaml.Loader)
+        self.apply_config(self.parse_config(config))
+
+    def parse_config(self, config = None):
+        """Setup | Parse Config
+
+        Read every setting from the config without changing the bot, raising a
+        `KeyError` for a missing setting or a `ValueError` for an invalid one.
+
+        Returns the settings, to pass to `apply_config`.
+        """
+        if config is None:
+            config = read_yaml(self.config_path)
+        settings = SimpleNamespace()
 
-        # Save config files to the bot.
-        self.bot.config = config
+        # Keep the config itself as well.
+        settings.config = config
 
         # Main Settings
-        self.bot.TOKEN               = os.getenv(config['Token Env Var'])
-        self.bot.DEBUG               = config['DEBUG']
-        self.bot.prefix              = config['Prefix']
-        self.bot.online_message      = config['Online Message']
-        self.bot.restarting_message  = config['Restarting Message']
-        self.bot.data_file           = os.path.abspath(config['Data File'])
-        self.bot.show_game_status    = config['Game Status']['Active']
-        self.bot.game_to_show        = config['Game Status']['Game']
-        self.bot.log_channel_id      = config['Log Channel']
-        self.bot.broken_user_id      = config['Broken User ID']
+        settings.TOKEN               = os.getenv(config['Token Env Var'])
+        settings.DEBUG               = config['DEBUG']
+        settings.prefix              = config['Prefix']
+        settings.online_message      = config['Online Message']
+        settings.restarting_message  = config['Restarting Message']
+        settings.data_file           = os.path.abspath(config['Data File'])
+        settings.show_game_status    = config['Game Status']['Active']
+        settings.game_to_show        = config['Game Status']['Game']
+        settings.log_channel_id      = config['Log Channel']
+        settings.broken_user_id      = config['Broken User ID']
 
         # Embed Options
-        self.bot.embed_color = Color.from_rgb(
+        settings.embed_color = Color.from_rgb(
             config['Embed Settings']['Color']['r'],
             config['Embed Settings']['Color']['g'],
             config['Embed Settings']['Color']['b']
         )
-        self.bot.footer =              config['Embed Settings']['Footer']['Text']
-        self.bot.footer_image =        config['Embed Settings']['Footer']['Icon URL']
-        self.bot.delete_commands =     config['Embed Settings']['Delete Commands']
-        self.bot.show_command_author = config['Embed Settings']['Show Author']
-        self.bot.embed_ts =            lambda: datetime.datetime.now(datetime.timezone.utc)
-
-        # Logging Variables
-        self.bot.OK = f"{Fore.GREEN}[OK]{Fore.RESET}  "
-        self.bot.WARN = f"{Fore.YELLOW}[WARN]{Fore.RESET}"
-        self.bot.ERR = f"{Fore.RED}[ERR]{Fore.RESET} "
-        self.bot.TIMELOG = lambda: datetime.datetime.now().strftime('[%m/%d/%Y | %I:%M:%S %p]')
+        settings.footer =              config['Embed Settings']['Footer']['Text']
+        settings.footer_image =        config['Embed Settings']['Footer']['Icon URL']
+        settings.delete_commands =     config['Embed Settings']['Delete Commands']
+        settings.show_command_author = config['Embed Settings']['Show Author']
+        settings.embed_ts =            lambda: datetime.datetime.now(datetime.timezone.utc)
+
+        # Extension Settings
+        settings.startup_exts =        config['Extensions']['Startup'] or []
+        settings.lazy_exts =           config['Extensions']['Lazy'] or {}
+        settings.import_threads =      config['Extensions']['Import Threads']
+
+        # Data Settings
+        settings.data_backend =        config['Data Settings']['Backend']
+        settings.database_file =       os.path.abspath(config['Data Settings']['Database File'])
+        settings.flush_interval =      config['Data Settings']['Flush Interval']
+        settings.flush_threshold =     config['Data Settings']['Flush Threshold']
+
+        # Log Channel Settings
+        settings.log_queue_size =      config['Log Channel Settings']['Queue Size']
+        settings.log_flush_interval =  config['Log Channel Settings']['Flush Interval']
+
+        # Outbound Settings
+        settings.outbound_foreground = config['Outbound']['Foreground Limit']
+        settings.outbound_background = config['Outbound']['Background Limit']
+        settings.outbound_channel_limit = config['Outbound']['Channel Limit']
+        settings.outbound_delete_delay = config['Outbound']['Delete Delay']
+
+        # Menu Settings
+        settings.menu_style =          config['Menus']['Style']
+        settings.menu_timeout =        config['Menus']['Timeout']
+        if settings.menu_style not in STYLES:
+            raise ValueError(f"Unknown menu style '{settings.menu_style}', expected one of: {', '.join(STYLES)}")
+
+        # Rate Limit Settings, compiled here so that a bad limit is found when the config is loaded.
+        settings.rate_limits =         compile_rate_limits(config['Rate Limits'])
+
+        # Offload Settings
+        settings.offload_processes =   config['Offload']['Processes']
+        settings.offload_threads =     config['Offload']['Threads']
+        settings.offload_timeout =     config['Offload']['Timeout']
+
+        # Metrics Settings
+        settings.metrics_endpoint =    config['Metrics']['Endpoint']
+        settings.metrics_host =        config['Metrics']['Host']
+        settings.metrics_port =        config['Metrics']['Port']
+
+        # Watchdog Settings
+        settings.watchdog_interval =   config['Watchdog']['Interval']
+        settings.watchdog_threshold =  config['Watchdog']['Threshold']
+
+        # Logging Settings
+        settings.log_format =          config['Logging']['Format']
+        settings.log_file =            os.path.abspath(config['Logging']['File']) if config['Logging']['File'] else None
+        settings.log_max_bytes =       config['Logging']['Max Bytes']
+        settings.log_backup_count =    config['Logging']['Backup Count']
+        return settings
+
+    def apply_config(self, settings):
+        """Setup | Apply Config
+
+        Set parsed settings (from `parse_config`) as bot attributes, all in one go.
+        """
+        vars(self.bot).update(vars(settings))
 
     def load_permissions(self):
         """Setup | Command Permissions
@@ -62,48 +145,130 @@ class DataManager:
         Loading Permission variables into bot attributes.
 
         See 'Permissions.yml' for specifics on each setting.
+
+        Raises a `PermissionConfigError` if any permission is invalid.
+        """
+        self.apply_permissions(self.parse_permissions())
+
+    def parse_permissions(self):
+        """Setup | Parse Permissions
+
+        Read and compile the permissions without changing the bot, raising a
+        `PermissionConfigError` if any permission is invalid.
         """
-        bot_permissions = {}
-        with open("./Permissions.yml", 'r') as file:
-            permissions = self.bot.yaml.load(file, Loader = self.bot.yaml.Loader)
-            # Raw permission input is formatted to have role IDs in place.
-            roles = dict(permissions['Roles'])
-            for key in permissions.keys():
-                if not key in (None, 'Roles'):
-                    bot_permissions[key] = []
-                    for permission in permissions[key]:
-                        bot_permissions[key].append(permission.format(**roles))
+        raw_permissions = read_yaml(self.permissions_path)
 
+        # Placeholders are replaced and role IDs converted once here, raising on any invalid entry.
+        return compile_permissions(raw_permissions)
+
+    def apply_permissions(self, permissions):
+        """Setup | Apply Permissions
+
+        Use compiled permissions (from `parse_permissions`), and the index built from them.
+        """
+        # Compile the index used by the global permission check, replacing the old one in one step.
         self.bot.permissions = permissions
+        self.bot.permission_index = PermissionIndex(permissions)
 
-    def save_data(self):
-        """Data | Saving
+    def validate_permissions(self, index = None):
+        """Setup | Validate Permissions
 
-        Open the data file and save the bot's data to it.
+        Check that every permission belongs to a loaded command, in the bot's
+        permission index or the given `index` (e.g. one that isn't applied yet).
 
-        Overwrites previous data in file.
+        Must be called after every extension and cog has been loaded. Names that may
+        belong to a lazy extension are checked again as each one loads.
         """
-        with open(self.bot.data_file, 'w+', encoding = "utf-8") as save_file:
-            try:
-                save_file.write(json.dumps(self.bot.data, indent = 2))
-            except Exception as e:
-                print('Could not save data: ' + str(e))
+        if index is None:
+            index = self.bot.permission_index
+        index.validate(self.bot, lazy = bool(self.bot.extension_manager.lazy))
 
     def load_data(self):
         """Data | Loading
 
-        Check if the data file exists, if it does, load it, if not, create it.
-
-        If the data file exists but has not data, give it a new empty data object.
-        """
-        if os.path.exists(self.bot.data_file):
-            with open(self.bot.data_file, 'r', encoding = "utf-8") as file:
-                content = file.read()
-                if len(content) == 0:
-                    self.bot.data = {}
-                    self.save_data()
-                else:
-                    self.bot.data = json.loads(content)
-        else:
-            self.bot.data = {}
-            self.save_data()
+        Create the storage backend selected by the `Backend` setting, then
+        load (or create) its data.
+        """
+        try:
+            backend = BACKENDS[self.bot.data_backend]
+        except KeyError:
+            raise ValueError(f"Unknown data backend '{self.bot.data_backend}', expected one of: {', '.join(BACKENDS)}")
+        self.backend = backend(self.bot)
+        self.backend.load()
+
+    async def get(self, key, scope = GLOBAL, id = None, default = None):
+        """Data | Get
+
+        Get the value of a key, within a scope ('global', 'guild', or 'user') and guild/user ID.
+        """
+        return await self.backend.get(key, scope = scope, id = id, default = default)
+
+    async def set(self, key, value, scope = GLOBAL, id = None):
+        """Data | Set
+
+        Set the value of a key, within a scope and guild/user ID.
+        """
+        await self.backend.set(key, value, scope = scope, id = id)
+
+    async def delete(self, key, scope = GLOBAL, id = None):
+        """Data | Delete
+
+        Remove a key, within a scope and guild/user ID.
+        """
+        await self.backend.delete(key, scope = scope, id = id)
+
+    async def scan(self, scope = GLOBAL, id = None, key = None):
+        """Data | Scan
+
+        List the `(id, key, value)` entries of a scope, optionally narrowed to one ID and/or key.
+        """
+        return await self.backend.scan(scope = scope, id = id, key = key)
+
+    def save_data(self, key = None):
+        """Data | Saving
+
+        For code that edits `bot.data` directly (JSON backend only), mark a
+        top level key as changed, or every key if none is given.
+
+        The background flusher writes changed keys out together. Use `flush` to write immediately.
+        """
+        self.backend.mark_dirty(key)
+
+    def migrate(self, data_file):
+        """Data | Migrate
+
+        Import an existing JSON data file into the current backend.
+
+        Returns the number of entries imported per scope.
+        """
+        with open(data_file, 'r', encoding = "utf-8") as file:
+            content = file.read()
+        return self.backend.import_data(json.loads(content) if content else {})
+
+    def start_flusher(self):
+        """Data | Start Background Work
+
+        Start the backend's background tasks, such as the JSON backend's flusher.
+        """
+        self.backend.start()
+
+    async def flush(self):
+        """Data | Flush
+
+        Write any pending data to storage right away.
+        """
+        await self.backend.flush()
+
+    def flush_now(self):
+        """Data | Flush (Blocking)
+
+        Write any pending data on the calling thread, for when the event loop isn't running.
+        """
+        self.backend.flush_now()
+
+    async def close(self):
+        """Data | Close
+
+        Stop background work and write out anything still pending.
+        """
+        await self.backend.close()
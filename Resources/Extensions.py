@@ -0,0 +1,270 @@
+"""Resource | Extension Manager
+
+This class loads the bot's extensions (cogs), and keeps track of how long
+each one takes.
+
+Startup extensions:
+    Each extension's module (and everything it imports, the slow part) is
+    run in parallel on a few threads. Each extension's `setup` is then
+    called on the loop's thread, one after another, since registering
+    commands isn't thread safe. The module isn't run a second time, it is
+    handed to discord.py the same as `bot.load_extension` would.
+
+Lazy extensions:
+    Listed along with the names of their commands. Only a stand-in command
+    is registered for each name at startup. The first time one is used the
+    extension is imported (off of the event loop), the stand-ins are
+    replaced with the real commands, and the command is run as normal.
+
+Every load, reload, and unload rebuilds the message router's index.
+"""
+import asyncio
+import importlib.util
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from discord.ext import commands
+
+from Resources.Permissions import PermissionConfigError
+
+class ExtensionManager:
+    def __init__(self, bot):
+        self.bot = bot
+        # Every extension the bot knows about, loaded, unloaded, or lazy.
+        # Also set as `bot.cog_exts`, the extensions the cog commands are allowed to manage.
+        self.known = bot.cog_exts = []
+        # extension name -> {"import": seconds, "setup": seconds}
+        self.timings = {}
+        # lazy extension name -> the names of its commands, until it is loaded.
+        self.lazy = {}
+        # lazy extension name -> the task loading it, so commands used at the same time share one load.
+        self._loading = {}
+
+    def _know(self, name):
+        if name not in self.known:
+            self.known.append(name)
+
+    @staticmethod
+    def _import(name):
+        """Run an extension's module, on a worker thread. Returns the module and the time taken.
+
+        The module is only run, its `setup` is left to `_setup` on the loop's thread.
+        """
+        start = time.perf_counter()
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise commands.ExtensionNotFound(name)
+        module = importlib.util.module_from_spec(spec)
+        # Added before it runs, the same as `import` and `bot.load_extension`.
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception as e:
+            del sys.modules[name]
+            raise commands.ExtensionFailed(name, e) from e
+        return module, time.perf_counter() - start
+
+    def _setup(self, name, module):
+        """Register an imported extension with discord.py, on the loop's thread.
+
+        The rest of what `bot.load_extension` does, without running the module a second time.
+        """
+        start = time.perf_counter()
+        setup = getattr(module, 'setup', None)
+        if setup is None:
+            del sys.modules[name]
+            raise commands.NoEntryPointError(name)
+        try:
+            setup(self.bot)
+        except Exception as e:
+            # Remove anything it registered before failing, as discord.py would.
+            del sys.modules[name]
+            self.bot._remove_module_references(module.__name__)
+            self.bot._call_module_finalizers(module, name)
+            raise commands.ExtensionFailed(name, e) from e
+        # discord.py's own list of loaded extensions, so reloading and unloading work as normal.
+        self.bot._BotBase__extensions[name] = module
+        self.timings.setdefault(name, {})["setup"] = time.perf_counter() - start
+        self.bot.router.rebuild()
+
+    def load_all(self, names, threads = 4):
+        """Extensions | Load All
+
+        Import the extensions in parallel, then register each one in order.
+
+        Parameters:
+            - names (:class:`list`) -
+                The extensions to load, e.g. `Cogs.General`.
+            - threads (:class:`int`) -
+                How many extensions to import at once.
+        """
+        with ThreadPoolExecutor(max_workers = max(1, threads), thread_name_prefix = "extension-import") as pool:
+            imports = {name: pool.submit(self._import, name) for name in names}
+            # Registered in order as each import finishes, while the later ones keep importing.
+            for name in names:
+                self._know(name)
+                module, import_time = imports[name].result()
+                self.timings[name] = {"import": import_time}
+                self._setup(name, module)
+
+    def record(self, timer):
+        """Extensions | Record
+
+        Add each extension's import and setup time to a startup timer.
+        """
+        for name, timing in self.timings.items():
+            timer.record(f"{name} import", timing.get("import", 0.0))
+            timer.record(f"{name} setup", timing.get("setup", 0.0))
+
+    def register_lazy(self, lazy):
+        """Extensions | Register Lazy
+
+        Register a stand-in command for every command of each lazy extension.
+
+        Parameters:
+            - lazy (:class:`dict`) -
+                Extension name -> list of its command names.
+        """
+        for name, command_names in (lazy or {}).items():
+            self._know(name)
+            self.lazy[name] = list(command_names)
+            for command_name in command_names:
+                self.bot.add_command(self._stand_in(name, command_name))
+
+    def _stand_in(self, extension, command_name):
+        manager = self
+
+        async def stand_in(ctx, *, args = None):
+            await manager.load_lazy(extension)
+            # Run the real command on the message, now that it is registered. This skips
+            # `bot.invoke`, whose once per message checks (e.g. rate limits) already passed.
+            ctx = await ctx.bot.get_context(ctx.message)
+            try:
+                await ctx.command.invoke(ctx)
+            except commands.CommandError as e:
+                await ctx.command.dispatch_error(ctx, e)
+            else:
+                ctx.bot.dispatch('command_completion', ctx)
+
+        # Only the real command is counted by the invoke hooks.
+        stand_in.__stand_in__ = True
+        return commands.Command(
+            stand_in,
+            name = command_name,
+            help = f"Loads `{extension}` the first time it is used.",
+        )
+
+    async def load_lazy(self, name):
+        """Extensions | Load Lazy
+
+        Load a lazy extension, replacing its stand-in commands with the real ones.
+
+        Several commands used at the same time share a single load.
+        """
+        if name not in self.lazy:
+            return
+        task = self._loading.get(name)
+        if task is None:
+            task = self._loading[name] = asyncio.ensure_future(self._load_lazy(name))
+        try:
+            await asyncio.shield(task)
+        finally:
+            self._loading.pop(name, None)
+
+    async def _load_lazy(self, name):
+        module, import_time = await self.bot.loop.run_in_executor(None, self._import, name)
+        self.timings[name] = {"import": import_time}
+
+        command_names = self.lazy.pop(name)
+        for command_name in command_names:
+            self.bot.remove_command(command_name)
+        try:
+            self._setup(name, module)
+        except Exception:
+            # Put the stand-ins back, so the next use tries again.
+            self.register_lazy({name: command_names})
+            raise
+
+        self.bot.exts.append(name)
+        # The help menu needs to pick up the new commands.
+        self.bot.help_index.invalidate()
+        # Permissions for its commands could only be checked now, the bot is already running so they're just logged.
+        try:
+            self.bot.data_manager.validate_permissions()
+        except PermissionConfigError as e:
+            for message in e.errors:
+                self.bot.logger.err(f"Invalid permission: {message}")
+        self.bot.logger.ok(
+            f"Loaded lazy extension {name}.",
+            **{"import": f"{import_time * 1000:.1f} ms", "setup": f"{self.timings[name]['setup'] * 1000:.1f} ms"}
+        )
+
+    def load(self, name):
+        """Extensions | Load
+
+        Load an extension, or reload it if it is already loaded.
+        """
+        if name in self.bot.extensions:
+            self.reload(name)
+            return
+        if name in self.lazy:
+            for command_name in self.lazy.pop(name):
+                self.bot.remove_command(command_name)
+        module, import_time = self._import(name)
+        self.timings[name] = {"import": import_time}
+        self._setup(name, module)
+        if name not in self.bot.exts:
+            self.bot.exts.append(name)
+
+    def reload(self, name):
+        """Extensions | Reload
+
+        Reload a loaded extension in place, keeping the old version if the new one fails.
+        """
+        start = time.perf_counter()
+        self.bot.reload_extension(name)
+        self.timings.setdefault(name, {})["setup"] = time.perf_counter() - start
+        self.bot.router.rebuild()
+
+    def unload(self, name):
+        """Extensions | Unload
+
+        Unload an extension, removing its cogs, commands, and listeners.
+        """
+        self.bot.unload_extension(name)
+        self.bot.router.rebuild()
+        if name in self.bot.exts:
+            self.bot.exts.remove(name)
+
+    def sync(self, names, lazy = None):
+        """Extensions | Sync
+
+        Bring the loaded extensions in line with a new list of them, without restarting:
+        reload every loaded extension that is still listed, unload the ones that
+        aren't, then load any new ones and register any new lazy extensions.
+
+        Returns extension name -> error for any that failed, which are left as they were.
+        """
+        failed = {}
+        for name in list(self.bot.exts):
+            try:
+                if name in names:
+                    self.reload(name)
+                else:
+                    self.unload(name)
+            except Exception as e:
+                failed[name] = e
+
+        for name in names:
+            if name not in self.bot.extensions and name not in failed:
+                try:
+                    self._know(name)
+                    self.load(name)
+                except Exception as e:
+                    failed[name] = e
+
+        self.register_lazy({
+            name: command_names for name, command_names in (lazy or {}).items()
+            if name not in self.lazy and name not in self.bot.extensions
+        })
+        return failed
@@ -0,0 +1,96 @@
+"""Resource | Gateway Options
+
+Turns the `Gateway` section of `Config.yml` into the keyword arguments
+for the bot: which intents it connects with, which members it caches,
+how many messages it keeps, and whether it downloads every server's
+members when starting up.
+
+With many servers the member, user, and message caches are most of the
+bot's memory. The permission check only needs the role IDs sent along
+with each message, so a bot that doesn't use member lists can turn the
+member cache off entirely.
+"""
+import os
+import sys
+
+import discord
+
+# Member cache settings that aren't a list of flags.
+MEMBER_CACHE_PRESETS = {
+    'all': discord.MemberCacheFlags.all,
+    'none': discord.MemberCacheFlags.none,
+}
+
+def build_intents(settings):
+    """Start from discord.py's default intents, then turn each listed one on or off."""
+    intents = discord.Intents.default()
+    for name, value in (settings or {}).items():
+        if name not in discord.Intents.VALID_FLAGS:
+            raise ValueError(f"Unknown intent '{name}', expected one of: {', '.join(discord.Intents.VALID_FLAGS)}")
+        setattr(intents, name, bool(value))
+    return intents
+
+def build_member_cache(setting, intents):
+    """Build the member cache flags from a preset name or a list of flags."""
+    if setting is None or setting == 'default':
+        return discord.MemberCacheFlags.from_intents(intents)
+    if isinstance(setting, str):
+        if setting not in MEMBER_CACHE_PRESETS:
+            raise ValueError(f"Unknown member cache setting '{setting}', expected 'default', 'all', 'none', or a list of flags.")
+        return MEMBER_CACHE_PRESETS[setting]()
+
+    flags = discord.MemberCacheFlags.none()
+    for name in setting:
+        if name not in discord.MemberCacheFlags.VALID_FLAGS:
+            raise ValueError(f"Unknown member cache flag '{name}', expected any of: {', '.join(discord.MemberCacheFlags.VALID_FLAGS)}")
+        setattr(flags, name, True)
+    return flags
+
+def gateway_options(config):
+    """Get the intent and cache keyword arguments for the bot.
+
+    Intents and chunking left blank use discord.py's defaults.
+    """
+    settings = config['Gateway']
+    intents = build_intents(settings['Intents'])
+    options = {
+        'intents': intents,
+        'member_cache_flags': build_member_cache(settings['Member Cache'], intents),
+        # discord.py treats 0 as "use the default", `None` is what turns the message cache off.
+        'max_messages': settings['Max Messages'] or None,
+    }
+    if settings['Chunk At Startup'] is not None:
+        options['chunk_guilds_at_startup'] = settings['Chunk At Startup']
+    return options
+
+def cache_sizes(bot):
+    """Count the entries in each of discord.py's caches."""
+    state = bot._connection
+    guilds = bot.guilds
+    return {
+        "Guilds": len(guilds),
+        "Members": sum(len(guild._members) for guild in guilds),
+        "Users": len(state._users),
+        "Messages": len(state._messages) if state._messages is not None else 0,
+        "Channels": sum(len(guild._channels) for guild in guilds),
+        "Roles": sum(len(guild._roles) for guild in guilds),
+        "Emojis": len(state._emojis),
+        "DM Channels": len(state._private_channels),
+    }
+
+def process_memory():
+    """The process's current resident memory in bytes, or `None` where it can't be read."""
+    try:
+        # Linux, the second field is the resident size in pages.
+        with open("/proc/self/statm", 'r') as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        # Other Unix systems only report the peak, in kilobytes (bytes on macOS).
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
@@ -0,0 +1,164 @@
+"""Resource | Help Index
+
+Holds the help text for every cog and group, built once when extensions load
+instead of walking the whole command tree every time help is used.
+
+Which commands a user can see depends on which of the roles used in
+`Permissions.yml` they have, and on each command's own checks (such as
+`@commands.guild_only()`), the same ones discord.py's help would run.
+The permission part is cached per set of those roles (or a DM), and only
+commands with checks of their own have them run on each help call.
+Repeat help calls for commands without checks are a single dictionary lookup.
+
+Created along with the bot, rather than by the help cog, so it is there
+whether or not `Cogs.Help` is loaded. Call `invalidate` whenever cogs or
+permissions change.
+"""
+import discord
+from discord.ext import commands
+
+class HelpIndex:
+    def __init__(self, bot):
+        self.bot = bot
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget all of the help text, so it is rebuilt the next time it is needed."""
+        # [(cog name, cog description, [(qualified command name, hidden, command if it has checks of its own)])]
+        self._cogs = None
+        # cog name -> "Commands" field text for that cog's help.
+        self._cog_commands = {}
+        # group qualified name -> (command lines, example suffixes)
+        self._groups = {}
+        # visibility key -> (the bot help fields, or `None` if some commands still need their checks run,
+        #                    [(cog name, cog description, [(qualified command name, command if it has checks)])])
+        self._visible = {}
+
+    def build(self):
+        """Build the help text for every cog and its commands."""
+        self._cogs = []
+        for cog in self.bot.cogs.values():
+            command_list = sorted(cog.get_commands(), key = lambda command: command.name)
+            self._cogs.append((
+                cog.qualified_name,
+                cog.description,
+                [(command.qualified_name, command.hidden, command if self._has_checks(command) else None) for command in command_list]
+            ))
+            self._cog_commands[cog.qualified_name] = "\n".join(
+                f"`{command.qualified_name}`" for command in cog.walk_commands() if not command.hidden
+            )
+
+    def _visibility(self, ctx):
+        """The part of a user's identity that decides which commands they can see."""
+        if ctx.guild is None:
+            return None
+        if ctx.author.guild_permissions.administrator:
+            return True
+        # Only the roles that are actually used by a permission matter.
+        index = self.bot.permission_index
+        role_ids = index.member_role_ids(ctx.author)
+        return frozenset(role for role in index.role_ids if index.has_any((role,), role_ids))
+
+    @staticmethod
+    def _has_checks(command):
+        """Whether a command has checks of its own, or from its cog, beyond the global ones."""
+        return bool(command.checks) or commands.Cog._get_overridden_method(command.cog.cog_check) is not None
+
+    @staticmethod
+    async def _passes(command, ctx):
+        """Run a command's own checks and its cog's check, as `Command.can_run` would, without the global ones.
+
+        The global checks are the rate limiter (which would use up a token) and
+        the permission check, which the index already covers.
+        """
+        original = ctx.command
+        ctx.command = command
+        try:
+            local_check = commands.Cog._get_overridden_method(command.cog.cog_check)
+            if local_check is not None and not await discord.utils.maybe_coroutine(local_check, ctx):
+                return False
+            return await discord.utils.async_all(predicate(ctx) for predicate in command.checks)
+        except commands.CommandError:
+            return False
+        finally:
+            ctx.command = original
+
+    @staticmethod
+    def _field(name, description, visible):
+        return {
+            "name": name,
+            "value": f"{description}\nCommands:\n" + ", ".join(f"`{command}`" for command in visible),
+            "inline": False
+        }
+
+    async def bot_fields(self, ctx):
+        """The fields for the bot help menu, as seen by the author of `ctx`."""
+        if self._cogs is None:
+            self.build()
+
+        key = self._visibility(ctx)
+        entry = self._visible.get(key)
+        if entry is None:
+            index = self.bot.permission_index
+            # Outside of a server there are no roles, so only unrestricted commands can be used.
+            role_ids = sorted(key) if isinstance(key, frozenset) else ()
+            layout = []
+            for name, description, command_list in self._cogs:
+                allowed = [
+                    (qualified_name, command) for qualified_name, hidden, command in command_list
+                    if not hidden and (key is True or index.allowed(qualified_name, role_ids))
+                ]
+                if allowed:
+                    layout.append((name, description, allowed))
+            # Without any checks left to run, the fields are the same every time.
+            if any(command is not None for _, _, allowed in layout for _, command in allowed):
+                fields = None
+            else:
+                fields = [self._field(name, description, [qualified_name for qualified_name, _ in allowed]) for name, description, allowed in layout]
+            entry = self._visible[key] = (fields, layout)
+
+        fields, layout = entry
+        if fields is not None:
+            return fields
+
+        fields = []
+        for name, description, allowed in layout:
+            visible = [
+                qualified_name for qualified_name, command in allowed
+                if command is None or await self._passes(command, ctx)
+            ]
+            if visible:
+                fields.append(self._field(name, description, visible))
+        return fields
+
+    def cog_commands(self, cog):
+        """The "Commands" field text for a cog's help."""
+        if self._cogs is None:
+            self.build()
+        text = self._cog_commands.get(cog.qualified_name)
+        if text is None:
+            # A cog added after the index was built.
+            text = self._cog_commands[cog.qualified_name] = "\n".join(
+                f"`{command.qualified_name}`" for command in cog.walk_commands() if not command.hidden
+            )
+        return text
+
+    def group_lines(self, group):
+        """The command lines and example suffixes for a group's help."""
+        entry = self._groups.get(group.qualified_name)
+        if entry is None:
+            seen = set()
+            activation = []
+            examples = []
+            for command in group.walk_commands():
+                line = f"`{command.qualified_name} {command.signature}` - {command.help}"
+                if line in seen or command.hidden:
+                    continue
+                seen.add(line)
+                activation.append(line)
+                if command.brief not in [None, ""]:
+                    examples.append(f"{command.qualified_name} {command.brief}")
+                else:
+                    examples.append(command.qualified_name)
+            entry = self._groups[group.qualified_name] = ("\n".join(activation), examples)
+        return entry
@@ -0,0 +1,161 @@
+"""Resource | Launcher
+
+Runs the bot as several processes, each owning a range of gateway shards,
+so that a large bot can use more than one CPU core.
+
+Each worker is a normal `main.py` process, told which shards to run with
+the `BOT_SHARD_COUNT` and `BOT_SHARD_IDS` environment variables. Workers
+share data through the SQLite backend, which is safe to use from several
+processes at once, instead of each rewriting the JSON data file.
+
+Workers that stop are handled the same way the supervisor handles the bot
+(see `Resources/Supervisor.py`), each with its own backoff and crash count:
+restarted right away after the 'restart' command, left stopped after an
+intentional shutdown or when its configuration stops it from starting, and restarted after a growing delay when they crash,
+or parked for a while when they keep crashing.
+"""
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from Resources.Supervisor import CONFIG_EXIT_CODE, RESTART_EXIT_CODE, Supervisor
+
+# Environment variables a launcher uses to hand a worker its shards.
+SHARD_COUNT_VAR = 'BOT_SHARD_COUNT'
+SHARD_IDS_VAR = 'BOT_SHARD_IDS'
+
+def shard_options(config):
+    """Get the sharding keyword arguments for the bot.
+
+    Environment variables set by the launcher take priority over `Config.yml`.
+    Returns an empty dictionary when sharding is off.
+    """
+    settings = config['Sharding']
+    if not settings['Active'] and SHARD_COUNT_VAR not in os.environ:
+        return {}
+
+    shard_count = os.environ.get(SHARD_COUNT_VAR, settings['Shard Count'])
+    shard_ids = os.environ.get(SHARD_IDS_VAR, settings['Shard IDs'])
+    if isinstance(shard_ids, str):
+        shard_ids = [int(shard_id) for shard_id in shard_ids.split(',') if shard_id]
+
+    options = {}
+    if shard_count is not None:
+        options['shard_count'] = int(shard_count)
+    if shard_ids:
+        if shard_count is None:
+            raise ValueError("'Shard IDs' can only be used along with 'Shard Count'.")
+        options['shard_ids'] = list(shard_ids)
+    return options
+
+def split_shards(shard_count, processes):
+    """Split shard IDs into one contiguous range per process."""
+    per_process = math.ceil(shard_count / processes)
+    return [
+        list(range(start, min(start + per_process, shard_count)))
+        for start in range(0, shard_count, per_process)
+    ]
+
+class Worker:
+    """A worker process, its shards, and the restart policy for it."""
+    def __init__(self, index, shard_ids, config):
+        self.index = index
+        self.shard_ids = shard_ids
+        # Only the supervisor's restart policy is used, the launcher starts the process itself.
+        self.supervisor = Supervisor(config, name = f"Worker {index}")
+        self.process = None
+        self.started = 0.0
+        # When to start the process again after a crash, `None` otherwise.
+        self.restart_at = None
+
+class Launcher:
+    def __init__(self, config):
+        self.config = config
+        self.settings = config['Sharding']
+        # worker index -> Worker, for every worker that hasn't shut down on purpose.
+        self.workers = {}
+
+    def recommended_shards(self):
+        """Ask Discord how many shards the bot should use."""
+        token = os.getenv(self.config['Token Env Var'])
+        request = urllib.request.Request(
+            "https://discord.com/api/v8/gateway/bot",
+            headers = {"Authorization": f"Bot {token}", "User-Agent": "DiscordBot"}
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)['shards']
+
+    def check(self):
+        """Make sure the config can safely be run across several processes."""
+        if self.settings['Processes'] > 1 and self.config['Data Settings']['Backend'] != 'sqlite':
+            raise ValueError(
+                "Running more than one process requires the 'sqlite' data backend, "
+                "otherwise every process would overwrite the same data file."
+            )
+
+    def start_worker(self, worker, shard_count):
+        env = dict(os.environ)
+        env[SHARD_COUNT_VAR] = str(shard_count)
+        env[SHARD_IDS_VAR] = ",".join(str(shard_id) for shard_id in worker.shard_ids)
+        worker.process = subprocess.Popen(worker.supervisor.command, env = env)
+        worker.started = time.monotonic()
+        worker.restart_at = None
+        worker.supervisor.log(f"Started (PID {worker.process.pid}) for shards {worker.shard_ids[0]}-{worker.shard_ids[-1]}.")
+
+    def stopped(self, worker, code):
+        """Decide what happens to a worker that exited, the same way the supervisor does."""
+        ran_for = time.monotonic() - worker.started
+        if code == RESTART_EXIT_CODE:
+            worker.supervisor.log("Restart requested, starting again.")
+            worker.supervisor.backoff.reset()
+            return 0.0
+        if code == 0:
+            worker.supervisor.log("Shut down, leaving it stopped.")
+            return None
+        if code == CONFIG_EXIT_CODE:
+            worker.supervisor.log("Can't start until the configuration is fixed (see its log), leaving it stopped.")
+            return None
+        delay = worker.supervisor.crashed(ran_for)
+        worker.supervisor.log(f"Exited with code {code} after {ran_for:.0f}s, starting again in {delay:.1f}s.")
+        return delay
+
+    def run(self):
+        """Start every worker, then restart any that stop until they have all shut down, or are interrupted."""
+        self.check()
+        shard_count = self.settings['Shard Count'] or self.recommended_shards()
+        ranges = split_shards(shard_count, self.settings['Processes'])
+
+        for index, shard_ids in enumerate(ranges):
+            self.workers[index] = Worker(index, shard_ids, self.config)
+            self.start_worker(self.workers[index], shard_count)
+
+        try:
+            while self.workers:
+                time.sleep(1)
+                for worker in list(self.workers.values()):
+                    # Waiting out a crash's delay doesn't hold up checking the other workers.
+                    if worker.restart_at is not None:
+                        if time.monotonic() >= worker.restart_at:
+                            self.start_worker(worker, shard_count)
+                        continue
+
+                    code = worker.process.poll()
+                    if code is None:
+                        continue
+                    delay = self.stopped(worker, code)
+                    if delay is None:
+                        del self.workers[worker.index]
+                    elif delay:
+                        worker.restart_at = time.monotonic() + delay
+                    else:
+                        self.start_worker(worker, shard_count)
+        except KeyboardInterrupt:
+            running = [worker.process for worker in self.workers.values() if worker.process.poll() is None]
+            for process in running:
+                process.terminate()
+            for process in running:
+                process.wait()
@@ -0,0 +1,134 @@
+"""Resource | Log Channel Sink
+
+This class sends embeds to the log channel in the background, so that
+commands never wait on the log channel (or its rate limits) to finish.
+
+Embeds are queued, then packed up to 10 at a time into a single message.
+When the queue is full, new embeds are dropped and counted instead of
+slowing down the rest of the bot.
+"""
+import asyncio
+from discord.http import Route
+
+from Resources.Outbound import LOG
+
+class LogSink:
+    # Discord allows up to 10 embeds in a single message.
+    MAX_EMBEDS = 10
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.queue = None
+        self._task = None
+        # The batch still being collected, kept so it can be sent on shutdown.
+        # Once handed to the outbound scheduler it is the scheduler's to send, and never sent again here.
+        self._batch = None
+
+        # Counters, for seeing how the sink is keeping up.
+        self.sent = 0
+        self.messages = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        """Sink | Start
+
+        Create the queue and start the background sender on the bot's loop.
+        """
+        self.queue = asyncio.Queue(maxsize = self.bot.log_queue_size)
+        self._task = self.bot.loop.create_task(self._run())
+
+    def send(self, embed):
+        """Sink | Send
+
+        Queue an embed for the log channel and return right away.
+
+        Returns `False` if the queue was full and the embed was dropped.
+        """
+        try:
+            self.queue.put_nowait(embed)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def put(self, embed):
+        """Sink | Put
+
+        Queue an embed for the log channel, waiting for room if the queue is full.
+        """
+        await self.queue.put(embed)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch = [await self.queue.get()]
+
+            # Give more embeds a moment to arrive, so they can share a message.
+            deadline = loop.time() + self.bot.log_flush_interval
+            while len(self._batch) < self.MAX_EMBEDS:
+                try:
+                    self._batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self.queue.get(), timeout = timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._batch = self._batch, None
+            # Wait for it to be sent before the next batch. `wait` leaves the request
+            # alone if this task is cancelled, so it is still sent, but only once.
+            await asyncio.wait([self._post(batch)])
+
+    def _post(self, embeds):
+        """Hand a batch of embeds to the outbound scheduler as a single message, returning its future."""
+        route = Route('POST', '/channels/{channel_id}/messages', channel_id = self.bot.log_channel_id)
+
+        async def request():
+            return await self.bot.http.request(route, json = {'embeds': [embed.to_dict() for embed in embeds]})
+
+        # Sent as the lowest priority, after any replies, edits, reactions, and deletes.
+        future = self.bot.outbound.submit(LOG, request, channel = self.bot.log_channel_id)
+        future.add_done_callback(lambda future: self._posted(embeds, future))
+        return future
+
+    def _posted(self, embeds, future):
+        """Count a batch once its request has finished."""
+        if future.cancelled():
+            # Stopped mid-request on shutdown, it may or may not have been sent.
+            self.failed += len(embeds)
+        elif future.exception() is not None:
+            self.failed += len(embeds)
+            self.bot.logger.err(f"Could not send {len(embeds)} log message(s)", error = future.exception())
+        else:
+            self.sent += len(embeds)
+            self.messages += 1
+
+    async def close(self):
+        """Sink | Close
+
+        Stop the background sender, then send everything still queued.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # A batch that was still being collected goes first, then the rest of the queue.
+        # A batch already handed to the outbound scheduler is sent by it, when it closes.
+        pending = self._batch or []
+        self._batch = None
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        posts = [self._post(pending[start:start + self.MAX_EMBEDS]) for start in range(0, len(pending), self.MAX_EMBEDS)]
+        if posts:
+            await asyncio.wait(posts)
@@ -0,0 +1,147 @@
+"""Resource | Logger
+
+This class is the bot's logging pipeline, replacing printing straight
+to the console.
+
+Log calls only put a record on a queue and return. A background thread
+formats each record and writes it out, so a slow console or pipe never
+holds up the event loop, and multi-line entries never interleave.
+
+Records can be written as readable (colored) text, or as one JSON object
+per line, to the console and optionally a rotating log file.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from colorama import Fore
+
+# The label and console color for each level.
+LEVELS = {
+    logging.DEBUG:    ("DEBUG", Fore.CYAN),
+    logging.INFO:     ("OK", Fore.GREEN),
+    logging.WARNING:  ("WARN", Fore.YELLOW),
+    logging.ERROR:    ("ERR", Fore.RED),
+    logging.CRITICAL: ("ERR", Fore.RED),
+}
+
+class CachedTimeFormatter(logging.Formatter):
+    """Base formatter which only formats the timestamp once per second.
+
+    Only ever used from the logging thread, so the cache needs no locking.
+    Any traceback has already been added to the message by the queue handler.
+    """
+    def __init__(self, time_format):
+        super().__init__()
+        self.time_format = time_format
+        self._second = None
+        self._time = None
+
+    def timestamp(self, record):
+        second = int(record.created)
+        if second != self._second:
+            self._second = second
+            self._time = time.strftime(self.time_format, time.localtime(second))
+        return self._time
+
+    @staticmethod
+    def fields(record):
+        return getattr(record, 'fields', None) or {}
+
+class HumanFormatter(CachedTimeFormatter):
+    """Formats records as readable text, with each field on its own indented line."""
+    def __init__(self, color = True):
+        super().__init__('[%m/%d/%Y | %I:%M:%S %p]')
+        self.color = color
+
+    def format(self, record):
+        label, color = LEVELS.get(record.levelno, ("LOG", Fore.RESET))
+        label = f"[{label}]"
+        if self.color:
+            label = f"{color}{label}{Fore.RESET}{' ' * (6 - len(label))}"
+        else:
+            label = label.ljust(6)
+
+        lines = [f"{label} {self.timestamp(record)} {record.getMessage()}"]
+        indent = ' ' * 35
+        for name, value in self.fields(record).items():
+            lines.append(f"{indent} {name[:1].upper()}{name[1:]}: {value}")
+        return "\n".join(lines)
+
+class JSONFormatter(CachedTimeFormatter):
+    """Formats records as a single line JSON object, with any fields as keys."""
+    def __init__(self):
+        super().__init__('%Y-%m-%dT%H:%M:%S%z')
+
+    def format(self, record):
+        entry = {
+            "time": self.timestamp(record),
+            "level": LEVELS.get(record.levelno, ("LOG", None))[0],
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(self.fields(record))
+        return json.dumps(entry, default = str)
+
+class Logger:
+    def __init__(self, bot):
+        self.logger = logging.getLogger('bot')
+        self.logger.setLevel(logging.DEBUG if bot.DEBUG else logging.INFO)
+        self.logger.propagate = False
+
+        # Everything logged is put on this queue, and written by the listener's thread.
+        self._queue = queue.SimpleQueue()
+        self._handler = logging.handlers.QueueHandler(self._queue)
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(JSONFormatter() if bot.log_format == 'json' else HumanFormatter())
+        handlers = [console]
+
+        if bot.log_file:
+            log_file = logging.handlers.RotatingFileHandler(
+                bot.log_file,
+                maxBytes = bot.log_max_bytes,
+                backupCount = bot.log_backup_count,
+                encoding = "utf-8"
+            )
+            log_file.setFormatter(JSONFormatter() if bot.log_format == 'json' else HumanFormatter(color = False))
+            handlers.append(log_file)
+
+        self._listener = logging.handlers.QueueListener(self._queue, *handlers, respect_handler_level = True)
+
+    def start(self):
+        """Logger | Start
+
+        Start the background writer, and route the bot's (and discord.py's warning) logs through it.
+        """
+        self.logger.addHandler(self._handler)
+        discord_logger = logging.getLogger('discord')
+        discord_logger.setLevel(logging.WARNING)
+        discord_logger.addHandler(self._handler)
+        self._listener.start()
+
+    def stop(self):
+        """Logger | Stop
+
+        Write out everything still queued, then stop the background writer.
+        """
+        self._listener.stop()
+        self.logger.removeHandler(self._handler)
+        logging.getLogger('discord').removeHandler(self._handler)
+
+    def log(self, level, message, **fields):
+        self.logger.log(level, message, extra = {'fields': fields})
+
+    def debug(self, message, **fields):
+        self.logger.debug(message, extra = {'fields': fields})
+
+    def ok(self, message, **fields):
+        self.logger.info(message, extra = {'fields': fields})
+
+    def warn(self, message, **fields):
+        self.logger.warning(message, extra = {'fields': fields})
+
+    def err(self, message, exc_info = None, **fields):
+        self.logger.error(message, exc_info = exc_info, extra = {'fields': fields})
@@ -0,0 +1,295 @@
+"""Resource | Menus
+
+Menus are messages with buttons, such as the restart confirmation and the
+help pages. Every open menu is handled by one `MenuManager`, instead of
+each menu running its own listener and timeout:
+
+    - Button presses are routed to their menu by message ID, with a
+      dictionary lookup, from a single listener.
+    - Timeouts are kept on a timing wheel, one task ticking once a second,
+      so opening, pressing, and closing a menu never starts or cancels a task.
+
+Menus can be sent with message buttons (components), which are sent along
+with the message in a single request, or with a reaction for each button,
+which is one more request per button. See the `Menus` section of `Config.yml`.
+
+discord.py doesn't support message components yet, so button menus are
+sent with the raw HTTP routes, and button presses are read straight from the
+gateway's interaction events.
+"""
+import asyncio
+import math
+
+import discord
+from discord.http import Route
+
+from Resources.Outbound import REPLY, EDIT
+
+# The ways a menu can be sent.
+STYLES = ('buttons', 'reactions')
+
+# Interaction and component types, from Discord's API.
+COMPONENT_INTERACTION = 3
+ACTION_ROW = 1
+BUTTON = 2
+# Interaction responses: acknowledge without changing anything, or update the menu's message.
+DEFERRED_UPDATE = 6
+UPDATE_MESSAGE = 7
+
+class Button:
+    """A menu button, which runs `action` when pressed."""
+    __slots__ = ('emoji', 'label', 'action', 'style')
+
+    # Button colors, from Discord's API.
+    GREY = 2
+    GREEN = 3
+    RED = 4
+
+    def __init__(self, emoji, label, action, style = GREY):
+        self.emoji = emoji
+        self.label = label
+        # Returns the menu's next embed, or `None` to leave the message as it is.
+        self.action = action
+        self.style = style
+
+    def to_component(self, custom_id):
+        return {'type': BUTTON, 'style': self.style, 'label': self.label, 'emoji': {'name': self.emoji}, 'custom_id': custom_id}
+
+class Menu:
+    """A message with buttons, only usable by the author of the command that opened it.
+
+    Subclasses set up `buttons` and return the first embed from `initial_embed`.
+    The message is deleted once the menu stops or times out.
+    """
+    def __init__(self, timeout = None):
+        # Seconds without a button press before the menu closes, defaults to the config's timeout.
+        self.timeout = timeout
+        self.buttons = []
+        self.result = None
+
+        self.ctx = None
+        self.message = None
+        self.manager = None
+        self._done = None
+        # The timing wheel tick and slot the menu times out at.
+        self._deadline = 0
+        self._slot = None
+
+    def initial_embed(self):
+        raise NotImplementedError
+
+    async def start(self, ctx, wait = False):
+        """Menu | Start
+
+        Send the menu, waiting until it has closed if `wait` is true.
+        """
+        await ctx.bot.menu_manager.open(self, ctx)
+        if wait:
+            await self._done
+
+    def stop(self):
+        """Close the menu, deleting its message."""
+        self.manager.close(self)
+
+class Confirmation(Menu):
+    def __init__(self, title = None, msg = None):
+        super().__init__()
+        self.msg = msg
+        self.title = title
+        self.buttons = [
+            Button('\N{WHITE HEAVY CHECK MARK}', "Confirm", self.do_confirm, Button.GREEN),
+            Button('\N{CROSS MARK}', "Cancel", self.do_deny, Button.RED),
+        ]
+
+    def initial_embed(self):
+        return self.ctx.bot.embed_util.get_embed(
+            title = self.title,
+            desc = self.msg
+        )
+
+    async def do_confirm(self):
+        self.result = True
+        self.stop()
+
+    async def do_deny(self):
+        self.result = False
+        self.stop()
+
+    async def prompt(self, ctx):
+        """Ask for confirmation, returning `True` if confirmed, or a falsy value if cancelled or timed out."""
+        await self.start(ctx, wait = True)
+        return self.result
+
+class Pages(Menu):
+    """A menu for flipping through pages, built by `format_page(index)` when shown."""
+    def __init__(self, page_count, format_page, timeout = None):
+        super().__init__(timeout = timeout)
+        self.page_count = page_count
+        self.format_page = format_page
+        self.current_page = 0
+
+        if page_count > 2:
+            self.buttons.append(Button('\N{BLACK LEFT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}\ufe0f', "First", self.first))
+        if page_count > 1:
+            self.buttons.append(Button('\N{BLACK LEFT-POINTING TRIANGLE}\ufe0f', "Back", self.back))
+            self.buttons.append(Button('\N{BLACK RIGHT-POINTING TRIANGLE}\ufe0f', "Next", self.next))
+        if page_count > 2:
+            self.buttons.append(Button('\N{BLACK RIGHT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}\ufe0f', "Last", self.last))
+        self.buttons.append(Button('\N{BLACK SQUARE FOR STOP}\ufe0f', "Close", self.close, Button.RED))
+
+    def initial_embed(self):
+        return self.format_page(0)
+
+    def _show(self, index):
+        if index == self.current_page or not 0 <= index < self.page_count:
+            return None
+        self.current_page = index
+        return self.format_page(index)
+
+    async def first(self):
+        return self._show(0)
+
+    async def back(self):
+        return self._show(self.current_page - 1)
+
+    async def next(self):
+        return self._show(self.current_page + 1)
+
+    async def last(self):
+        return self._show(self.page_count - 1)
+
+    async def close(self):
+        self.stop()
+
+class MenuManager:
+    # Seconds between timing wheel ticks, timeouts are rounded up to a whole tick.
+    TICK = 1.0
+    # Slots on the wheel, menus with longer timeouts go around it more than once.
+    SLOTS = 64
+
+    def __init__(self, bot):
+        self.bot = bot
+
+        # message ID -> open menu
+        self.sessions = {}
+        self._wheel = [set() for _ in range(self.SLOTS)]
+        self._tick = 0
+        self._task = None
+
+    def start(self):
+        """Menus | Start
+
+        Listen for button presses and reactions, and start the timing wheel.
+        """
+        # Interactions go straight to a parser, rather than a `socket_response` listener
+        # that would start a task for every gateway event.
+        self.bot._connection.parsers['INTERACTION_CREATE'] = self._parse_interaction
+        self.bot.add_listener(self.on_raw_reaction, 'on_raw_reaction_add')
+        self.bot.add_listener(self.on_raw_reaction, 'on_raw_reaction_remove')
+        self._task = self.bot.loop.create_task(self._turn())
+
+    async def open(self, menu, ctx):
+        """Menus | Open
+
+        Send a menu, in the configured style, and start routing its buttons to it.
+        """
+        menu.ctx = ctx
+        menu.manager = self
+        menu._done = self.bot.loop.create_future()
+        if menu.timeout is None:
+            menu.timeout = self.bot.menu_timeout
+        embed = menu.initial_embed()
+
+        if self.bot.menu_style == 'buttons':
+            route = Route('POST', '/channels/{channel_id}/messages', channel_id = ctx.channel.id)
+            payload = {'embed': embed.to_dict(), 'components': self._components(menu)}
+            data = await self.bot.outbound.submit(REPLY, lambda: self.bot.http.request(route, json = payload), channel = ctx.channel.id)
+            menu.message = discord.Message(state = self.bot._connection, channel = ctx.channel, data = data)
+        else:
+            menu.message = await self.bot.outbound.send(ctx, embed = embed)
+            # The menu can be used before every reaction has been added, and nothing waits on them.
+            for button in menu.buttons:
+                self.bot.outbound.add_reaction(menu.message, button.emoji, quiet = True)
+
+        self.sessions[menu.message.id] = menu
+        self._schedule(menu)
+
+    def close(self, menu):
+        """Menus | Close
+
+        Stop routing buttons to a menu, and delete its message.
+        """
+        if self.sessions.pop(menu.message.id, None) is None:
+            return
+        self._wheel[menu._slot].discard(menu)
+        self.bot.outbound.delete(menu.message)
+        if not menu._done.done():
+            menu._done.set_result(menu.result)
+
+    def _components(self, menu):
+        # Buttons are identified by their position, up to 5 fit in a row.
+        buttons = [button.to_component(str(index)) for index, button in enumerate(menu.buttons)]
+        return [{'type': ACTION_ROW, 'components': buttons[start:start + 5]} for start in range(0, len(buttons), 5)]
+
+    def _parse_interaction(self, data):
+        """Called by discord.py for every interaction event, with the raw event data."""
+        if data.get('type') != COMPONENT_INTERACTION or 'message' not in data:
+            return
+        menu = self.sessions.get(int(data['message']['id']))
+        if menu is None:
+            return
+        # Interactions in a server come with the member, in a DM with the user.
+        user_id = int((data.get('member') or data)['user']['id'])
+        try:
+            button = menu.buttons[int(data['data']['custom_id'])]
+        except (KeyError, ValueError, IndexError):
+            button = None
+        self.bot.loop.create_task(self._press(menu, button, user_id, (data['id'], data['token'])))
+
+    async def on_raw_reaction(self, payload):
+        menu = self.sessions.get(payload.message_id)
+        if menu is None or payload.user_id == self.bot.user.id:
+            return
+        emoji = str(payload.emoji)
+        button = next((button for button in menu.buttons if button.emoji == emoji), None)
+        if button is not None:
+            await self._press(menu, button, payload.user_id)
+
+    async def _press(self, menu, button, user_id, interaction = None):
+        embed = None
+        # Only the author of the command can use the menu.
+        if button is not None and user_id == menu.ctx.author.id and menu.message.id in self.sessions:
+            self._schedule(menu)
+            embed = await button.action()
+            if menu.message.id not in self.sessions:
+                # The button closed the menu, and its message is being deleted.
+                embed = None
+
+        if interaction is not None:
+            # Every interaction has to be answered, with the new page if there is one.
+            if embed is not None:
+                response = {'type': UPDATE_MESSAGE, 'data': {'embeds': [embed.to_dict()], 'components': self._components(menu)}}
+            else:
+                response = {'type': DEFERRED_UPDATE}
+            interaction_id, token = interaction
+            route = Route('POST', '/interactions/{interaction_id}/{token}/callback', interaction_id = interaction_id, token = token)
+            await self.bot.outbound.submit(EDIT, lambda: self.bot.http.request(route, json = response))
+        elif embed is not None:
+            await self.bot.outbound.edit(menu.message, embed = embed)
+
+    def _schedule(self, menu):
+        """Put a menu on the wheel, timing out `timeout` seconds from now."""
+        if menu._slot is not None:
+            self._wheel[menu._slot].discard(menu)
+        menu._deadline = self._tick + max(1, math.ceil(menu.timeout / self.TICK))
+        menu._slot = menu._deadline % self.SLOTS
+        self._wheel[menu._slot].add(menu)
+
+    async def _turn(self):
+        while True:
+            await asyncio.sleep(self.TICK)
+            self._tick += 1
+            # Menus in this slot that still have another trip around the wheel are left for later.
+            expired = [menu for menu in self._wheel[self._tick % self.SLOTS] if menu._deadline <= self._tick]
+            for menu in expired:
+                self.close(menu)
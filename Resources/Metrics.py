@@ -0,0 +1,298 @@
+"""Resource | Metrics
+
+This class keeps running metrics for the bot, and serves them over HTTP in
+the Prometheus text format for graphing and alerting.
+
+Recorded:
+    - Invocations, failures, and a latency histogram for each command,
+      timed from the `before_invoke` hook to the `after_invoke` hook.
+    - Command errors by type.
+    - How long the global permission check takes.
+    - Messages passed on as commands or filtered out, counted by the prefilter.
+    - Time taken and errors raised by each routed message handler.
+    - Offloaded calls in flight and queued, their outcomes and time taken, for each pool.
+    - Event loop lag, measured by the watchdog's heartbeat (see `Resources/Watchdog.py`).
+    - Gateway latency, read when the metrics are collected.
+    - REST calls by method and outcome, and how long they take including
+      any rate limit waits, by wrapping the bot's HTTP client.
+
+Everything is a plain counter or a histogram with fixed buckets, set up
+ahead of time, so recording a value is a few additions and a bisect.
+"""
+import time
+from bisect import bisect_left
+
+import discord
+from aiohttp import web
+
+from Resources.RateLimit import RateLimited
+
+# Histogram bucket upper bounds, in seconds.
+COMMAND_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PERMISSION_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.001)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# REST calls wait out rate limits inside of the request, so these go on for longer.
+REST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Counts values into fixed buckets, along with their count and sum."""
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # One count per bucket, plus one for anything over the last bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate a quantile, as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            if total >= target:
+                return bound
+        return float('inf')
+
+class CommandStats:
+    """The metrics for a single command."""
+    __slots__ = ('invocations', 'failures', 'latency')
+
+    def __init__(self):
+        self.invocations = 0
+        self.failures = 0
+        self.latency = Histogram(COMMAND_BUCKETS)
+
+class Metrics:
+    def __init__(self, bot):
+        self.bot = bot
+        self.started = time.time()
+
+        # command qualified name -> CommandStats
+        self.commands = {}
+        # error type name -> count
+        self.errors = {}
+        self.permission_checks = Histogram(PERMISSION_BUCKETS)
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self.last_lag = 0.0
+        # (method, outcome) -> count, the outcome is "ok", "error", "cancelled", or the status of an HTTP error.
+        self.rest_calls = {}
+        self.rest_latency = Histogram(REST_BUCKETS)
+
+        self._runner = None
+
+    def prepare(self):
+        """Metrics | Prepare
+
+        Set up the stats for every loaded command ahead of time.
+        """
+        for command in self.bot.walk_commands():
+            if command.qualified_name not in self.commands:
+                self.commands[command.qualified_name] = CommandStats()
+
+    def start(self):
+        """Metrics | Start
+
+        Hook into command errors and the bot's HTTP client, then start the
+        metrics endpoint if it is turned on.
+
+        `before_invoke` and `after_invoke` are called by the bot's invoke hooks.
+        """
+        self.prepare()
+        self.bot.add_listener(self.on_command_error, 'on_command_error')
+
+        self.instrument(self.bot.http)
+
+        if self.bot.metrics_endpoint:
+            self.bot.loop.create_task(self._serve())
+
+    def instrument(self, http):
+        """Metrics | Instrument
+
+        Wrap an HTTP client's `request`, which every REST call goes through,
+        to count and time each call.
+        """
+        request = http.request
+        rest_calls = self.rest_calls
+        latency = self.rest_latency
+
+        async def counted(route, **kwargs):
+            start = time.perf_counter()
+            # Anything that isn't an exception and doesn't finish was cancelled.
+            outcome = "cancelled"
+            try:
+                result = await request(route, **kwargs)
+                outcome = "ok"
+                return result
+            except discord.HTTPException as e:
+                # Including a 429 that discord.py gave up retrying.
+                outcome = e.status
+                raise
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                key = (route.method, outcome)
+                rest_calls[key] = rest_calls.get(key, 0) + 1
+                latency.observe(time.perf_counter() - start)
+
+        http.request = counted
+
+    def before_invoke(self, ctx):
+        ctx.invoke_start = time.perf_counter()
+
+    def after_invoke(self, ctx):
+        elapsed = time.perf_counter() - ctx.invoke_start
+        name = ctx.command.qualified_name
+        stats = self.commands.get(name)
+        if stats is None:
+            # A command added after `prepare`, e.g. from a lazy extension.
+            stats = self.commands[name] = CommandStats()
+        stats.invocations += 1
+        if ctx.command_failed:
+            stats.failures += 1
+        stats.latency.observe(elapsed)
+
+    async def on_command_error(self, ctx, error):
+        name = type(error).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+        # Rate limited commands are expected, and already answered by the rate limiter if at all.
+        if isinstance(error, RateLimited):
+            return
+
+        # discord.py only prints errors itself when nothing else listens for them.
+        # Keep that behavior in DEBUG mode, when the error handler cog isn't loaded.
+        if 'Cogs.Errors' not in self.bot.extensions and not hasattr(ctx.command, 'on_error'):
+            self.bot.logger.err(
+                f"Ignoring exception in command {ctx.command}",
+                exc_info = (type(error), error, error.__traceback__)
+            )
+
+    async def _serve(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log = None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.bot.metrics_host, self.bot.metrics_port).start()
+        except OSError as e:
+            self.bot.logger.err("Could not start the metrics endpoint", error = e)
+            return
+        self.bot.logger.ok(f"Serving metrics on http://{self.bot.metrics_host}:{self.bot.metrics_port}/metrics")
+
+    async def _handle(self, request):
+        return web.Response(text = self.render(), content_type = 'text/plain', charset = 'utf-8')
+
+    def render(self):
+        """Metrics | Render
+
+        Write every metric in the Prometheus text exposition format.
+        """
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, hist, labels = ""):
+            cumulative = 0
+            for bound, count in zip(hist.bounds, hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {hist.count}')
+            label_set = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{name}_count{label_set} {hist.count}")
+            lines.append(f"{name}_sum{label_set} {hist.sum}")
+
+        commands = sorted(self.commands.items())
+
+        metric("bot_command_invocations_total", "counter", "Commands invoked.")
+        for name, stats in commands:
+            lines.append(f'bot_command_invocations_total{{command="{escape(name)}"}} {stats.invocations}')
+
+        metric("bot_command_failures_total", "counter", "Commands that raised an error while running.")
+        for name, stats in commands:
+            lines.append(f'bot_command_failures_total{{command="{escape(name)}"}} {stats.failures}')
+
+        metric("bot_command_latency_seconds", "histogram", "Time from before_invoke to after_invoke.")
+        for name, stats in commands:
+            histogram("bot_command_latency_seconds", stats.latency, f'command="{escape(name)}",')
+
+        metric("bot_command_errors_total", "counter", "Command errors by type.")
+        for name, count in sorted(self.errors.items()):
+            lines.append(f'bot_command_errors_total{{error="{escape(name)}"}} {count}')
+
+        metric("bot_messages_total", "counter", "Messages seen, by whether the prefilter passed them on as commands or why it didn't.")
+        for result, count in self.bot.message_filter.counts.items():
+            lines.append(f'bot_messages_total{{result="{result}"}} {count}')
+
+        handlers = sorted(self.bot.router.handlers, key = lambda handler: handler.name)
+        metric("bot_message_handler_seconds", "histogram", "Time taken by each routed message handler.")
+        for handler in handlers:
+            histogram("bot_message_handler_seconds", handler.latency, f'handler="{escape(handler.name)}",')
+
+        metric("bot_message_handler_errors_total", "counter", "Errors raised by each routed message handler.")
+        for handler in handlers:
+            lines.append(f'bot_message_handler_errors_total{{handler="{escape(handler.name)}"}} {handler.errors}')
+
+        metric("bot_permission_check_seconds", "histogram", "Time taken by the global permission check.")
+        histogram("bot_permission_check_seconds", self.permission_checks)
+
+        metric("bot_loop_lag_seconds", "histogram", "How late the event loop woke up from a sleep.")
+        histogram("bot_loop_lag_seconds", self.loop_lag)
+
+        metric("bot_gateway_latency_seconds", "gauge", "Time between a gateway heartbeat and its acknowledgement.")
+        latency = self.bot.latency
+        lines.append(f"bot_gateway_latency_seconds {latency if latency == latency else 0.0}")
+
+        metric("bot_rest_requests_total", "counter", "REST calls made to Discord, by method and outcome.")
+        for (method, outcome), count in sorted(self.rest_calls.items(), key = lambda item: (item[0][0], str(item[0][1]))):
+            lines.append(f'bot_rest_requests_total{{method="{method}",outcome="{outcome}"}} {count}')
+
+        metric("bot_rest_request_seconds", "histogram", "Time taken by REST calls, including any rate limit waits.")
+        histogram("bot_rest_request_seconds", self.rest_latency)
+
+        offload = sorted(self.bot.offloader.stats.items())
+        metric("bot_offload_in_flight", "gauge", "Offloaded calls submitted and not finished, by pool.")
+        for mode, stats in offload:
+            lines.append(f'bot_offload_in_flight{{pool="{mode}"}} {stats.in_flight}')
+
+        metric("bot_offload_queued", "gauge", "Offloaded calls waiting for a free worker, by pool.")
+        for mode, stats in offload:
+            lines.append(f'bot_offload_queued{{pool="{mode}"}} {stats.queued}')
+
+        metric("bot_offload_calls_total", "counter", "Offloaded calls by pool and outcome.")
+        for mode, stats in offload:
+            for outcome, count in (("all", stats.calls), ("timeout", stats.timeouts), ("cancelled", stats.cancelled), ("error", stats.errors)):
+                lines.append(f'bot_offload_calls_total{{pool="{mode}",outcome="{outcome}"}} {count}')
+
+        metric("bot_offload_seconds", "histogram", "Time from submitting an offloaded call to its result, by pool.")
+        for mode, stats in offload:
+            histogram("bot_offload_seconds", stats.latency, f'pool="{mode}",')
+
+        metric("bot_uptime_seconds", "gauge", "Seconds since the metrics started.")
+        lines.append(f"bot_uptime_seconds {time.time() - self.started}")
+
+        return "\n".join(lines) + "\n"
+
+    async def close(self):
+        """Metrics | Close
+
+        Stop the metrics endpoint.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+def escape(value):
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,130 @@
+"""Resource | Offloader
+
+Runs slow, CPU heavy work (image generation, parsing, crunching through
+`bot.data`) away from the event loop, so it never holds up gateway
+heartbeats or other commands. Commands call it as `bot.offload`:
+
+    result = await self.bot.offload(render_chart, points)
+    result = await self.bot.offload(resize, image_bytes, thread = True, timeout = 5)
+
+Two pools, sized in the `Offload` section of `Config.yml`:
+    Processes (the default) - For pure Python work, which a thread can't
+        run in parallel with the loop. The function must be defined at the
+        top level of a module, and it and its arguments (and its result) must
+        be picklable, since they are sent to another process.
+    Threads (`thread = True`) - For work that releases the GIL, such as
+        most file, compression, and image libraries. Anything can be passed.
+
+The worker processes are started along with the bot, so the first call
+doesn't pay for starting them.
+
+Each call has a timeout (the config's by default, `timeout = None` for
+none at all), and cancelling the command that made it (e.g. the bot closing) cancels it too. Work that has
+already started in a process runs to completion, but nothing waits for it.
+"""
+import asyncio
+import functools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from Resources.Metrics import Histogram, COMMAND_BUCKETS
+
+# The default for `Offloader.run`'s timeout, standing in for the config's `Timeout`,
+# since `None` already means no timeout.
+DEFAULT = object()
+
+def _warm():
+    """Run once in each worker process while the bot starts, so the process is ready to go."""
+    return None
+
+class OffloadStats:
+    """The metrics for one of the pools."""
+    __slots__ = ('workers', 'in_flight', 'calls', 'timeouts', 'cancelled', 'errors', 'latency')
+
+    def __init__(self, workers):
+        self.workers = workers
+        # Submitted and not finished yet, whether running or waiting for a worker.
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.latency = Histogram(COMMAND_BUCKETS)
+
+    @property
+    def queued(self):
+        """Calls waiting for a free worker."""
+        return max(0, self.in_flight - self.workers)
+
+class Offloader:
+    def __init__(self, bot):
+        self.bot = bot
+        self.timeout = bot.offload_timeout
+
+        processes = bot.offload_processes or multiprocessing.cpu_count()
+        # Worker processes are spawned rather than forked, a fork would copy the
+        # bot's threads and open connections into every worker.
+        self._processes = ProcessPoolExecutor(max_workers = processes, mp_context = multiprocessing.get_context('spawn'))
+        self._threads = ThreadPoolExecutor(max_workers = bot.offload_threads, thread_name_prefix = "offload")
+
+        self.stats = {
+            'process': OffloadStats(processes),
+            'thread': OffloadStats(bot.offload_threads),
+        }
+
+    def start(self):
+        """Offload | Start
+
+        Start every worker process now, rather than on the first call.
+        """
+        for _ in range(self.stats['process'].workers):
+            self._processes.submit(_warm)
+
+    async def run(self, function, *args, thread = False, timeout = DEFAULT, **kwargs):
+        """Offload | Run
+
+        Run `function(*args, **kwargs)` in a worker process (or thread), returning its result.
+
+        Parameters:
+            - function (:class:`Callable`) -
+                The function to run, defined at the top level of a module when run in a process.
+            - thread (:class:`bool`) -
+                Run it in a thread instead, for work that releases the GIL.
+            - timeout (:class:`float`) -
+                Seconds to wait before raising `asyncio.TimeoutError`, defaults to the config's `Timeout`.
+                `None` waits as long as it takes, whatever the config says.
+        """
+        stats = self.stats['thread' if thread else 'process']
+        executor = self._threads if thread else self._processes
+        if timeout is DEFAULT:
+            timeout = self.timeout
+
+        stats.calls += 1
+        stats.in_flight += 1
+        start = time.perf_counter()
+        future = executor.submit(functools.partial(function, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout = timeout)
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise
+        except asyncio.CancelledError:
+            # Only drops the call if it hasn't started yet, a running call can't be interrupted.
+            future.cancel()
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.latency.observe(time.perf_counter() - start)
+
+    def close(self):
+        """Offload | Close
+
+        Shut both pools down, dropping anything that hasn't started.
+        """
+        self._processes.shutdown(wait = False, cancel_futures = True)
+        self._threads.shutdown(wait = False, cancel_futures = True)
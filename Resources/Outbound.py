@@ -0,0 +1,362 @@
+"""Resource | Outbound Scheduler
+
+Every message the bot sends, edits, reacts to, or deletes goes through
+this class, instead of each cog calling discord.py directly, so that
+traffic users are waiting on always goes first.
+
+Each request gets a priority class:
+    REPLY > EDIT > REACTION, the foreground lane, which users see.
+    DELETE > LOG, the background lane, which nobody is waiting on.
+
+Requests run in priority order (first come first served within a class),
+with a limit on how many of each lane run at once. Background requests
+only start while no foreground requests are waiting, and have a lane of
+their own, so a burst of deletes or log messages (and the rate limits they
+hit) never holds up a reply.
+
+discord.py waits out rate limits inside of the request, so a request stuck
+behind its channel's rate limit would keep holding a place in its lane.
+Only a few requests for each channel run at once (`Channel Limit`), the
+rest wait outside of the lanes, so a busy channel can't hold up the others.
+
+Edits to the same message that haven't started yet are merged into one,
+since only the last version would be seen anyway.
+
+Deletes are collected per channel for a moment (`Delete Delay`, or until
+there are 100 of them) and while they wait for their turn, then sent
+together with the bulk delete endpoint (up to 100 messages a call). Discord only bulk
+deletes messages newer than 14 days, older ones are deleted one at a time.
+With 'Delete Commands' on, the messages that invoked commands are deleted
+this way after the command has replied (see `delete_invocation`).
+"""
+import asyncio
+import datetime
+import heapq
+import itertools
+
+import discord
+from discord.ext import commands
+
+from Resources.RateLimit import RateLimited
+
+# Priority classes, lower runs first.
+REPLY = 0
+EDIT = 1
+REACTION = 2
+DELETE = 3
+LOG = 4
+
+# The first background priority class.
+BACKGROUND = DELETE
+
+# Discord only bulk deletes messages newer than this, with a minute spare for clock drift.
+BULK_DELETE_AGE = datetime.timedelta(days = 14, minutes = -1)
+# The most messages deleted in a single bulk delete call.
+BULK_DELETE_LIMIT = 100
+
+def delete_invocation(command):
+    """Delete the message that invoked this command after it has run, when 'Delete Commands' is on.
+
+    Goes above or below the command decorator.
+    """
+    callback = command.callback if isinstance(command, commands.Command) else command
+    callback.__delete_invocation__ = True
+    return command
+
+def channel_key(destination):
+    """The channel a request goes to, for anything discord.py can send to."""
+    # A context sends to its channel, anything else (a channel, or a user for a DM) is its own key.
+    return getattr(getattr(destination, 'channel', destination), 'id', None)
+
+class Job:
+    __slots__ = ('priority', 'order', 'run', 'future', 'kwargs', 'quiet', 'channel')
+
+    def __init__(self, priority, order, run, future, kwargs = None, quiet = False, channel = None):
+        self.priority = priority
+        self.order = order
+        self.run = run
+        self.future = future
+        self.kwargs = kwargs
+        # Failures are logged instead of raised, for requests nothing waits on.
+        self.quiet = quiet
+        # The channel ID the request counts against, `None` for requests that aren't limited by channel.
+        self.channel = channel
+
+    def __lt__(self, other):
+        return (self.priority, self.order) < (other.priority, other.order)
+
+class Outbound:
+    def __init__(self, bot):
+        self.bot = bot
+        self.foreground_limit = bot.outbound_foreground
+        self.background_limit = bot.outbound_background
+        self.channel_limit = bot.outbound_channel_limit
+        self.delete_delay = bot.outbound_delete_delay
+
+        self._foreground = []
+        self._background = []
+        self._foreground_running = 0
+        self._background_running = 0
+        self._order = itertools.count()
+        # channel ID -> requests running for it.
+        self._channel_running = {}
+        # channel ID -> requests waiting for one of the channel's requests to finish, in priority order.
+        self._parked = {}
+        # message ID -> the edit job for it that hasn't started yet.
+        self._edits = {}
+
+        # channel ID -> the IDs of messages waiting to be deleted there, and the future for that batch.
+        self._deletes = {}
+        self._delete_futures = {}
+        # channel ID -> the timer that sends its batch, until it has been sent.
+        self._delete_timers = {}
+
+        # Counters, for seeing how the scheduler is keeping up.
+        self.completed = [0] * (LOG + 1)
+        self.coalesced = 0
+        self.failed = 0
+        self.deleted = 0
+        self.bulk_deletes = 0
+
+    def start(self):
+        """Outbound | Start
+
+        Listen for commands finishing, to delete the messages that invoked them.
+        """
+        self.bot.add_listener(self.on_command_completion, 'on_command_completion')
+        self.bot.add_listener(self.on_command_error, 'on_command_error')
+
+    async def on_command_completion(self, ctx):
+        if self.bot.delete_commands and getattr(ctx.command.callback, '__delete_invocation__', False):
+            self.delete(ctx.message)
+
+    async def on_command_error(self, ctx, error):
+        # Any message that failed as a command is deleted, including ones that weren't a command at all.
+        # Rate limited commands are left alone, so spam never costs a request.
+        if self.bot.delete_commands and not isinstance(error, RateLimited):
+            self.delete(ctx.message)
+
+    def submit(self, priority, run, quiet = False, channel = None):
+        """Outbound | Submit
+
+        Queue a request, returning a future for its result.
+
+        Parameters:
+            - priority (:class:`int`) -
+                The priority class, e.g. `REPLY` or `LOG`.
+            - run (:class:`Callable`) -
+                A function that returns the coroutine making the request, called once it is the request's turn.
+            - quiet (:class:`bool`) -
+                Log a failure instead of setting it on the future, for requests nothing waits on.
+            - channel (:class:`int`) -
+                The ID of the channel the request goes to, limiting how many run for it at once.
+        """
+        future = self.bot.loop.create_future()
+        self._push(Job(priority, next(self._order), run, future, quiet = quiet, channel = channel))
+        return future
+
+    def _push(self, job):
+        heapq.heappush(self._background if job.priority >= BACKGROUND else self._foreground, job)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Start as many queued requests as the lane limits allow."""
+        while self._foreground and self._foreground_running < self.foreground_limit:
+            self._start_or_park(heapq.heappop(self._foreground))
+        # Background requests wait until nothing in the foreground is.
+        while self._background and not self._foreground and self._background_running < self.background_limit:
+            self._start_or_park(heapq.heappop(self._background))
+
+    def _start_or_park(self, job):
+        # A request for a channel that already has enough running waits outside of the lane,
+        # where it can't take a place from requests for other channels.
+        if job.channel is not None and self._channel_running.get(job.channel, 0) >= self.channel_limit:
+            heapq.heappush(self._parked.setdefault(job.channel, []), job)
+        else:
+            self._start(job)
+
+    def _start(self, job):
+        if job.kwargs is not None:
+            # Any edit after this one is a new change, which can't be merged into a request already sent.
+            self._edits.pop(job.kwargs['message'].id, None)
+
+        if job.priority >= BACKGROUND:
+            self._background_running += 1
+        else:
+            self._foreground_running += 1
+        if job.channel is not None:
+            self._channel_running[job.channel] = self._channel_running.get(job.channel, 0) + 1
+        task = self.bot.loop.create_task(job.run())
+        task.add_done_callback(lambda task: self._finished(job, task))
+
+    def _finished(self, job, task):
+        if job.priority >= BACKGROUND:
+            self._background_running -= 1
+        else:
+            self._foreground_running -= 1
+        if job.channel is not None:
+            self._release(job.channel)
+
+        if task.cancelled():
+            job.future.cancel()
+        elif task.exception() is not None:
+            self.failed += 1
+            if job.quiet:
+                self.bot.logger.warn("Outbound request failed", error = task.exception())
+                job.future.set_result(None)
+            elif not job.future.done():
+                job.future.set_exception(task.exception())
+        else:
+            self.completed[job.priority] += 1
+            if not job.future.done():
+                job.future.set_result(task.result())
+        self._dispatch()
+
+    def _release(self, channel):
+        """Free up a channel's place, moving its next waiting request back into its lane."""
+        running = self._channel_running[channel] - 1
+        if running:
+            self._channel_running[channel] = running
+        else:
+            del self._channel_running[channel]
+
+        parked = self._parked.get(channel)
+        if parked:
+            job = heapq.heappop(parked)
+            if not parked:
+                del self._parked[channel]
+            heapq.heappush(self._background if job.priority >= BACKGROUND else self._foreground, job)
+
+    def send(self, destination, **kwargs):
+        """Outbound | Send
+
+        Send a message (a reply), returning a future for the sent message.
+
+        `destination` is anything discord.py can send to, e.g. a context or channel,
+        and the keyword arguments are the same as `destination.send`.
+        """
+        return self.submit(REPLY, lambda: destination.send(**kwargs), channel = channel_key(destination))
+
+    def edit(self, message, **kwargs):
+        """Outbound | Edit
+
+        Edit a message, returning a future for the edited message.
+
+        If an edit to the same message is still waiting, the changes are merged
+        into it instead, and both callers get the same future.
+        """
+        pending = self._edits.get(message.id)
+        if pending is not None:
+            pending.kwargs.update(kwargs)
+            self.coalesced += 1
+            return pending.future
+
+        future = self.bot.loop.create_future()
+        job = Job(EDIT, next(self._order), None, future, kwargs = dict(kwargs, message = message), channel = message.channel.id)
+        # The merged changes are read when the edit starts.
+        job.run = lambda: message.edit(**{name: value for name, value in job.kwargs.items() if name != 'message'})
+        self._edits[message.id] = job
+        self._push(job)
+        return future
+
+    def add_reaction(self, message, emoji, quiet = False):
+        """Outbound | Add Reaction
+
+        React to a message, returning a future that is done once the reaction is added.
+
+        With `quiet`, a failure (e.g. the message was already deleted) is logged instead
+        of raised, for reactions nothing waits on.
+        """
+        return self.submit(REACTION, lambda: message.add_reaction(emoji), quiet = quiet, channel = message.channel.id)
+
+    def delete(self, message, delay = None):
+        """Outbound | Delete
+
+        Delete a message in the background, returning a future that is done once it is deleted.
+
+        The message joins any deletes still waiting in its channel, which are sent together.
+        Failures (e.g. the message was already deleted) are logged, nothing needs to wait on the result.
+        """
+        if delay:
+            future = self.bot.loop.create_future()
+
+            def later():
+                self.delete(message).add_done_callback(lambda batch: future.done() or future.set_result(None))
+            self.bot.loop.call_later(delay, later)
+            return future
+
+        channel_id = message.channel.id
+        batch = self._deletes.get(channel_id)
+        if batch is None:
+            batch = self._deletes[channel_id] = {}
+            self._delete_futures[channel_id] = self.bot.loop.create_future()
+            # Give more deletes in the channel a moment to arrive, so they can share a bulk delete.
+            self._delete_timers[channel_id] = self.bot.loop.call_later(self.delete_delay, self._flush_deletes, channel_id)
+        # A dictionary keeps the order the deletes came in, and drops repeats.
+        batch[message.id] = None
+        future = self._delete_futures[channel_id]
+        # A full bulk delete has nothing to wait for.
+        if len(batch) >= BULK_DELETE_LIMIT and channel_id in self._delete_timers:
+            self._flush_deletes(channel_id)
+        return future
+
+    def _flush_deletes(self, channel_id):
+        """Queue the request for a channel's batch of deletes, which takes whatever has been added by the time it starts."""
+        self._delete_timers.pop(channel_id).cancel()
+        future = self._delete_futures[channel_id]
+        job = self.submit(DELETE, lambda: self._delete(channel_id), quiet = True, channel = channel_id)
+        job.add_done_callback(lambda job: future.done() or future.set_result(None))
+
+    async def _delete(self, channel_id):
+        # Taken once the request starts, anything deleted in the channel after this goes in the next batch.
+        message_ids = list(self._deletes.pop(channel_id))
+        del self._delete_futures[channel_id]
+
+        cutoff = discord.utils.time_snowflake(datetime.datetime.utcnow() - BULK_DELETE_AGE)
+        recent = [message_id for message_id in message_ids if message_id > cutoff]
+        single = [message_id for message_id in message_ids if message_id <= cutoff]
+
+        for index in range(0, len(recent), BULK_DELETE_LIMIT):
+            chunk = recent[index:index + BULK_DELETE_LIMIT]
+            # The bulk endpoint needs at least 2 messages.
+            if len(chunk) == 1:
+                single.extend(chunk)
+                continue
+            try:
+                await self.bot.http.delete_messages(channel_id, chunk)
+                self.bulk_deletes += 1
+                self.deleted += len(chunk)
+            except discord.HTTPException as e:
+                # e.g. one of them was already deleted, or became too old while waiting.
+                self.bot.logger.warn(f"Bulk delete of {len(chunk)} messages failed, deleting them one at a time.", error = e)
+                single.extend(chunk)
+
+        for message_id in single:
+            try:
+                await self.bot.http.delete_message(channel_id, message_id)
+                self.deleted += 1
+            except discord.NotFound:
+                # Already gone, which is what was wanted.
+                pass
+            except discord.HTTPException as e:
+                self.failed += 1
+                self.bot.logger.warn("Could not delete a message", channel = channel_id, message = message_id, error = e)
+
+    @property
+    def pending(self):
+        """How many requests are waiting to start."""
+        return len(self._foreground) + len(self._background) + sum(len(parked) for parked in self._parked.values())
+
+    async def close(self, timeout = 10):
+        """Outbound | Close
+
+        Wait (up to `timeout` seconds) for every queued and running request to finish.
+        """
+        # Deletes still collecting in a channel are sent right away.
+        for channel_id in list(self._delete_timers):
+            self._flush_deletes(channel_id)
+
+        loop = self.bot.loop
+        deadline = loop.time() + timeout
+        while (self.pending or self._foreground_running or self._background_running) and loop.time() < deadline:
+            await asyncio.sleep(0.05)
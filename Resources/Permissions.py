@@ -0,0 +1,158 @@
+"""Resource | Permission Index
+
+This class holds the compiled command permissions, so that the global
+permission check never has to touch the raw `Permissions.yml` data.
+
+Built once whenever permissions are loaded, then swapped onto the bot
+in a single assignment, so a check never sees a half built index.
+"""
+from bisect import bisect_left
+import re
+
+# Matches a whole "{Role}" placeholder, as used in `Permissions.yml`.
+PLACEHOLDER = re.compile(r"^\{(?P<name>[^{}]+)\}$")
+
+class PermissionConfigError(Exception):
+    """Raised when `Permissions.yml` can't be compiled, holding every problem that was found."""
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("\n".join(errors))
+
+def compile_permissions(raw):
+    """Compile the raw `Permissions.yml` contents into a permission table.
+
+    Every "{Role}" placeholder is replaced with its role ID from the `Roles`
+    section, and every role ID is converted to an integer.
+
+    Returns a dictionary of permission name to a frozenset of integer role IDs.
+    Raises a `PermissionConfigError` listing every problem found, rather than
+    stopping at the first one.
+    """
+    errors = []
+    if not isinstance(raw, dict):
+        raise PermissionConfigError(["Permissions.yml must contain a mapping of permission names to roles."])
+
+    # Role placeholders must map to integer role IDs.
+    roles = {}
+    for name, role_id in (raw.get('Roles') or {}).items():
+        try:
+            roles[name] = int(role_id)
+        except (TypeError, ValueError):
+            errors.append(f"Role '{name}' has an invalid role ID: {role_id!r}")
+
+    table = {}
+    for name, entries in raw.items():
+        if name in (None, 'Roles'):
+            continue
+        if not isinstance(entries, list):
+            errors.append(f"'{name}' must be a list of roles, got: {entries!r}")
+            continue
+
+        role_ids = set()
+        for entry in entries:
+            # Plain role IDs can be used directly, without a placeholder.
+            if isinstance(entry, int):
+                role_ids.add(entry)
+                continue
+
+            match = PLACEHOLDER.match(str(entry))
+            if match:
+                role = match.group('name')
+                if role in roles:
+                    role_ids.add(roles[role])
+                elif role not in (raw.get('Roles') or {}):
+                    errors.append(f"'{name}' uses an unknown role placeholder: {entry!r}")
+            elif str(entry).isdigit():
+                role_ids.add(int(entry))
+            else:
+                errors.append(f"'{name}' has an invalid role: {entry!r}")
+        table[name] = frozenset(role_ids)
+
+    if errors:
+        raise PermissionConfigError(errors)
+    return table
+
+class PermissionIndex:
+    def __init__(self, permissions = None):
+        """Compile the permission index.
+
+        Parameters:
+            - permissions (:class:`dict`) -
+                Maps permission names from `Permissions.yml` (e.g. "cog-load")
+                to an iterable of integer role IDs, see `compile_permissions`.
+        """
+        # Keyed by the qualified command name (e.g. "cog load"), which discord.py
+        # already builds for every command, so no name needs building per check.
+        self.commands = {
+            name.replace('-', ' '): frozenset(role_ids)
+            for name, role_ids in (permissions or {}).items()
+        }
+        # Every role ID used by any command, sorted.
+        self.role_ids = tuple(sorted(set().union(*self.commands.values())))
+
+    def validate(self, bot, lazy = False):
+        """Check every permission name against the bot's loaded commands.
+
+        Raises a `PermissionConfigError` naming any permission that doesn't
+        belong to a command, which usually means a typo in `Permissions.yml`.
+
+        A lazy extension's commands aren't loaded until one is used, so names
+        under one of its stand-ins (e.g. "newgroup sub") are skipped. While
+        `lazy` is set (some lazy extension hasn't loaded yet) any other missing
+        name is skipped as well, since it may be a command the config doesn't
+        list for that extension. Check again once the lazy extensions load.
+        """
+        errors = []
+        for name in self.commands:
+            if bot.get_command(name) is not None or lazy:
+                continue
+            root = bot.get_command(name.split(' ', 1)[0])
+            if root is not None and hasattr(root.callback, '__stand_in__'):
+                continue
+            errors.append(f"'{name.replace(' ', '-')}' does not match any loaded command.")
+        if errors:
+            raise PermissionConfigError(errors)
+
+    def __len__(self):
+        return len(self.commands)
+
+    def roles_for(self, qualified_name):
+        """Get the role IDs allowed to use a command, or `None` if anyone can use it."""
+        return self.commands.get(qualified_name)
+
+    def allowed(self, qualified_name, role_ids):
+        """Check if a member with the given role IDs may use a command.
+
+        Commands that aren't listed in the permissions can be used by anyone.
+        """
+        roles = self.commands.get(qualified_name)
+        if roles is None:
+            return True
+        return self.has_any(roles, role_ids)
+
+    @staticmethod
+    def member_role_ids(member):
+        """Get a member's sorted role IDs, for `allowed` and `has_any`.
+
+        discord.py keeps them sorted in the private `Member._roles`, which avoids
+        resolving every Role object. Should a discord.py release drop it, they are
+        read from the public `Member.roles` instead.
+        """
+        role_ids = getattr(member, '_roles', None)
+        if role_ids is None:
+            return sorted(role.id for role in member.roles)
+        return role_ids
+
+    @staticmethod
+    def has_any(roles, role_ids):
+        """Check if any of the permitted `roles` are in a member's sorted `role_ids`.
+
+        discord.py keeps a member's role IDs sorted, so each permitted role is a
+        binary search instead of hashing every one of the member's roles.
+        """
+        count = len(role_ids)
+        for role in roles:
+            position = bisect_left(role_ids, role)
+            if position != count and role_ids[position] == role:
+                return True
+        return False
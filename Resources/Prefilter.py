@@ -0,0 +1,52 @@
+"""Resource | Message Prefilter
+
+Most messages the bot sees aren't commands, but discord.py's
+`process_commands` builds a whole context for every one of them before
+finding that out. This filter runs first, in the bot's `on_message`, and
+only passes on messages that could be a command:
+
+    - Not sent by a bot.
+    - Not empty, e.g. only an attachment or embed.
+    - Starting with the prefix for the message's server.
+
+Each server only has one prefix, so checking it is a dictionary lookup and
+a `startswith`, nothing needs compiling, and a prefix change applies to the
+very next message.
+
+Counts how many messages were filtered out (and why) against how many were
+processed as commands, shown by the 'stats' command and the metrics.
+"""
+class MessageFilter:
+    def __init__(self, bot):
+        self.bot = bot
+        # The sync prefix lookup, `get_prefix` in `Resources/Bot.py`.
+        self.get_prefix = bot.command_prefix
+
+        self.counts = {'bot': 0, 'empty': 0, 'no prefix': 0, 'processed': 0}
+
+    def accept(self, message):
+        """Prefilter | Accept
+
+        Whether the message could be a command, and should go on to `process_commands`.
+        """
+        counts = self.counts
+        if message.author.bot:
+            counts['bot'] += 1
+            return False
+
+        content = message.content
+        if not content:
+            counts['empty'] += 1
+            return False
+
+        if not content.startswith(self.get_prefix(self.bot, message)):
+            counts['no prefix'] += 1
+            return False
+
+        counts['processed'] += 1
+        return True
+
+    @property
+    def filtered(self):
+        """How many messages were filtered out, for any reason."""
+        return sum(self.counts.values()) - self.counts['processed']
@@ -0,0 +1,69 @@
+"""Resource | Prefix Resolver
+
+This class keeps every server's custom command prefix in memory, so
+that looking up a prefix for an incoming message never touches storage.
+
+Changes are applied to the in-memory cache immediately, and written
+through to the data store in the background.
+"""
+import asyncio
+
+from Resources.Storage import GUILD
+
+class PrefixResolver:
+    # The data key each server's prefix is stored under.
+    KEY = 'prefix'
+
+    def __init__(self, bot):
+        self.bot = bot
+        # guild ID -> prefix, only for servers that have set a custom prefix.
+        self.prefixes = {}
+        # Pending background writes, kept so they aren't garbage collected mid-write.
+        self._writes = set()
+
+    async def load(self):
+        """Prefixes | Load
+
+        Fill the cache with every stored server prefix. Called once at startup.
+        """
+        rows = await self.bot.data_manager.scan(scope = GUILD, key = self.KEY)
+        self.prefixes = {guild_id: prefix for guild_id, _, prefix in rows}
+
+    def get(self, guild_id):
+        """Prefixes | Get
+
+        Get the prefix for a server, or the default prefix if it hasn't set one.
+        """
+        return self.prefixes.get(guild_id, self.bot.prefix)
+
+    def set(self, guild_id, prefix):
+        """Prefixes | Set
+
+        Set a server's prefix. Setting it back to the default prefix removes the custom one.
+
+        Only that server's cache entry changes, the data store is written in the background.
+        """
+        if prefix == self.bot.prefix:
+            self.prefixes.pop(guild_id, None)
+            self._write(self.bot.data_manager.delete(self.KEY, scope = GUILD, id = guild_id))
+        else:
+            self.prefixes[guild_id] = prefix
+            self._write(self.bot.data_manager.set(self.KEY, prefix, scope = GUILD, id = guild_id))
+
+    def _write(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._writes.add(task)
+        task.add_done_callback(self._written)
+
+    def _written(self, task):
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception():
+            self.bot.logger.err("Could not save prefix", error = task.exception())
+
+    async def flush(self):
+        """Prefixes | Flush
+
+        Wait for any background writes to finish.
+        """
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions = True)
@@ -0,0 +1,144 @@
+"""Resource | Rate Limiter
+
+Limits how often commands can be used by each user, in each channel, and
+in each server, as set in the `Rate Limits` section of `Config.yml`.
+
+Each limit is a token bucket: it holds up to `Uses` tokens, refilling
+steadily over `Per` seconds, and every command takes one token from each
+bucket it falls under. A command is only allowed if every one of its
+buckets has a token left, so a rejected command doesn't use up any.
+
+Runs as a global check that is called once per message, before the
+permission check and before any arguments are converted, so a limited
+command costs a few dictionary lookups and nothing else. The rejection
+is a `RateLimited` error, which only asks for a notice the first time a
+user is limited in each window.
+
+Buckets are only stored while they are refilling, a full bucket is the
+same as no bucket, so any that have fully refilled are swept out now and then.
+"""
+import time
+
+from discord.ext import commands
+
+# The scopes a command can be limited in, as named in the config.
+SCOPES = ('User', 'Channel', 'Guild')
+
+# How often (in seconds) full buckets and expired notices are swept out.
+SWEEP_INTERVAL = 60
+
+class RateLimited(commands.CheckFailure):
+    """Raised when a command is used more often than its rate limit allows."""
+    def __init__(self, scope, retry_after, notify):
+        self.scope = scope
+        self.retry_after = retry_after
+        # Whether the user should be told, only true once per window.
+        self.notify = notify
+        super().__init__(f"Rate limited by {scope.lower()}, try again in {retry_after:.1f}s.")
+
+class Limit:
+    __slots__ = ('uses', 'per', 'rate')
+
+    def __init__(self, uses, per):
+        self.uses = uses
+        self.per = per
+        # Tokens refilled per second.
+        self.rate = uses / per
+
+def compile_limit(setting, name):
+    """Build a `Limit` from a `{Uses, Per}` setting, or `None` for no limit."""
+    if setting is None:
+        return None
+    try:
+        uses, per = setting['Uses'], setting['Per']
+    except (KeyError, TypeError):
+        raise ValueError(f"Rate limit '{name}' must have 'Uses' and 'Per', got: {setting!r}")
+    if not uses or uses < 1 or not per or per <= 0:
+        raise ValueError(f"Rate limit '{name}' must allow at least 1 use per a positive number of seconds, got: {setting!r}")
+    return Limit(uses, per)
+
+def compile_rate_limits(settings):
+    """Compile the `Rate Limits` config section.
+
+    Returns `None` when rate limits are turned off, otherwise a dictionary of
+    command name (`None` for the default) to a `(Limit, bucket key)` pair for
+    each scope. Commands share the default buckets for any scope they don't
+    set a limit for.
+    """
+    if not settings['Enabled']:
+        return None
+
+    default = settings['Default'] or {}
+    limits = {None: tuple(
+        (compile_limit(default.get(scope), f"Default {scope}"), None)
+        for scope in SCOPES
+    )}
+
+    for name, overrides in (settings['Commands'] or {}).items():
+        overrides = overrides or {}
+        limits[name] = tuple(
+            (compile_limit(overrides[scope], f"{name} {scope}"), name) if scope in overrides else limits[None][index]
+            for index, scope in enumerate(SCOPES)
+        )
+    return limits
+
+class RateLimiter:
+    def __init__(self, bot):
+        self.bot = bot
+
+        # (scope index, user/channel/guild ID, command name or `None`) -> [tokens, last updated, Limit.per]
+        self._buckets = {}
+        # (user ID, command name or `None`) -> when the user can be told they are limited again.
+        self._notified = {}
+        self._swept = time.monotonic()
+
+        self.limited = 0
+
+    async def check(self, ctx):
+        """Limiter | Check
+
+        The global check, raising `RateLimited` when the command is over any of its limits.
+
+        The limits are read from `bot.rate_limits`, so they change when the config is reloaded.
+        """
+        limits = self.bot.rate_limits
+        if limits is None:
+            return True
+
+        now = time.monotonic()
+        if now - self._swept > SWEEP_INTERVAL:
+            self._sweep(now)
+
+        scopes = limits.get(ctx.command.qualified_name) or limits[None]
+        ids = (ctx.author.id, ctx.channel.id, ctx.guild.id if ctx.guild is not None else None)
+
+        # Work out every bucket's tokens first, nothing is taken unless all of them allow the command.
+        buckets = self._buckets
+        found = []
+        for index, (limit, command_key) in enumerate(scopes):
+            if limit is None or ids[index] is None:
+                continue
+            key = (index, ids[index], command_key)
+            bucket = buckets.get(key)
+            tokens = limit.uses if bucket is None else min(limit.uses, bucket[0] + (now - bucket[1]) * limit.rate)
+            if tokens < 1:
+                self._reject(ctx, SCOPES[index], limit, tokens, command_key, now)
+            found.append((key, tokens, limit))
+
+        for key, tokens, limit in found:
+            buckets[key] = [tokens - 1, now, limit.per]
+        return True
+
+    def _reject(self, ctx, scope, limit, tokens, command_key, now):
+        self.limited += 1
+        notice = (ctx.author.id, command_key)
+        notify = self._notified.get(notice, 0) <= now
+        if notify:
+            self._notified[notice] = now + limit.per
+        raise RateLimited(scope, (1 - tokens) / limit.rate, notify)
+
+    def _sweep(self, now):
+        """Drop the buckets that have fully refilled, and notices that have expired."""
+        self._swept = now
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < bucket[2]}
+        self._notified = {key: until for key, until in self._notified.items() if until > now}
@@ -0,0 +1,179 @@
+"""Resource | Message Router
+
+Cogs that react to ordinary messages register handlers with `@route`,
+instead of each adding an `on_message` listener that sees every message
+and filters it itself. discord.py starts a task for every listener of
+every message, the router is a single listener that only calls the
+handlers whose filters match:
+
+    @route(channel = 1234, startswith = "hello")
+    async def greet(self, message):
+        ...
+
+Filters (all optional, a handler needs every one it sets to match):
+    - guild / channel - A server or channel ID, or a list of them.
+    - startswith - Text (or a tuple of texts) the message starts with.
+    - regex - A pattern searched for in the message.
+    - attachments - Only messages with attachments.
+    - bots - Also handle messages from bots, which are skipped by default.
+
+Handlers are indexed by channel, then server, then the first character
+they need the message to start with, so each message only looks at the
+handlers that could match it. Matching handlers run at the same time, so
+a slow one doesn't hold up the rest. Each one is timed for the metrics, and
+an error in one is logged without affecting the others.
+
+The index is rebuilt by the extension manager whenever extensions are
+loaded, reloaded, or unloaded. Call `rebuild` after adding or removing a
+cog any other way.
+"""
+import asyncio
+import re
+import time
+
+from Resources.Metrics import Histogram, COMMAND_BUCKETS
+
+def route(guild = None, channel = None, startswith = None, regex = None, attachments = False, bots = False):
+    """Register a cog method as a message handler, see the module docstring for the filters."""
+    def decorator(func):
+        func.__route__ = RouteFilters(guild, channel, startswith, regex, attachments, bots)
+        return func
+    return decorator
+
+def _ids(value):
+    """A single ID or a list of them, as a frozenset, or `None` for any."""
+    if value is None:
+        return None
+    return frozenset((value,)) if isinstance(value, int) else frozenset(value)
+
+class RouteFilters:
+    """The filters for a handler."""
+    __slots__ = ('guilds', 'channels', 'startswith', 'regex', 'attachments', 'bots')
+
+    def __init__(self, guild, channel, startswith, regex, attachments, bots):
+        self.guilds = _ids(guild)
+        self.channels = _ids(channel)
+        self.startswith = (startswith,) if isinstance(startswith, str) else (tuple(startswith) if startswith else None)
+        self.regex = re.compile(regex) if isinstance(regex, str) else regex
+        self.attachments = attachments
+        self.bots = bots
+
+    def matches(self, message, content):
+        """Check every filter, the channel and server filters are checked again since the index may be shared."""
+        if message.author.bot and not self.bots:
+            return False
+        if self.channels is not None and message.channel.id not in self.channels:
+            return False
+        if self.guilds is not None and (message.guild is None or message.guild.id not in self.guilds):
+            return False
+        if self.attachments and not message.attachments:
+            return False
+        if self.startswith is not None and not content.startswith(self.startswith):
+            return False
+        if self.regex is not None and self.regex.search(content) is None:
+            return False
+        return True
+
+class Handler:
+    """A registered handler, with its timings."""
+    __slots__ = ('name', 'callback', 'route', 'latency', 'errors')
+
+    def __init__(self, name, callback, route):
+        self.name = name
+        self.callback = callback
+        self.route = route
+        self.latency = Histogram(COMMAND_BUCKETS)
+        self.errors = 0
+
+class MessageRouter:
+    def __init__(self, bot):
+        self.bot = bot
+
+        self.handlers = []
+        # Where each handler is indexed, by its most specific filter.
+        self._by_channel = {}
+        self._by_guild = {}
+        # first character -> handlers that need the message to start with it.
+        self._by_first = {}
+        # Handlers with none of the filters above.
+        self._any = []
+        # handler name -> Handler, kept across rebuilds so timings survive a reload.
+        self._stats = {}
+        # The listener is only added while there are handlers, otherwise it would still be a task per message.
+        self._listening = False
+
+    def rebuild(self):
+        """Router | Rebuild
+
+        Index the handlers of every loaded cog, adding or removing the router's
+        `on_message` listener depending on whether there are any.
+        """
+        handlers = []
+        for cog in self.bot.cogs.values():
+            for attribute in dir(type(cog)):
+                route = getattr(getattr(type(cog), attribute, None), '__route__', None)
+                if route is None:
+                    continue
+                name = f"{cog.qualified_name}.{attribute}"
+                handler = Handler(name, getattr(cog, attribute), route)
+                previous = self._stats.get(name)
+                if previous is not None:
+                    handler.latency, handler.errors = previous.latency, previous.errors
+                handlers.append(handler)
+
+        by_channel, by_guild, by_first, anything = {}, {}, {}, []
+        for handler in handlers:
+            route = handler.route
+            if route.channels is not None:
+                for channel_id in route.channels:
+                    by_channel.setdefault(channel_id, []).append(handler)
+            elif route.guilds is not None:
+                for guild_id in route.guilds:
+                    by_guild.setdefault(guild_id, []).append(handler)
+            elif route.startswith is not None and all(route.startswith):
+                for first in {text[0] for text in route.startswith}:
+                    by_first.setdefault(first, []).append(handler)
+            else:
+                anything.append(handler)
+
+        # Swapped in together, so a message being routed never sees half of an index.
+        self.handlers = handlers
+        self._by_channel, self._by_guild, self._by_first, self._any = by_channel, by_guild, by_first, anything
+        self._stats = {handler.name: handler for handler in handlers}
+
+        if handlers and not self._listening:
+            self.bot.add_listener(self.on_message, 'on_message')
+        elif not handlers and self._listening:
+            self.bot.remove_listener(self.on_message, 'on_message')
+        self._listening = bool(handlers)
+
+    def candidates(self, message, content):
+        """The handlers that could match a message, before checking their filters."""
+        found = self._by_channel.get(message.channel.id, ())
+        if message.guild is not None:
+            found = [*found, *self._by_guild.get(message.guild.id, ())]
+        if content:
+            found = [*found, *self._by_first.get(content[0], ())]
+        return [*found, *self._any] if self._any else found
+
+    async def on_message(self, message):
+        content = message.content
+        matched = [handler for handler in self.candidates(message, content) if handler.route.matches(message, content)]
+        # Most messages match one handler at most, which doesn't need a task of its own.
+        if len(matched) == 1:
+            await self._run(matched[0], message)
+        elif matched:
+            await asyncio.gather(*(self._run(handler, message) for handler in matched), return_exceptions = True)
+
+    async def _run(self, handler, message):
+        """Run a handler, timing it and logging anything it raises."""
+        start = time.perf_counter()
+        try:
+            await handler.callback(message)
+        except Exception as e:
+            handler.errors += 1
+            self.bot.logger.err(
+                f"Ignoring exception in message handler {handler.name}",
+                exc_info = (type(e), e, e.__traceback__)
+            )
+        handler.latency.observe(time.perf_counter() - start)
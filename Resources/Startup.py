@@ -0,0 +1,79 @@
+"""Resource | Startup Timer
+
+This class times each step of starting the bot (imports, config,
+permissions, data, each extension) and the time until the gateway is
+READY, then logs them as a single report.
+
+The report makes cold start time easy to track, and shows which step to
+look at first when startup gets slower.
+"""
+import time
+from contextlib import contextmanager
+
+class StartupTimer:
+    def __init__(self, start = None):
+        """
+        Parameters:
+            - start (:class:`float`) -
+                The `time.perf_counter()` value startup is measured from, defaults to now.
+                Pass the value from before the imports to include them.
+        """
+        self.start = start if start is not None else time.perf_counter()
+        # (step name, seconds), in the order they happened.
+        self.steps = []
+        self._connecting = None
+        self.reported = False
+
+    def record(self, name, seconds):
+        """Startup | Record
+
+        Record a step that was timed elsewhere.
+        """
+        self.steps.append((name, seconds))
+
+    @contextmanager
+    def step(self, name):
+        """Startup | Step
+
+        Time the code inside a `with` block as a step.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def connecting(self):
+        """Startup | Connecting
+
+        Mark the moment the bot starts connecting to the gateway.
+        """
+        self._connecting = time.perf_counter()
+
+    def ready(self, logger):
+        """Startup | Ready
+
+        Record the time from connecting until the gateway was READY, then log the report.
+
+        Only reports the first time, `on_ready` is also triggered after reconnecting.
+        """
+        if self.reported:
+            return
+        if self._connecting is not None:
+            self.record("gateway ready", time.perf_counter() - self._connecting)
+        self.report(logger)
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def report(self, logger):
+        """Startup | Report
+
+        Log the total startup time, with each step as a field.
+        """
+        self.reported = True
+        logger.ok(
+            f"Started in {self.total:.2f}s.",
+            **{name: f"{seconds * 1000:.1f} ms" for name, seconds in self.steps}
+        )
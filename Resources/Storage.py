@@ -0,0 +1,448 @@
+"""Resource | Storage Backends
+
+These classes are where the bot's data actually lives. The DataManager
+picks one based on the `Backend` setting in the config, and every other
+part of the bot goes through the DataManager's get/set/delete/scan functions.
+
+Data is stored in one of three scopes:
+    global:
+        Keys that belong to the bot as a whole.
+    guild:
+        Keys that belong to a specific guild, addressed by guild ID.
+    user:
+        Keys that belong to a specific user, addressed by user ID.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+GLOBAL = 'global'
+GUILD = 'guild'
+USER = 'user'
+SCOPES = (GLOBAL, GUILD, USER)
+
+class StorageBackend:
+    """Base | Storage Backend
+
+    The interface every storage backend implements.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+
+    def load(self):
+        """Open or create the underlying storage. Called once at startup."""
+        raise NotImplementedError
+
+    def start(self):
+        """Start any background work the backend needs. Called once the bot's loop exists."""
+        pass
+
+    async def get(self, key, scope = GLOBAL, id = None, default = None):
+        raise NotImplementedError
+
+    async def set(self, key, value, scope = GLOBAL, id = None):
+        raise NotImplementedError
+
+    async def delete(self, key, scope = GLOBAL, id = None):
+        raise NotImplementedError
+
+    async def scan(self, scope = GLOBAL, id = None, key = None):
+        """Return a list of `(id, key, value)` tuples in a scope.
+
+        Optionally narrowed to a single ID, a single key, or both.
+        Global keys always have an ID of `None`.
+        """
+        raise NotImplementedError
+
+    def import_data(self, data):
+        """Bulk import a dictionary laid out like the JSON backend's data file."""
+        raise NotImplementedError
+
+    def mark_dirty(self, key = None):
+        """Mark raw data as changed, for backends that keep data in memory."""
+        pass
+
+    async def flush(self):
+        """Write anything pending to storage."""
+        pass
+
+    def flush_now(self):
+        """Write anything pending to storage, without the event loop."""
+        pass
+
+    async def close(self):
+        """Write anything pending and release the storage."""
+        pass
+
+def split_key(raw_key):
+    """Split a JSON backend top level key into its `(scope, id)`.
+
+    "guild:1234" is `('guild', 1234)`, anything without a scope prefix is global.
+    """
+    scope, _, id = str(raw_key).partition(':')
+    if id and scope in (GUILD, USER) and id.isdigit():
+        return scope, int(id)
+    return GLOBAL, None
+
+class JSONBackend(StorageBackend):
+    """Backend | JSON File
+
+    Keeps all data in memory as `bot.data`, and writes it to the data file
+    behind the event loop.
+
+    Global keys are stored at the top level of the file, guild and user
+    keys are stored in a dictionary under "guild:<id>" or "user:<id>".
+    """
+    def __init__(self, bot):
+        super().__init__(bot)
+
+        # Top level keys of `bot.data` that have changed since the last flush.
+        self._dirty = set()
+        # The serialized JSON of every top level key, reused until that key changes again.
+        self._fragments = {}
+
+        # Created once the flusher is started, so they belong to the bot's event loop.
+        self._flush_lock = None
+        self._flush_event = None
+        self._flusher = None
+
+    def load(self):
+        """Check if the data file exists, if it does, load it, if not, create it.
+
+        If the data file exists but has not data, give it a new empty data object.
+        """
+        content = ""
+        if os.path.exists(self.bot.data_file):
+            with open(self.bot.data_file, 'r', encoding = "utf-8") as file:
+                content = file.read()
+
+        if len(content) == 0:
+            self.bot.data = {}
+            self._write([])
+        else:
+            self.bot.data = json.loads(content)
+            # Prime the serialized keys, so the first flush only re-serializes what changed.
+            self.mark_dirty()
+            self._collect()
+
+    @staticmethod
+    def _raw_key(key, scope, id):
+        if scope == GLOBAL:
+            return key
+        return f"{scope}:{id}"
+
+    async def get(self, key, scope = GLOBAL, id = None, default = None):
+        if scope == GLOBAL:
+            return self.bot.data.get(key, default)
+        return self.bot.data.get(self._raw_key(key, scope, id), {}).get(key, default)
+
+    async def set(self, key, value, scope = GLOBAL, id = None):
+        raw_key = self._raw_key(key, scope, id)
+        if scope == GLOBAL:
+            self.bot.data[key] = value
+        else:
+            self.bot.data.setdefault(raw_key, {})[key] = value
+        self.mark_dirty(raw_key)
+
+    async def delete(self, key, scope = GLOBAL, id = None):
+        raw_key = self._raw_key(key, scope, id)
+        if scope == GLOBAL:
+            self.bot.data.pop(key, None)
+        else:
+            entries = self.bot.data.get(raw_key)
+            if entries is None:
+                return
+            entries.pop(key, None)
+            if not entries:
+                del self.bot.data[raw_key]
+        self.mark_dirty(raw_key)
+
+    async def scan(self, scope = GLOBAL, id = None, key = None):
+        results = []
+        if scope == GLOBAL:
+            for raw_key, value in self.bot.data.items():
+                if split_key(raw_key)[0] == GLOBAL and key in (None, raw_key):
+                    results.append((None, raw_key, value))
+            return results
+
+        if id is not None:
+            sections = [(id, self.bot.data.get(self._raw_key(None, scope, id), {}))]
+        else:
+            sections = []
+            for raw_key, value in self.bot.data.items():
+                raw_scope, raw_id = split_key(raw_key)
+                if raw_scope == scope:
+                    sections.append((raw_id, value))
+
+        for section_id, entries in sections:
+            if key is not None:
+                if key in entries:
+                    results.append((section_id, key, entries[key]))
+            else:
+                results.extend((section_id, entry_key, value) for entry_key, value in entries.items())
+        return results
+
+    def mark_dirty(self, key = None):
+        """Mark a top level key of the bot's data as changed, or every key if none is given.
+
+        Nothing is written here, the background flusher picks up the changed
+        keys and writes them out together. Use `flush` to write immediately.
+        """
+        if key is None:
+            self._dirty.update(self.bot.data.keys())
+            # Keys that were removed from the data still need to be dropped from the file.
+            self._dirty.update(self._fragments.keys())
+        else:
+            self._dirty.add(key)
+
+        # Wake the flusher early once enough keys have piled up.
+        if self._flush_event and len(self._dirty) >= self.bot.flush_threshold:
+            self._flush_event.set()
+
+    def _collect(self):
+        """Re-serialize only the keys that changed since the last flush, and
+        return a snapshot of every key's JSON for the writer.
+
+        Runs on the event loop, so the data can't change underneath it.
+        """
+        dirty = self._dirty
+        self._dirty = set()
+        for key in dirty:
+            if key in self.bot.data:
+                self._fragments[key] = json.dumps(self.bot.data[key])
+            else:
+                self._fragments.pop(key, None)
+        return dirty, list(self._fragments.items())
+
+    def _write(self, fragments):
+        """Assemble the data file from its serialized keys, and atomically
+        replace the old file with it.
+
+        Safe to run off of the event loop, it only touches the given snapshot.
+        """
+        if fragments:
+            content = "{\n" + ",\n".join(f"  {json.dumps(str(key))}: {fragment}" for key, fragment in fragments) + "\n}"
+        else:
+            content = "{}"
+
+        # Write to a temp file next to the data file, then swap it into place.
+        # A crash mid-write leaves the previous data file untouched.
+        directory, name = os.path.split(self.bot.data_file)
+        handle, temp_path = tempfile.mkstemp(prefix = f".{name}.", suffix = ".tmp", dir = directory)
+        try:
+            with os.fdopen(handle, 'w', encoding = "utf-8") as temp_file:
+                temp_file.write(content)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, self.bot.data_file)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    async def flush(self):
+        """Write any changed data to the data file right away.
+
+        Serialization of changed keys happens on the event loop, the file
+        write itself happens in a worker thread.
+        """
+        if self._flush_lock is None:
+            # The flusher was never started, there's nothing to coordinate with.
+            return self.flush_now()
+
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, fragments = self._collect()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, fragments)
+            except Exception as e:
+                # Keep the keys marked so the next flush tries them again.
+                self._dirty.update(dirty)
+                self.bot.logger.err("Could not save data", error = e)
+
+    def flush_now(self):
+        """Write any changed data to the data file on the calling thread.
+
+        Only meant for when the event loop isn't running, such as startup and after shutdown.
+        """
+        if self._dirty:
+            self._write(self._collect()[1])
+
+    def start(self):
+        """Start the background task which writes changed data every
+        `Flush Interval` seconds, or sooner once `Flush Threshold` keys have changed.
+        """
+        self._flush_lock = asyncio.Lock()
+        self._flush_event = asyncio.Event()
+        self._flusher = self.bot.loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout = self.bot.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            await self.flush()
+
+    async def close(self):
+        """Stop the background flusher and write out anything still pending."""
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+class SQLiteBackend(StorageBackend):
+    """Backend | SQLite Database
+
+    Stores data as rows in an SQLite database running in WAL mode, with a
+    table per scope keyed by `(id, key)`. Reads and writes only touch the
+    rows involved, instead of the whole data set.
+
+    Values are stored as JSON text. All database work happens on a single
+    worker thread, which owns the connection.
+    """
+    TABLES = {
+        GLOBAL: ("global_data", None),
+        GUILD:  ("guild_data", "guild_id"),
+        USER:   ("user_data", "user_id"),
+    }
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self._executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "sqlite")
+        self._connection = None
+        self.bot.data = None
+
+    def load(self):
+        """Open (or create) the database file and its tables."""
+        self._executor.submit(self._connect).result()
+
+    def _connect(self):
+        directory = os.path.dirname(self.bot.database_file)
+        if directory:
+            os.makedirs(directory, exist_ok = True)
+
+        self._connection = sqlite3.connect(self.bot.database_file)
+        # WAL lets readers (and other processes) work while a write is in progress.
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS global_data (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID"
+            )
+            for table, column in (self.TABLES[GUILD], self.TABLES[USER]):
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ({column} INTEGER NOT NULL, key TEXT NOT NULL, "
+                    f"value TEXT NOT NULL, PRIMARY KEY ({column}, key)) WITHOUT ROWID"
+                )
+                # Lets a single key be scanned across every guild/user, such as loading all prefixes.
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_key ON {table} (key)")
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _get(self, key, scope, id):
+        table, column = self.TABLES[scope]
+        if column:
+            row = self._connection.execute(f"SELECT value FROM {table} WHERE {column} = ? AND key = ?", (id, key)).fetchone()
+        else:
+            row = self._connection.execute(f"SELECT value FROM {table} WHERE key = ?", (key,)).fetchone()
+        return row
+
+    async def get(self, key, scope = GLOBAL, id = None, default = None):
+        row = await self._run(self._get, key, scope, id)
+        return json.loads(row[0]) if row else default
+
+    def _set(self, key, value, scope, id):
+        table, column = self.TABLES[scope]
+        with self._connection:
+            if column:
+                self._connection.execute(f"INSERT OR REPLACE INTO {table} ({column}, key, value) VALUES (?, ?, ?)", (id, key, value))
+            else:
+                self._connection.execute(f"INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)", (key, value))
+
+    async def set(self, key, value, scope = GLOBAL, id = None):
+        # Serialize on the loop, so later changes to `value` can't race the write.
+        await self._run(self._set, key, json.dumps(value), scope, id)
+
+    def _delete(self, key, scope, id):
+        table, column = self.TABLES[scope]
+        with self._connection:
+            if column:
+                self._connection.execute(f"DELETE FROM {table} WHERE {column} = ? AND key = ?", (id, key))
+            else:
+                self._connection.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+
+    async def delete(self, key, scope = GLOBAL, id = None):
+        await self._run(self._delete, key, scope, id)
+
+    def _scan(self, scope, id, key):
+        table, column = self.TABLES[scope]
+        if not column:
+            if key is None:
+                rows = self._connection.execute(f"SELECT key, value FROM {table}")
+            else:
+                rows = self._connection.execute(f"SELECT key, value FROM {table} WHERE key = ?", (key,))
+            return [(None, row_key, json.loads(value)) for row_key, value in rows]
+
+        conditions, parameters = [], []
+        if id is not None:
+            conditions.append(f"{column} = ?")
+            parameters.append(id)
+        if key is not None:
+            conditions.append("key = ?")
+            parameters.append(key)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection.execute(f"SELECT {column}, key, value FROM {table}{where}", parameters)
+        return [(row_id, row_key, json.loads(value)) for row_id, row_key, value in rows]
+
+    async def scan(self, scope = GLOBAL, id = None, key = None):
+        return await self._run(self._scan, scope, id, key)
+
+    def _import(self, rows):
+        with self._connection:
+            for scope, entries in rows.items():
+                table, column = self.TABLES[scope]
+                if column:
+                    self._connection.executemany(f"INSERT OR REPLACE INTO {table} ({column}, key, value) VALUES (?, ?, ?)", entries)
+                else:
+                    self._connection.executemany(f"INSERT OR REPLACE INTO {table} (key, value) VALUES (?, ?)", entries)
+
+    def import_data(self, data):
+        """Import a JSON backend data file's contents, all in one transaction.
+
+        Returns the number of rows imported per scope.
+        """
+        rows = {scope: [] for scope in SCOPES}
+        for raw_key, value in data.items():
+            scope, id = split_key(raw_key)
+            if scope == GLOBAL:
+                rows[GLOBAL].append((raw_key, json.dumps(value)))
+            else:
+                rows[scope].extend((id, key, json.dumps(entry)) for key, entry in value.items())
+
+        self._executor.submit(self._import, rows).result()
+        return {scope: len(entries) for scope, entries in rows.items()}
+
+    def _close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    async def close(self):
+        await self._run(self._close)
+        self._executor.shutdown(wait = False)
+
+    def flush_now(self):
+        # Every write is already committed, just make sure the connection is released.
+        if self._connection:
+            self._executor.submit(self._close).result()
+
+BACKENDS = {
+    'json': JSONBackend,
+    'sqlite': SQLiteBackend,
+}
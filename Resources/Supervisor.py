@@ -0,0 +1,137 @@
+"""Resource | Supervisor
+
+Keeps the bot running, replacing the fixed 5 second restart loop in the
+Start scripts.
+
+How the bot exited decides what happens next:
+    RESTART_EXIT_CODE:
+        An intentional restart from the 'restart' command, started again right away.
+    0:
+        An intentional shutdown, the supervisor stops as well.
+    CONFIG_EXIT_CODE:
+        The bot can't start as configured (e.g. an invalid token or
+        `Permissions.yml`). Starting it again wouldn't help, so the
+        supervisor stops until the configuration is fixed.
+    Anything else:
+        A crash, started again after an exponential backoff with jitter, so a
+        crash looping bot doesn't hit Discord's identify limits. After too
+        many crashes within a short window, the bot is parked (left stopped)
+        for a while before trying again.
+"""
+import random
+import subprocess
+import sys
+import time
+from collections import deque
+
+# The exit code the bot uses for an intentional restart.
+RESTART_EXIT_CODE = 75
+# The exit code the bot uses when its configuration stops it from starting (EX_CONFIG).
+CONFIG_EXIT_CODE = 78
+
+class Backoff:
+    """Exponential backoff with full jitter.
+
+    Each delay is a random amount of time between 0 and
+    `base * 2 ** (failures - 1)`, capped at `maximum`.
+    """
+    def __init__(self, base, maximum):
+        self.base = base
+        self.maximum = maximum
+        self.failures = 0
+
+    def next(self):
+        self.failures += 1
+        return random.uniform(0, min(self.maximum, self.base * 2 ** (self.failures - 1)))
+
+    def reset(self):
+        self.failures = 0
+
+class Supervisor:
+    def __init__(self, config, command = None, name = "Supervisor"):
+        """
+        Parameters:
+            - config (:class:`dict`) -
+                The bot's config, see the 'Supervisor' section of 'Config.yml'.
+            - command (:class:`list`) -
+                The command that runs the bot, `main.py` with the current Python by default.
+            - name (:class:`str`) -
+                Shown at the start of every log line, e.g. the launcher's worker.
+        """
+        settings = config['Supervisor']
+        self.command = command or [sys.executable, "main.py"]
+        self.name = name
+        self.backoff = Backoff(settings['Base Delay'], settings['Max Delay'])
+        self.crash_limit = settings['Crash Limit']
+        self.crash_window = settings['Crash Window'] * 60
+        self.park_time = settings['Park Time'] * 60
+        self.stable_after = settings['Stable After']
+
+        # When each recent crash happened, for spotting a crash loop.
+        self.crashes = deque()
+
+    def log(self, message):
+        print(f"[{self.name}] [{time.strftime('%m/%d/%Y | %I:%M:%S %p')}] {message}", flush = True)
+
+    def run_once(self):
+        """Run the bot until it exits, returning its exit code and how long it ran."""
+        start = time.monotonic()
+        process = subprocess.Popen(self.command)
+        try:
+            code = process.wait()
+        except KeyboardInterrupt:
+            # The bot gets the interrupt as well, give it a moment to shut down cleanly.
+            try:
+                process.wait(timeout = 10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            raise
+        return code, time.monotonic() - start
+
+    def crashed(self, ran_for):
+        """Supervisor | Crashed
+
+        Record a crash, returning how long to wait before starting the bot again.
+        """
+        # A bot that ran for a while before crashing isn't failing to start, begin the backoff again.
+        if ran_for >= self.stable_after:
+            self.backoff.reset()
+
+        now = time.monotonic()
+        self.crashes.append(now)
+        while self.crashes and now - self.crashes[0] > self.crash_window:
+            self.crashes.popleft()
+
+        if len(self.crashes) >= self.crash_limit:
+            self.crashes.clear()
+            self.backoff.reset()
+            self.log(f"Crashed {self.crash_limit} times within {self.crash_window / 60:g} minutes, "
+                     f"parking the bot for {self.park_time / 60:g} minutes.")
+            return self.park_time
+        return self.backoff.next()
+
+    def run(self):
+        """Supervisor | Run
+
+        Keep the bot running until it shuts down on purpose, or is interrupted.
+        """
+        try:
+            while True:
+                code, ran_for = self.run_once()
+
+                if code == RESTART_EXIT_CODE:
+                    self.log("Restart requested, starting again.")
+                    self.backoff.reset()
+                    continue
+                if code == 0:
+                    self.log("Bot shut down, stopping.")
+                    return
+                if code == CONFIG_EXIT_CODE:
+                    self.log("Bot can't start until its configuration is fixed (see its log), stopping.")
+                    return
+
+                delay = self.crashed(ran_for)
+                self.log(f"Bot exited with code {code} after {ran_for:.0f}s, starting again in {delay:.1f}s.")
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            self.log("Interrupted, stopping.")
@@ -4,10 +4,51 @@ This file hosts classes/functions which are used regularly throughout
 the program. More details provided for each.
 """
 import discord
-from discord.ext import menus
 import datetime
 
+# The attributes that make up an embed, copied when cloning one.
+EMBED_SLOTS = discord.Embed.__slots__
+
+def clone_embed(embed, cls = discord.Embed):
+    """Function | Clone Embedded Message
+
+    Make a copy of an embed that can be changed without affecting the original.
+
+    Much cheaper than `Embed.copy`, which serializes and re-parses the entire embed.
+    Only the containers (footer, author, fields, etc) are copied, everything else is shared.
+    """
+    clone = cls.__new__(cls)
+    for slot in EMBED_SLOTS:
+        try:
+            value = getattr(embed, slot)
+        except AttributeError:
+            continue
+        if isinstance(value, dict):
+            value = value.copy()
+        elif isinstance(value, list):
+            value = [item.copy() if isinstance(item, dict) else item for item in value]
+        setattr(clone, slot, value)
+    return clone
+
+class StaticEmbed(discord.Embed):
+    """An embed that is never changed once it is built.
+
+    Its `to_dict` result is cached, so sending it again skips re-serializing it.
+    Use `clone_embed` to get a copy that can be changed.
+    """
+    __slots__ = ('_dict',)
+
+    def to_dict(self):
+        try:
+            return self._dict
+        except AttributeError:
+            self._dict = super().to_dict()
+            return self._dict
+
 class EmbedUtil:
+    # The most templates/static embeds to keep, the caches are emptied if they grow past this.
+    CACHE_SIZE = 256
+
     def __init__(self, bot):
         self.embed_color = bot.embed_color
         self.footer = bot.footer
@@ -15,24 +56,56 @@ class EmbedUtil:
         self.timestamp = bot.embed_ts
         self.show_author = bot.show_command_author
 
+        # (title, footer, footer image) -> the embed parts for that title, footer, and color.
+        self._templates = {}
+        # Arguments -> finished embed, for embeds that never change.
+        self._static = {}
+
+    def _template(self, title, footer, footer_image):
+        """Function | Embed Template
+
+        Get the parts shared by every embed with this title and footer, as
+        `(attribute, value)` pairs, building them the first time they are needed.
+
+        The values are shared between every embed made from the template, which
+        is safe as embeds replace (rather than change) their footer when it is set.
+        """
+        key = (title, footer, footer_image)
+        template = self._templates.get(key)
+        if template is None:
+            if len(self._templates) >= self.CACHE_SIZE:
+                self._templates.clear()
+            embed = discord.Embed(color = self.embed_color)
+            if title is not None:
+                embed.title = str(title)
+            embed.set_footer(
+                text = self.footer if not footer else footer,
+                icon_url = self.footer_image if not footer_image else footer_image
+            )
+            template = tuple(
+                (slot, getattr(embed, slot)) for slot in EMBED_SLOTS if hasattr(embed, slot)
+            )
+            self._templates[key] = template
+        return template
+
     def get_embed(self, title = None, desc = None, fields = None, ts = False,
                     author = None, thumbnail = None, image = None, footer = None,
-                    footer_image = None):
+                    footer_image = None, cls = discord.Embed):
         """Function | Create Embedded Message
 
         This function reads the default embed settings from the bot
         attributes, then creates an embedded message to the specifications
         of the input.
+
+        The title, color, and footer come from a cached template, so only
+        the parts that differ per message are set here.
         """
-        embed = discord.Embed(
-            title = title,
-            description = desc,
-            color = self.embed_color
-        )
-        embed.set_footer(
-            text = self.footer if not footer else footer,
-            icon_url = self.footer_image if not footer_image else footer_image
-        )
+        # Apply the template's parts straight onto a new embed, skipping `Embed.__init__`.
+        embed = cls.__new__(cls)
+        for slot, value in self._template(title, footer, footer_image):
+            setattr(embed, slot, value)
+        if desc is not None:
+            embed.description = str(desc)
         if ts:
             embed.timestamp = self.timestamp()
         if self.show_author == True and author:
@@ -57,14 +130,46 @@ class EmbedUtil:
             )
         return embed
 
+    def get_static_embed(self, title = None, desc = None, fields = None, author = None,
+                    thumbnail = None, image = None, footer = None, footer_image = None):
+        """Function | Get Static Embedded Message
+
+        Like `get_embed`, for embeds that are the same every time they are sent,
+        such as help pages and error responses.
+
+        The finished embed is built once and reused, along with its serialized
+        form. It must not be changed, `update_embed` makes a copy first.
+
+        Timestamps can't be static, and embeds showing the command author are
+        only static when the author isn't shown.
+        """
+        if self.show_author == True and author:
+            return self.get_embed(title = title, desc = desc, fields = fields, author = author,
+                thumbnail = thumbnail, image = image, footer = footer, footer_image = footer_image)
+
+        key = (
+            title, desc, footer, footer_image, thumbnail, image,
+            tuple((field['name'], field['value'], field['inline']) for field in fields) if fields else None
+        )
+        embed = self._static.get(key)
+        if embed is None:
+            if len(self._static) >= self.CACHE_SIZE:
+                self._static.clear()
+            embed = self.get_embed(title = title, desc = desc, fields = fields, thumbnail = thumbnail,
+                image = image, footer = footer, footer_image = footer_image, cls = StaticEmbed)
+            self._static[key] = embed
+        return embed
+
     def update_embed(self, embed, title = None, desc = None, ts = False,
                     author = None, thumbnail = None, image = None, footer = None,
                     footer_image = None):
         """Function | Modify Embedded Message
 
-        This function takes in an embedded message and modifies it
-        based on inputs.
+        This function takes in an embedded message and returns a modified
+        copy of it based on inputs. The original embed is left as it was,
+        so the same embed can be sent and then updated for the log channel.
         """
+        embed = clone_embed(embed)
         if title:
             embed.title = title
         if desc:
@@ -89,31 +194,3 @@ class EmbedUtil:
             icon_url = embed.footer.icon_url if not footer_image else footer_image
         )
         return embed
-
-class Confirmation(menus.Menu):
-    def __init__(self, title = None, msg = None):
-        super().__init__(timeout = 30.0, delete_message_after = True)
-        self.msg = msg
-        self.title = title
-        self.result = None
-
-    async def send_initial_message(self, ctx, channel):
-        embed = ctx.bot.embed_util.get_embed(
-            title = self.title,
-            desc = self.msg
-        )
-        return await channel.send(embed = embed)
-
-    @menus.button('\N{WHITE HEAVY CHECK MARK}')
-    async def do_confirm(self, payload):
-        self.result = True
-        self.stop()
-
-    @menus.button('\N{CROSS MARK}')
-    async def do_deny(self, payload):
-        self.result = False
-        self.stop()
-
-    async def prompt(self, ctx):
-        await self.start(ctx, wait = True)
-        return self.result
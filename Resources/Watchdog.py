@@ -0,0 +1,143 @@
+"""Resource | Watchdog
+
+Watches for the event loop being blocked, e.g. by a command making a slow
+blocking call, which delays everything else including gateway heartbeats.
+
+A heartbeat task on the loop wakes up every `Interval` seconds, measuring
+how late it woke up (the loop lag, recorded in the bot's metrics). A
+separate thread checks the heartbeat. When the loop hasn't woken up for
+longer than the `Threshold`, the loop is still stuck, so the thread
+captures the loop thread's stack and the task that is running, and works
+out which command or listener it belongs to.
+
+Each stall is logged, and the most recent ones are kept for the 'broken'
+command to report.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+class Watchdog:
+    # How many stack frames to keep, counting back from where the loop is stuck.
+    STACK_LIMIT = 15
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.interval = bot.watchdog_interval
+        self.threshold = bot.watchdog_threshold
+
+        # The running task -> the context of the command it is running.
+        self.active = {}
+        # The most recent stalls, newest last.
+        self.stalls = deque(maxlen = 10)
+
+        self._beat = time.monotonic()
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+        # The stall currently in progress, finished by the heartbeat once the loop is free again.
+        self._stall = None
+
+    def start(self):
+        """Watchdog | Start
+
+        Start the heartbeat task on the bot's loop, and the thread watching it.
+        """
+        self._loop = self.bot.loop
+        self._task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target = self._watch, name = "watchdog", daemon = True)
+        self._thread.start()
+
+    def before_invoke(self, ctx):
+        self.active[asyncio.current_task()] = ctx
+
+    def after_invoke(self, ctx):
+        self.active.pop(asyncio.current_task(), None)
+
+    async def _heartbeat(self):
+        # The loop runs on whichever thread runs the bot, which is only known once it's running.
+        self._beat = time.monotonic()
+        self._loop_thread = threading.get_ident()
+        loop = asyncio.get_running_loop()
+        lag_histogram = self.bot.metrics.loop_lag
+        while True:
+            start = loop.time()
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.bot.metrics.last_lag = lag
+            lag_histogram.observe(lag)
+
+            stall = self._stall
+            if stall is not None:
+                self._stall = None
+                # How late the heartbeat was is the most accurate measure of how long the loop was stuck.
+                stall["blocked"] = lag
+                self.bot.logger.warn(f"Event loop unblocked, the heartbeat was {lag:.2f}s late.", command = stall["command"])
+
+    def _watch(self):
+        """Runs on the watchdog thread, checking the heartbeat is on time."""
+        while not self._stopped.wait(self.interval):
+            # Nothing to check until the heartbeat has started on the loop.
+            if self._loop_thread is None:
+                continue
+            blocked = time.monotonic() - self._beat - self.interval
+            if blocked > self.threshold and self._stall is None:
+                self._stall = self._capture(blocked)
+                self.stalls.append(self._stall)
+                self.bot.logger.warn(
+                    f"Event loop blocked for over {blocked:.2f}s.",
+                    command = self._stall["command"],
+                    task = self._stall["task"],
+                    stack = "\n" + self._stall["stack"]
+                )
+
+    def _capture(self, blocked):
+        """Capture what the (stuck) loop thread is doing, from the watchdog thread."""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = "".join(traceback.format_stack(frame, limit = None)[-self.STACK_LIMIT:]) if frame else "Unknown"
+
+        task = asyncio.current_task(self._loop)
+        ctx = self.active.get(task)
+        if ctx is not None:
+            command = ctx.command.qualified_name
+        elif task is not None:
+            # discord.py's event tasks show the listener they are running, e.g. "event=on_message".
+            command = repr(task)
+        else:
+            # Not inside of a task, e.g. a callback scheduled on the loop.
+            command = "Unknown (outside of a task)"
+
+        return {
+            "time": self.bot.embed_ts(),
+            "blocked": blocked,
+            "command": command,
+            "task": repr(task),
+            "stack": stack.rstrip(),
+        }
+
+    def summary(self):
+        """Watchdog | Summary
+
+        A short description of the most recent stall, or `None` if there hasn't been one.
+        """
+        if not self.stalls:
+            return None
+        stall = self.stalls[-1]
+        return (f"{stall['blocked']:.2f}s in {stall['command']}, "
+                f"{stall['time'].strftime('%m/%d/%Y %I:%M:%S %p')} UTC ({len(self.stalls)} recent)")
+
+    async def close(self):
+        """Watchdog | Close
+
+        Stop the heartbeat and the watchdog thread.
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
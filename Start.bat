@@ -1,6 +1,3 @@
-:loop
-py main.py
-timeout /t 5
-goto loop
+:: The supervisor restarts the bot when it stops, backing off if it keeps crashing.
+py supervisor.py
 PAUSE
-ECHO "Somehow returned from infinite loop. Time to start panicking."
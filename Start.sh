@@ -1,10 +1,8 @@
 #!/bin/sh
 
-TIMEOUT="5s"
+# The supervisor restarts the bot when it stops, backing off if it keeps crashing.
+python supervisor.py
 
-while : ; do
-  python main.py
-  echo "Restarting in $TIMEOUT"
-  sleep $TIMEOUT
-done
-echo "Somehow returned from infinite loop. Time to start panicking."
+# Keep the window open, to read why the bot stopped.
+printf "Press enter to continue."
+read _
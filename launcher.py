@@ -0,0 +1,19 @@
+"""Multi-Process Launcher
+
+Starts the bot as several processes, splitting the gateway shards between
+them as set in the `Sharding` section of `Config.yml`.
+
+Use this instead of `main.py` when `Processes` is more than 1.
+"""
+from yaml import load
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+from Resources.Launcher import Launcher
+
+if __name__ == '__main__':
+    with open("./Config.yml", 'r') as file:
+        config = load(file, Loader = Loader)
+    Launcher(config).run()
@@ -0,0 +1,21 @@
+"""Supervisor
+
+Runs `main.py` and keeps it running, backing off after crashes and
+parking the bot when it keeps crashing, as set in the `Supervisor`
+section of `Config.yml`.
+
+The Start scripts run this. Use `launcher.py` instead when `Processes`
+is more than 1.
+"""
+from yaml import load
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+from Resources.Supervisor import Supervisor
+
+if __name__ == '__main__':
+    with open("./Config.yml", 'r') as file:
+        config = load(file, Loader = Loader)
+    Supervisor(config).run()
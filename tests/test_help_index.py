@@ -0,0 +1,101 @@
+"""Tests | Help Index
+
+Which commands the bot help lists, for members with and without the
+permitted roles, and in DMs, where server only commands can't be used.
+"""
+import unittest
+from types import SimpleNamespace
+
+from discord.ext import commands
+
+from Resources.HelpIndex import HelpIndex
+from Resources.Permissions import PermissionIndex
+
+MOD_ROLE = 20
+
+class Sample(commands.Cog, name = "Sample"):
+    """Sample commands."""
+    @commands.command(name = "ping")
+    async def ping(self, ctx):
+        pass
+
+    @commands.guild_only()
+    @commands.command(name = "prefix")
+    async def prefix(self, ctx):
+        pass
+
+    @commands.guild_only()
+    @commands.command(name = "kick")
+    async def kick(self, ctx):
+        pass
+
+    @commands.command(name = "secret", hidden = True)
+    async def secret(self, ctx):
+        pass
+
+class Moderation(commands.Cog, name = "Moderation"):
+    """Only usable in a server."""
+    def cog_check(self, ctx):
+        if ctx.guild is None:
+            raise commands.NoPrivateMessage()
+        return True
+
+    @commands.command(name = "warn")
+    async def warn(self, ctx):
+        pass
+
+def make_ctx(guild = True, role_ids = (), administrator = False):
+    """A context with only what the help index looks at."""
+    author = SimpleNamespace(
+        guild_permissions = SimpleNamespace(administrator = administrator),
+        roles = [SimpleNamespace(id = role_id) for role_id in role_ids],
+        _roles = sorted(role_ids),
+    )
+    return SimpleNamespace(guild = object() if guild else None, author = author, command = None)
+
+def listed(fields):
+    """cog name -> the command names in its field."""
+    return {field["name"]: field["value"].split("Commands:\n")[1] for field in fields}
+
+class HelpIndexTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bot = commands.Bot(command_prefix = "-")
+        self.bot.add_cog(Sample())
+        self.bot.add_cog(Moderation())
+        self.bot.permission_index = PermissionIndex({"kick": [MOD_ROLE]})
+        self.index = HelpIndex(self.bot)
+
+    async def asyncTearDown(self):
+        await self.bot.close()
+
+    async def test_dm_hides_guild_only_commands(self):
+        fields = listed(await self.index.bot_fields(make_ctx(guild = False)))
+        self.assertEqual(fields, {"Sample": "`ping`"})
+
+    async def test_member_without_role(self):
+        fields = listed(await self.index.bot_fields(make_ctx()))
+        self.assertEqual(fields, {"Sample": "`ping`, `prefix`", "Moderation": "`warn`"})
+
+    async def test_member_with_role(self):
+        fields = listed(await self.index.bot_fields(make_ctx(role_ids = (5, MOD_ROLE))))
+        self.assertEqual(fields, {"Sample": "`kick`, `ping`, `prefix`", "Moderation": "`warn`"})
+
+    async def test_administrator_sees_everything_but_hidden(self):
+        fields = listed(await self.index.bot_fields(make_ctx(administrator = True)))
+        self.assertEqual(fields, {"Sample": "`kick`, `ping`, `prefix`", "Moderation": "`warn`"})
+
+    async def test_cached_results_still_check_each_context(self):
+        # The same roles in a server and a DM can't share a result.
+        await self.index.bot_fields(make_ctx())
+        fields = listed(await self.index.bot_fields(make_ctx(guild = False)))
+        self.assertEqual(fields, {"Sample": "`ping`"})
+        fields = listed(await self.index.bot_fields(make_ctx()))
+        self.assertEqual(fields, {"Sample": "`ping`, `prefix`", "Moderation": "`warn`"})
+
+    async def test_checks_leave_context_command_alone(self):
+        ctx = make_ctx(guild = False)
+        await self.index.bot_fields(ctx)
+        self.assertIsNone(ctx.command)
+
+if __name__ == '__main__':
+    unittest.main()
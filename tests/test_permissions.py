@@ -0,0 +1,89 @@
+"""Tests | Permission Index
+
+The permission check's lookups: `allowed` for listed and unlisted commands,
+`has_any` hitting and missing, members and permissions without any roles,
+reading a member's role IDs, and compiling role placeholders from `Permissions.yml`.
+"""
+import unittest
+from types import SimpleNamespace
+
+from Resources.Permissions import PermissionConfigError, PermissionIndex, compile_permissions
+
+ADMIN = 100
+MOD = 200
+MEMBER = 300
+
+class PermissionIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = PermissionIndex({
+            "prefix": [ADMIN],
+            "cog-load": [ADMIN, MOD],
+            "nobody": [],
+        })
+
+    def test_names_use_qualified_names(self):
+        self.assertEqual(self.index.roles_for("cog load"), frozenset({ADMIN, MOD}))
+        self.assertIsNone(self.index.roles_for("cog-load"))
+        self.assertEqual(self.index.role_ids, (ADMIN, MOD))
+
+    def test_allowed_hit(self):
+        self.assertTrue(self.index.allowed("prefix", [ADMIN]))
+        self.assertTrue(self.index.allowed("cog load", [MOD, MEMBER]))
+        self.assertTrue(self.index.allowed("cog load", [1, 2, ADMIN, 999]))
+
+    def test_allowed_miss(self):
+        self.assertFalse(self.index.allowed("prefix", [MOD, MEMBER]))
+        self.assertFalse(self.index.allowed("cog load", [MEMBER]))
+
+    def test_unlisted_command_allows_anyone(self):
+        self.assertTrue(self.index.allowed("ping", []))
+        self.assertTrue(self.index.allowed("ping", [MEMBER]))
+
+    def test_empty_role_lists(self):
+        # A member without any roles can't use a listed command.
+        self.assertFalse(self.index.allowed("prefix", []))
+        # A permission without any roles can't be used by anyone.
+        self.assertFalse(self.index.allowed("nobody", [ADMIN, MOD, MEMBER]))
+        self.assertTrue(PermissionIndex().allowed("prefix", []))
+
+    def test_has_any(self):
+        self.assertTrue(PermissionIndex.has_any(frozenset({MOD}), (ADMIN, MOD, MEMBER)))
+        self.assertTrue(PermissionIndex.has_any(frozenset({MEMBER}), (ADMIN, MOD, MEMBER)))
+        # Past either end of the member's roles.
+        self.assertFalse(PermissionIndex.has_any(frozenset({1}), (ADMIN, MOD, MEMBER)))
+        self.assertFalse(PermissionIndex.has_any(frozenset({999}), (ADMIN, MOD, MEMBER)))
+        # Between two of them.
+        self.assertFalse(PermissionIndex.has_any(frozenset({150}), (ADMIN, MOD, MEMBER)))
+        self.assertFalse(PermissionIndex.has_any(frozenset(), (ADMIN,)))
+        self.assertFalse(PermissionIndex.has_any(frozenset({ADMIN}), ()))
+
+    def test_member_role_ids(self):
+        roles = [SimpleNamespace(id = role_id) for role_id in (MEMBER, ADMIN)]
+        member = SimpleNamespace(roles = roles, _roles = [ADMIN, MEMBER])
+        self.assertIs(PermissionIndex.member_role_ids(member), member._roles)
+        # Without discord.py's private list, the public roles are used, sorted.
+        member = SimpleNamespace(roles = roles)
+        self.assertEqual(PermissionIndex.member_role_ids(member), [ADMIN, MEMBER])
+        self.assertTrue(self.index.allowed("prefix", PermissionIndex.member_role_ids(member)))
+
+class CompilePermissionsTests(unittest.TestCase):
+    def test_placeholders_and_ids(self):
+        table = compile_permissions({
+            "Roles": {"Admin": str(ADMIN), "Mod": MOD},
+            "prefix": ["{Admin}"],
+            "cog-load": ["{Admin}", "{Mod}", MEMBER, str(MEMBER)],
+        })
+        self.assertEqual(table, {"prefix": frozenset({ADMIN}), "cog-load": frozenset({ADMIN, MOD, MEMBER})})
+
+    def test_every_problem_is_reported(self):
+        with self.assertRaises(PermissionConfigError) as raised:
+            compile_permissions({
+                "Roles": {"Admin": "not an id"},
+                "prefix": ["{Unknown}"],
+                "restart": "{Admin}",
+                "memory": ["admin"],
+            })
+        self.assertEqual(len(raised.exception.errors), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Tests | Rate Limiter
+
+Buckets refilling and rejecting commands in each scope (user, channel, and
+server), rejected commands not using up tokens, and the notice only being
+asked for once per window.
+
+The clock is patched, so nothing waits on real time.
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from Resources.RateLimit import RateLimited, RateLimiter, compile_rate_limits
+
+def make_limits(user = None, channel = None, guild = None, commands = None):
+    """Compile a `Rate Limits` config section, each limit given as (uses, per)."""
+    def setting(limit):
+        return None if limit is None else {"Uses": limit[0], "Per": limit[1]}
+    return compile_rate_limits({
+        "Enabled": True,
+        "Default": {"User": setting(user), "Channel": setting(channel), "Guild": setting(guild)},
+        "Commands": commands,
+    })
+
+def make_ctx(user = 1, channel = 10, guild = 100, command = "ping"):
+    """A context with only what the rate limiter looks at, `guild = None` for a DM."""
+    return SimpleNamespace(
+        command = SimpleNamespace(qualified_name = command),
+        author = SimpleNamespace(id = user),
+        channel = SimpleNamespace(id = channel),
+        guild = None if guild is None else SimpleNamespace(id = guild),
+    )
+
+class RateLimiterTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        clock = mock.patch("Resources.RateLimit.time.monotonic", side_effect = lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def make_limiter(self, **limits):
+        self.limiter = RateLimiter(SimpleNamespace(rate_limits = make_limits(**limits)))
+        return self.limiter
+
+    async def use(self, **ctx):
+        """Use a command, returning the `RateLimited` error, or `None` if it was allowed."""
+        try:
+            self.assertTrue(await self.limiter.check(make_ctx(**ctx)))
+        except RateLimited as e:
+            return e
+        return None
+
+    async def test_disabled(self):
+        limiter = RateLimiter(SimpleNamespace(rate_limits = compile_rate_limits({"Enabled": False})))
+        for _ in range(100):
+            self.assertTrue(await limiter.check(make_ctx()))
+
+    async def test_user_scope(self):
+        self.make_limiter(user = (2, 10))
+        self.assertIsNone(await self.use(user = 1))
+        self.assertIsNone(await self.use(user = 1))
+        error = await self.use(user = 1)
+        self.assertEqual(error.scope, "User")
+        # Half a use refills every 5 seconds, the next full one is 5 seconds away.
+        self.assertAlmostEqual(error.retry_after, 5.0)
+        # Other users have their own buckets, in any channel.
+        self.assertIsNone(await self.use(user = 2))
+        self.assertIsNotNone(await self.use(user = 1, channel = 11))
+
+    async def test_refill(self):
+        self.make_limiter(user = (2, 10))
+        await self.use()
+        await self.use()
+        self.now += 4.9
+        self.assertIsNotNone(await self.use())
+        self.now += 0.1
+        self.assertIsNone(await self.use())
+        self.assertIsNotNone(await self.use())
+
+        # A bucket never holds more than `Uses`, however long it waits.
+        self.now += 3600
+        self.assertIsNone(await self.use())
+        self.assertIsNone(await self.use())
+        self.assertIsNotNone(await self.use())
+
+    async def test_channel_scope(self):
+        self.make_limiter(user = (5, 10), channel = (3, 10))
+        for user in (1, 2, 3):
+            self.assertIsNone(await self.use(user = user, channel = 10))
+        self.assertEqual((await self.use(user = 4, channel = 10)).scope, "Channel")
+        self.assertIsNone(await self.use(user = 4, channel = 11))
+
+    async def test_guild_scope(self):
+        self.make_limiter(guild = (3, 10))
+        for channel in (10, 11, 12):
+            self.assertIsNone(await self.use(user = channel, channel = channel, guild = 100))
+        self.assertEqual((await self.use(user = 5, channel = 13, guild = 100)).scope, "Guild")
+        self.assertIsNone(await self.use(user = 5, channel = 13, guild = 200))
+
+    async def test_dm_skips_guild_scope(self):
+        self.make_limiter(guild = (1, 10))
+        for _ in range(5):
+            self.assertIsNone(await self.use(guild = None))
+
+    async def test_rejected_command_uses_no_tokens(self):
+        self.make_limiter(user = (2, 10), channel = (1, 10))
+        self.assertIsNone(await self.use(user = 1, channel = 10))
+        # Rejected by the channel, so user 2 keeps both of their uses.
+        self.assertEqual((await self.use(user = 2, channel = 10)).scope, "Channel")
+        self.assertIsNone(await self.use(user = 2, channel = 11))
+        self.assertIsNone(await self.use(user = 2, channel = 12))
+        self.assertEqual((await self.use(user = 2, channel = 13)).scope, "User")
+
+    async def test_command_override(self):
+        self.make_limiter(user = (1, 10), commands = {"daily": {"User": {"Uses": 1, "Per": 60}}})
+        self.assertIsNone(await self.use(command = "daily"))
+        # The override has its own bucket, separate from the default one.
+        self.assertIsNone(await self.use(command = "ping"))
+        self.now += 10
+        self.assertIsNone(await self.use(command = "ping"))
+        self.assertIsNotNone(await self.use(command = "daily"))
+
+    async def test_notifies_once_per_window(self):
+        self.make_limiter(user = (1, 10))
+        await self.use()
+        self.assertTrue((await self.use()).notify)
+        self.now += 5
+        self.assertFalse((await self.use()).notify)
+        # Other users are told the first time they are limited.
+        await self.use(user = 2)
+        self.assertTrue((await self.use(user = 2)).notify)
+
+        # Once the window is over, being limited again is told again.
+        self.now += 5
+        await self.use()
+        self.assertTrue((await self.use()).notify)
+        self.assertEqual(self.limiter.limited, 4)
+
+    async def test_sweep_drops_full_buckets(self):
+        self.make_limiter(user = (2, 10))
+        await self.use(user = 1)
+        self.now += 55
+        await self.use(user = 2)
+        self.now += 6
+        # The next check sweeps: user 1's bucket is full again, user 2's is still refilling.
+        await self.use(user = 3)
+        self.assertEqual({key[1] for key in self.limiter._buckets}, {2, 3})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+"""Tests | Storage Backends
+
+Round trips through both backends, the JSON backend surviving a crash while
+writing its data file, and migrating a JSON data file into SQLite.
+
+Only needs the standard library, run with `python -m unittest` (or pytest).
+"""
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from Resources.Storage import JSONBackend, SQLiteBackend, GLOBAL, GUILD, USER
+
+class FakeLogger:
+    """Keeps logged errors, instead of the bot's logger."""
+    def __init__(self):
+        self.errors = []
+
+    def err(self, message, **fields):
+        self.errors.append(message)
+
+def make_bot(directory):
+    """The bot attributes the storage backends use."""
+    return SimpleNamespace(
+        data_file = os.path.join(directory, "data_storage.json"),
+        database_file = os.path.join(directory, "data.sqlite3"),
+        flush_interval = 60,
+        flush_threshold = 100,
+        logger = FakeLogger(),
+        loop = None,
+    )
+
+async def fill(backend):
+    """Write a key in every scope, including two guilds and a nested value."""
+    await backend.set("owner", 1234)
+    await backend.set("prefix", "?", scope = GUILD, id = 1)
+    await backend.set("prefix", "!", scope = GUILD, id = 2)
+    await backend.set("muted", [5, 6], scope = GUILD, id = 1)
+    await backend.set("settings", {"dm": True, "tags": ["a", "b"]}, scope = USER, id = 10)
+
+class BackendTests:
+    """The same round trips, run against each backend."""
+    def open_backend(self):
+        raise NotImplementedError
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.bot = make_bot(self.directory.name)
+        self.bot.loop = asyncio.get_running_loop()
+        self.backend = self.open_backend()
+
+    async def asyncTearDown(self):
+        await self.backend.close()
+        self.directory.cleanup()
+
+    async def test_set_and_get(self):
+        await fill(self.backend)
+        self.assertEqual(await self.backend.get("owner"), 1234)
+        self.assertEqual(await self.backend.get("prefix", scope = GUILD, id = 1), "?")
+        self.assertEqual(await self.backend.get("prefix", scope = GUILD, id = 2), "!")
+        self.assertEqual(await self.backend.get("settings", scope = USER, id = 10), {"dm": True, "tags": ["a", "b"]})
+
+    async def test_get_missing_returns_default(self):
+        self.assertIsNone(await self.backend.get("owner"))
+        self.assertEqual(await self.backend.get("prefix", scope = GUILD, id = 3, default = "-"), "-")
+
+    async def test_set_replaces(self):
+        await self.backend.set("prefix", "?", scope = GUILD, id = 1)
+        await self.backend.set("prefix", ">", scope = GUILD, id = 1)
+        self.assertEqual(await self.backend.get("prefix", scope = GUILD, id = 1), ">")
+
+    async def test_delete(self):
+        await fill(self.backend)
+        await self.backend.delete("owner")
+        await self.backend.delete("prefix", scope = GUILD, id = 1)
+        # Deleting something that isn't there does nothing.
+        await self.backend.delete("prefix", scope = GUILD, id = 3)
+
+        self.assertIsNone(await self.backend.get("owner"))
+        self.assertIsNone(await self.backend.get("prefix", scope = GUILD, id = 1))
+        # Other keys and IDs are left alone.
+        self.assertEqual(await self.backend.get("muted", scope = GUILD, id = 1), [5, 6])
+        self.assertEqual(await self.backend.get("prefix", scope = GUILD, id = 2), "!")
+
+    async def test_scan(self):
+        await fill(self.backend)
+        self.assertEqual(await self.backend.scan(GLOBAL), [(None, "owner", 1234)])
+        self.assertEqual(sorted(await self.backend.scan(GUILD)), [(1, "muted", [5, 6]), (1, "prefix", "?"), (2, "prefix", "!")])
+        self.assertEqual(sorted(await self.backend.scan(GUILD, key = "prefix")), [(1, "prefix", "?"), (2, "prefix", "!")])
+        self.assertEqual(sorted(await self.backend.scan(GUILD, id = 1)), [(1, "muted", [5, 6]), (1, "prefix", "?")])
+        self.assertEqual(await self.backend.scan(GUILD, id = 2, key = "prefix"), [(2, "prefix", "!")])
+        self.assertEqual(await self.backend.scan(USER, id = 11), [])
+
+    async def test_reopen(self):
+        await fill(self.backend)
+        await self.backend.close()
+
+        self.backend = self.open_backend()
+        self.assertEqual(await self.backend.get("owner"), 1234)
+        self.assertEqual(sorted(await self.backend.scan(GUILD, key = "prefix")), [(1, "prefix", "?"), (2, "prefix", "!")])
+        self.assertEqual(await self.backend.get("settings", scope = USER, id = 10), {"dm": True, "tags": ["a", "b"]})
+
+class JSONBackendTests(BackendTests, unittest.IsolatedAsyncioTestCase):
+    def open_backend(self):
+        backend = JSONBackend(self.bot)
+        backend.load()
+        backend.start()
+        return backend
+
+    def read_file(self):
+        with open(self.bot.data_file, 'r', encoding = "utf-8") as file:
+            return json.load(file)
+
+    async def test_flush_writes_file(self):
+        await fill(self.backend)
+        await self.backend.flush()
+        self.assertEqual(self.read_file(), {
+            "owner": 1234,
+            "guild:1": {"prefix": "?", "muted": [5, 6]},
+            "guild:2": {"prefix": "!"},
+            "user:10": {"settings": {"dm": True, "tags": ["a", "b"]}},
+        })
+
+    async def test_flush_only_changed_keys(self):
+        await fill(self.backend)
+        await self.backend.flush()
+        await self.backend.set("prefix", ">", scope = GUILD, id = 2)
+        await self.backend.delete("owner")
+
+        with mock.patch("Resources.Storage.json.dumps", wraps = json.dumps) as dumps:
+            await self.backend.flush()
+        # Only the changed guild is serialized again, the deleted key is just dropped.
+        self.assertEqual([call.args[0] for call in dumps.call_args_list if not isinstance(call.args[0], str)], [{"prefix": ">"}])
+        self.assertNotIn("owner", self.read_file())
+        self.assertEqual(self.read_file()["guild:2"], {"prefix": ">"})
+
+    async def test_crash_mid_write_keeps_old_file(self):
+        await fill(self.backend)
+        await self.backend.flush()
+        await self.backend.set("owner", 5678)
+
+        # The write dies after the temp file is written, before it replaces the data file.
+        with mock.patch("Resources.Storage.os.replace", side_effect = OSError("disk full")):
+            await self.backend.flush()
+
+        self.assertEqual(self.read_file()["owner"], 1234)
+        self.assertEqual(self.bot.logger.errors, ["Could not save data"])
+        # The temp file is cleaned up.
+        self.assertEqual(os.listdir(self.directory.name), ["data_storage.json"])
+
+        # The change is still pending, and the next flush writes it.
+        await self.backend.flush()
+        self.assertEqual(self.read_file()["owner"], 5678)
+
+    async def test_load_ignores_leftover_temp_file(self):
+        await fill(self.backend)
+        await self.backend.close()
+        # A process killed mid-write leaves a half written temp file next to the data file.
+        with open(os.path.join(self.directory.name, ".data_storage.json.abc.tmp"), 'w') as file:
+            file.write('{"owner": 56')
+
+        self.backend = self.open_backend()
+        self.assertEqual(await self.backend.get("owner"), 1234)
+
+    async def test_flush_now_without_loop(self):
+        backend = JSONBackend(self.bot)
+        backend.load()
+        await backend.set("owner", 42)
+        # The flusher was never started, as after the loop has stopped.
+        backend.flush_now()
+        self.assertEqual(self.read_file(), {"owner": 42})
+
+class SQLiteBackendTests(BackendTests, unittest.IsolatedAsyncioTestCase):
+    def open_backend(self):
+        backend = SQLiteBackend(self.bot)
+        backend.load()
+        backend.start()
+        return backend
+
+class MigrationTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.bot = make_bot(self.directory.name)
+        self.bot.loop = asyncio.get_running_loop()
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def test_json_to_sqlite(self):
+        source = JSONBackend(self.bot)
+        source.load()
+        await fill(source)
+        source.flush_now()
+
+        # A bot set up with the SQLite backend, reading the other bot's data file.
+        target = SQLiteBackend(make_bot(self.directory.name))
+        target.load()
+        try:
+            # What the 'migrate' command does, see `DataManager.migrate`.
+            with open(self.bot.data_file, 'r', encoding = "utf-8") as file:
+                counts = target.import_data(json.load(file))
+
+            self.assertEqual(counts, {GLOBAL: 1, GUILD: 3, USER: 1})
+            for scope in (GLOBAL, GUILD, USER):
+                self.assertEqual(sorted(await target.scan(scope), key = repr), sorted(await source.scan(scope), key = repr))
+
+            # Importing again replaces the rows instead of duplicating them.
+            target.import_data({"owner": 99, "guild:1": {"prefix": "$"}})
+            self.assertEqual(await target.get("owner"), 99)
+            self.assertEqual(await target.get("prefix", scope = GUILD, id = 1), "$")
+            self.assertEqual(len(await target.scan(GUILD)), 3)
+        finally:
+            await target.close()
+
+    async def test_unscoped_keys_stay_global(self):
+        target = SQLiteBackend(self.bot)
+        target.load()
+        try:
+            # Keys that only look like a scope are kept as global keys.
+            counts = target.import_data({"guild:abc": 1, "note:5": "x"})
+            self.assertEqual(counts, {GLOBAL: 2, GUILD: 0, USER: 0})
+            self.assertEqual(await target.get("guild:abc"), 1)
+        finally:
+            await target.close()
+
+if __name__ == '__main__':
+    unittest.main()
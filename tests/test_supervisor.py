@@ -0,0 +1,94 @@
+"""Tests | Supervisor
+
+The crash backoff growing and being capped, starting over once the bot ran
+long enough to count as stable, parking the bot after too many crashes in
+the crash window, and which exit codes the supervisor restarts after.
+
+The clock, the jitter, and the bot process are all patched out.
+"""
+import unittest
+from unittest import mock
+
+from Resources.Supervisor import CONFIG_EXIT_CODE, RESTART_EXIT_CODE, Supervisor
+
+CONFIG = {
+    'Supervisor': {
+        'Base Delay': 5,
+        'Max Delay': 60,
+        'Crash Limit': 3,
+        'Crash Window': 10,
+        'Park Time': 30,
+        'Stable After': 300,
+    }
+}
+
+class SupervisorTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patches = [
+            mock.patch("Resources.Supervisor.time.monotonic", side_effect = lambda: self.now),
+            # Always the longest delay the jitter allows, so each delay is known.
+            mock.patch("Resources.Supervisor.random.uniform", side_effect = lambda low, high: high),
+            mock.patch.object(Supervisor, "log"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.supervisor = Supervisor(CONFIG)
+
+    def crash(self, ran_for = 1, after = 120):
+        """Crash after running for `ran_for` seconds, `after` seconds since the last crash."""
+        self.now += after
+        return self.supervisor.crashed(ran_for)
+
+    def test_backoff_doubles_up_to_max(self):
+        # Spread out enough that the crash limit is never reached.
+        delays = [self.crash(after = 600) for _ in range(6)]
+        self.assertEqual(delays, [5, 10, 20, 40, 60, 60])
+
+    def test_backoff_resets_after_stable_after(self):
+        self.assertEqual([self.crash(after = 600) for _ in range(3)], [5, 10, 20])
+        # A bot that ran for at least `Stable After` starts over at the base delay.
+        self.assertEqual(self.crash(ran_for = 300, after = 600), 5)
+        self.assertEqual(self.crash(after = 600), 10)
+        # Just short of it keeps backing off.
+        self.assertEqual(self.crash(ran_for = 299, after = 600), 20)
+
+    def test_parks_after_crash_limit(self):
+        self.assertEqual(self.crash(after = 60), 5)
+        self.assertEqual(self.crash(after = 60), 10)
+        # The third crash within 10 minutes parks the bot for 30 minutes.
+        self.assertEqual(self.crash(after = 60), 30 * 60)
+        # Afterwards the count and the backoff start over.
+        self.assertEqual(self.crash(after = 60), 5)
+        self.assertEqual(self.crash(after = 60), 10)
+
+    def test_crashes_outside_window_dont_count(self):
+        self.crash(after = 60)
+        self.crash(after = 60)
+        # The first crash is now more than 10 minutes ago.
+        self.assertNotEqual(self.crash(after = 541), 30 * 60)
+        self.assertEqual(len(self.supervisor.crashes), 2)
+
+    def run_with(self, codes):
+        """Run the supervisor with the bot exiting with each code in turn, returning the sleeps."""
+        results = iter([(code, 1.0) for code in codes])
+        with mock.patch.object(self.supervisor, "run_once", side_effect = lambda: next(results)), \
+             mock.patch("Resources.Supervisor.time.sleep") as sleep:
+            self.supervisor.run()
+        self.assertIsNone(next(results, None), "the supervisor stopped early")
+        return [call.args[0] for call in sleep.call_args_list]
+
+    def test_shutdown_stops(self):
+        self.assertEqual(self.run_with([0]), [])
+
+    def test_config_error_stops(self):
+        # Starting again would only fail the same way.
+        self.assertEqual(self.run_with([1, CONFIG_EXIT_CODE]), [5])
+
+    def test_restart_starts_again_right_away(self):
+        # The restart isn't a crash, and starts the backoff over.
+        self.assertEqual(self.run_with([1, RESTART_EXIT_CODE, 1, 0]), [5, 5])
+
+if __name__ == '__main__':
+    unittest.main()